@@ -0,0 +1,46 @@
+# PYTHONPATH=. python benchmarks/data_channel_update_benchmark.py --sizes 512 1024 2048 --stripes 1 16
+# PYTHONPATH=. python benchmarks/data_channel_update_benchmark.py --sizes 2048 --duration 10
+
+# Measure the sustained rate of data channel updates for full frames and for frames delivered as horizontal stripes
+# (like a progressive scan). The consumer keeps the most recent frame, like the data item fed by the channel does.
+
+import argparse
+import time
+
+import numpy
+
+from nion.data import DataAndMetadata
+from nion.swift.model import HardwareSource
+
+parser = argparse.ArgumentParser(description='Benchmark data channel update throughput.')
+parser.add_argument('--sizes', dest='sizes', type=int, nargs='+', default=[512, 1024, 2048], help='Frame sizes (square)')
+parser.add_argument('--stripes', dest='stripes', type=int, nargs='+', default=[1, 16], help='Updates per frame; 1 is full frame updates')
+parser.add_argument('--duration', dest='duration', type=float, default=2.0, help='Duration of each measurement, in seconds')
+parser.add_argument('--dtype', dest='dtype', default='float32', help='Data type of the frames')
+args = parser.parse_args()
+
+
+def measure(size: int, stripes: int, duration: float) -> float:
+    # return the number of updates per second.
+    hardware_source = HardwareSource.HardwareSource("benchmark", "Benchmark")
+    data_channel = HardwareSource.DataChannel(hardware_source, 0)
+    xdata = DataAndMetadata.new_data_and_metadata(numpy.random.randn(size, size).astype(args.dtype), metadata={"frame": {"exposure": 0.01}})
+    stripe_height = size // stripes
+    latest = None
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for stripe in range(stripes):
+            sub_area = ((stripe * stripe_height, 0), (stripe_height, size)) if stripes > 1 else None
+            data_channel.update(xdata, "partial" if stripe < stripes - 1 else "complete", sub_area, None)
+            latest = data_channel.data_and_metadata
+            count += 1
+    elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+for size in args.sizes:
+    for stripes in args.stripes:
+        rate = measure(size, stripes, args.duration)
+        frame_bytes = size * size * numpy.dtype(args.dtype).itemsize
+        print("{:>5}x{:<5} {:>3} stripes  {:10.1f} updates/s  {:8.1f} frames/s  {:8.2f} GB/s of frames".format(size, size, stripes, rate, rate / stripes, rate / stripes * frame_bytes / 1e9))
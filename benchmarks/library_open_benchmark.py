@@ -0,0 +1,75 @@
+# PYTHONPATH=. python benchmarks/library_open_benchmark.py --counts 1000 10000 50000 --workers 1 8 16
+# PYTHONPATH=. python benchmarks/library_open_benchmark.py --counts 1000 --directory /mnt/network/scratch
+
+# Measure the time to scan a library directory and read the properties of every data item, which dominates the time
+# to open a library. Synthetic items are small ndata files laid out in session directories like a real library.
+
+import argparse
+import copy
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy
+
+from nion.swift.model import DataItem
+from nion.swift.model import DocumentModel
+from nion.swift.model import NDataHandler
+
+parser = argparse.ArgumentParser(description='Benchmark library open time.')
+parser.add_argument('--counts', dest='counts', type=int, nargs='+', default=[1000, 10000, 50000], help='Item counts')
+parser.add_argument('--workers', dest='workers', type=int, nargs='+', default=[1, 8], help='Worker counts')
+parser.add_argument('--directory', dest='directory', default=None, help='Directory in which to create the synthetic libraries')
+parser.add_argument('--items-per-session', dest='items_per_session', type=int, default=100, help='Items per session directory')
+args = parser.parse_args()
+
+
+def make_library(directory: str, count: int, items_per_session: int) -> None:
+    data = numpy.zeros((16, 16), numpy.float32)
+    template_data_item = DataItem.DataItem(data)
+    template_properties = template_data_item.write_to_dict()
+    template_properties["version"] = DataItem.DataItem.writer_version
+    now = datetime.datetime.now()
+    for index in range(count):
+        session_directory = os.path.join(directory, "2017", "01", "01", "20170101-{:06d}".format(index // items_per_session))
+        properties = copy.deepcopy(template_properties)
+        properties["uuid"] = str(uuid.uuid4())
+        handler = NDataHandler.NDataHandler(os.path.join(session_directory, "data_{:08d}.ndata".format(index)))
+        handler.write_properties(properties, now)
+        handler.write_data(data, now)
+
+
+def scan_library(directory: str, max_workers: int) -> float:
+    # find the files and read their properties; this part is dominated by file system latency.
+    start = time.perf_counter()
+    file_persistent_storage_system = DocumentModel.FileStorageSystem([directory], max_workers=max_workers)
+    storage_handlers = file_persistent_storage_system.find_data_items()
+    DocumentModel.map_threaded(lambda storage_handler: storage_handler.read_properties(), storage_handlers, max_workers)
+    return time.perf_counter() - start
+
+
+def open_library(directory: str, max_workers: int) -> float:
+    # find the files, read their properties, migrate, and construct the data items.
+    start = time.perf_counter()
+    file_persistent_storage_system = DocumentModel.FileStorageSystem([directory], max_workers=max_workers)
+    persistent_object_context = DocumentModel.PersistentDataItemContext([file_persistent_storage_system], ignore_older_files=True, log_migrations=False)
+    persistent_object_context.read_data_items()
+    return time.perf_counter() - start
+
+
+for count in args.counts:
+    library_directory = tempfile.mkdtemp(dir=args.directory)
+    try:
+        make_library(library_directory, count, args.items_per_session)
+        for max_workers in args.workers:
+            # the zip index cache would otherwise hide the cost of parsing the files.
+            NDataHandler.NDataHandler._zip_index_cache.clear()
+            scan_elapsed = scan_library(library_directory, max_workers)
+            NDataHandler.NDataHandler._zip_index_cache.clear()
+            open_elapsed = open_library(library_directory, max_workers)
+            print("{:>8} items  {:>3} workers  scan {:8.3f}s  open {:8.3f}s  {:8.1f} items/s".format(count, max_workers, scan_elapsed, open_elapsed, count / open_elapsed))
+    finally:
+        shutil.rmtree(library_directory)
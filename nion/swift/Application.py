@@ -173,8 +173,10 @@ class Application:
             workspace_dir = self.ui.get_persistent_string("workspace_location", workspace_dir)
         library_filename = "Nion Swift Workspace.nslib"
         cache_filename = "Nion Swift Cache {version}.nscache".format(version=DataItem.DataItem.writer_version)
+        manifest_filename = "Nion Swift Manifest {version}.nsmanifest".format(version=DataItem.DataItem.writer_version)
         library_path = os.path.join(workspace_dir, library_filename)
         cache_path = os.path.join(workspace_dir, cache_filename)
+        manifest_path = os.path.join(workspace_dir, manifest_filename)
         if not skip_choose and not os.path.exists(library_path):
             self.choose_library()
             return True
@@ -182,7 +184,8 @@ class Application:
         if os.path.exists(library_path):
             self.migrate_library(workspace_dir, library_path, welcome_message)
         self.workspace_dir = workspace_dir
-        file_persistent_storage_system = DocumentModel.FileStorageSystem([os.path.join(workspace_dir, "Nion Swift Data {version}".format(version=DataItem.DataItem.writer_version))])
+        # scan and read the library with several threads; this hides file system latency on network volumes.
+        file_persistent_storage_system = DocumentModel.FileStorageSystem([os.path.join(workspace_dir, "Nion Swift Data {version}".format(version=DataItem.DataItem.writer_version))], max_workers=8, manifest_path=manifest_path)
         create_new_document = not os.path.exists(library_path)
         if create_new_document:
             if welcome_message:
@@ -264,8 +267,9 @@ class Application:
         return True
 
     def continue_start(self, cache_path, create_new_document, file_persistent_storage_system, library_storage, workspace_dir, ignore_older_files, welcome_message=True):
-        storage_cache = Cache.DbStorageCache(cache_path)
+        storage_cache = Cache.make_library_storage_cache(cache_path)
         DocumentModel.DocumentModel.computation_min_period = 0.1
+        DocumentModel.DocumentModel.computation_thread_count = max(min(os.cpu_count() or 1, 8), 1)
         auto_migrations = list()
         auto_migrations.append(DocumentModel.AutoMigration([os.path.join(workspace_dir, "Nion Swift Data")]))
         auto_migrations.append(DocumentModel.AutoMigration([os.path.join(workspace_dir, "Nion Swift Data 10")]))
@@ -71,6 +71,7 @@ class DisplayItem:
 
         self.__thumbnail_updated_event_listener = None
         self.__thumbnail_source = None
+        self.__thumbnail_prefetched = False
 
     def close(self):
         # remove the listener.
@@ -87,6 +88,17 @@ class DisplayItem:
     def data_item(self):
         return self.__data_item
 
+    @property
+    def needs_thumbnail_prefetch(self) -> bool:
+        return not self.__thumbnail_source and not self.__thumbnail_prefetched
+
+    def take_thumbnail_prefetch_display(self):
+        """Return the display whose cached thumbnail should be prefetched, or None if already loaded or prefetched."""
+        if not self.needs_thumbnail_prefetch:
+            return None
+        self.__thumbnail_prefetched = True
+        return self.__data_item.primary_display_specifier.display
+
     def __create_thumbnail_source(self):
         # grab the display specifier and if there is a display, handle thumbnail updating.
         display_specifier = self.__data_item.primary_display_specifier
@@ -158,6 +170,22 @@ class DisplayItem:
         drawing_context.add(self.__create_thumbnail(rect.inset(6)))
 
 
+def prefetch_thumbnails(display_items: typing.Sequence[DisplayItem], display_item: DisplayItem, count: int) -> None:
+    """Prefetch the cached thumbnails of display_item and the count - 1 items following it with one cache request.
+
+    Called before painting a display item. The canvas items paint the visible items in order, so the first painted item
+    that needs a prefetch starts the visible range.
+    """
+    if display_item.needs_thumbnail_prefetch:
+        index = display_items.index(display_item)
+        displays = list()
+        for prefetch_display_item in display_items[index:index + count]:
+            display = prefetch_display_item.take_thumbnail_prefetch_display()
+            if display:
+                displays.append(display)
+        Thumbnails.ThumbnailManager().prefetch_thumbnail_data(displays)
+
+
 class DataListController:
     """Control a list of display items in a list widget.
 
@@ -188,6 +216,8 @@ class DataListController:
         (method) drag_started(ui, x, y, modifiers), returns mime_data, thumbnail_data
     """
 
+    thumbnail_prefetch_count = 64
+
     def __init__(self, dispatch_task, add_task, clear_task, ui, selection):
         super().__init__()
         self.dispatch_task = dispatch_task
@@ -214,6 +244,7 @@ class DataListController:
                 return self.__data_list_controller.display_items
 
             def paint_item(self, drawing_context, display_item, rect, is_selected):
+                self.__data_list_controller._prefetch_thumbnails(display_item)
                 display_item.draw_list_item(drawing_context, rect)
 
             def on_context_menu_event(self, index, x, y, gx, gy):
@@ -287,6 +318,9 @@ class DataListController:
     def make_selection_visible(self):
         self.__list_canvas_item.make_selection_visible()
 
+    def _prefetch_thumbnails(self, display_item):
+        prefetch_thumbnails(self.__display_items, display_item, self.thumbnail_prefetch_count)
+
     # this message comes from the canvas item when delete key is pressed
     def _delete_pressed(self):
         if callable(self.on_delete_data_items):
@@ -375,6 +409,8 @@ class DataGridController:
         (method) drag_started(ui, x, y, modifiers), returns mime_data, thumbnail_data
     """
 
+    thumbnail_prefetch_count = 64
+
     def __init__(self, dispatch_task, add_task, clear_task, ui, selection, direction=GridCanvasItem.Direction.Row, wrap=True):
         super(DataGridController, self).__init__()
         self.dispatch_task = dispatch_task
@@ -406,6 +442,7 @@ class DataGridController:
                 return self.__data_grid_controller.display_items
 
             def paint_item(self, drawing_context, display_item, rect, is_selected):
+                self.__data_grid_controller._prefetch_thumbnails(display_item)
                 display_item.draw_grid_item(drawing_context, rect)
 
             def on_context_menu_event(self, index, x, y, gx, gy):
@@ -496,6 +533,9 @@ class DataGridController:
     def make_selection_visible(self):
         self.icon_view_canvas_item.make_selection_visible()
 
+    def _prefetch_thumbnails(self, display_item):
+        prefetch_thumbnails(self.__display_items, display_item, self.thumbnail_prefetch_count)
+
     # this message comes from the canvas item when delete key is pressed
     def _delete_pressed(self):
         if callable(self.on_delete_data_items):
@@ -159,6 +159,7 @@ class DocumentController(Window.Window):
         self._file_menu = None
         self._edit_menu = None
         self._processing_menu = None
+        self._processing_batch_menu = None
         self._view_menu = None
         self._window_menu = None
         self._help_menu = None
@@ -343,6 +344,18 @@ class DocumentController(Window.Window):
         self._processing_sequence_menu.add_menu_item(_("Trim"), functools.partial(self.__processing_new, self.document_model.get_sequence_trim_new))
         self._processing_sequence_menu.add_menu_item(_("Extract"), functools.partial(self.__processing_new, self.document_model.get_sequence_extract_new))
 
+        self._processing_batch_menu = self.create_sub_menu()
+        self._processing_menu.add_sub_menu(_("Batch"), self._processing_batch_menu)
+        self._processing_menu.add_separator()
+
+        self._processing_batch_menu.add_menu_item(_("FFT"), functools.partial(self.processing_batch, "fft"))
+        self._processing_batch_menu.add_menu_item(_("Sobel Filter"), functools.partial(self.processing_batch, "sobel"))
+        self._processing_batch_menu.add_menu_item(_("Laplace Filter"), functools.partial(self.processing_batch, "laplace"))
+        self._processing_batch_menu.add_menu_item(_("Gaussian Blur"), functools.partial(self.processing_batch, "gaussian-blur"))
+        self._processing_batch_menu.add_menu_item(_("Median Filter"), functools.partial(self.processing_batch, "median-filter"))
+        self._processing_batch_menu.add_menu_item(_("Uniform Filter"), functools.partial(self.processing_batch, "uniform-filter"))
+        self._processing_batch_menu.add_menu_item(_("Negate"), functools.partial(self.processing_batch, "invert"))
+
         self._processing_menu.add_menu_item(_("Line Profile"), functools.partial(self.__processing_new, self.document_model.get_line_profile_new))
         self._processing_menu.add_menu_item(_("Histogram"), functools.partial(self.__processing_new, self.document_model.get_histogram_new))
         self._processing_menu.add_menu_item(_("Convert to Scalar"), functools.partial(self.__processing_new, self.document_model.get_convert_to_scalar_new))
@@ -764,7 +777,7 @@ class DocumentController(Window.Window):
         if not os.path.exists(library_path):
             with open(library_path, "w") as fp:
                 json.dump({}, fp)
-            storage_cache = Cache.DbStorageCache(cache_path)
+            storage_cache = Cache.make_library_storage_cache(cache_path)
             file_persistent_storage_system = DocumentModel.FileStorageSystem([data_path])
             library_storage = DocumentModel.FilePersistentStorage(library_path)
             document_model = DocumentModel.DocumentModel(library_storage=library_storage, persistent_storage_systems=[file_persistent_storage_system], storage_cache=storage_cache,
@@ -1149,6 +1162,16 @@ class DocumentController(Window.Window):
     def processing_invert(self):
         return DataItem.DisplaySpecifier.from_data_item(self.__processing_new(self.document_model.get_invert_new))
 
+    def processing_batch(self, processing_id: str) -> typing.List[DataItem.DataItem]:
+        """Apply the processing to each data item selected in the data panel, evaluating the computations together.
+
+        The processing must take a single source. Returns the new data items, skipping unsuitable selected data items.
+        """
+        selected_data_items = copy.copy(self.__data_browser_controller.selected_data_items)
+        inputs_list = [[(data_item, None)] for data_item in selected_data_items]
+        new_data_items = self.document_model.make_data_items_with_computation(processing_id, inputs_list)
+        return [data_item for data_item in new_data_items if data_item]
+
     def processing_duplicate(self):
         data_item = self.selected_display_specifier.data_item
         if data_item:
@@ -1730,10 +1730,10 @@ class HardwareSource(metaclass=SharedInstance):
     release = ["close", "profile_index", "get_default_frame_parameters", "get_frame_parameters", "get_frame_parameters_for_profile_by_index",
         "set_frame_parameters", "set_frame_parameters_for_profile_by_index", "start_playing", "stop_playing", "abort_playing", "is_playing",
         "start_recording", "abort_recording", "is_recording", "record", "create_record_task", "create_view_task", "grab_next_to_finish",
-        "grab_next_to_start", "get_property_as_float", "set_property_as_float", "get_property_as_int", "set_property_as_int", "get_property_as_bool",
+        "grab_next_to_start", "get_acquisition_statistics", "get_property_as_float", "set_property_as_float", "get_property_as_int", "set_property_as_int", "get_property_as_bool",
         "set_property_as_bool", "get_property_as_str", "set_property_as_str", "get_property_as_float_point", "set_property_as_float_point"]
 
-    threadsafe = ["record", "grab_next_to_finish", "grab_next_to_start", "set_property_as_float", "set_property_as_int", "set_property_as_bool",
+    threadsafe = ["record", "grab_next_to_finish", "grab_next_to_start", "get_acquisition_statistics", "set_property_as_float", "set_property_as_int", "set_property_as_bool",
         "set_property_as_str", "set_property_as_float_point"]
 
     def __init__(self, hardware_source):
@@ -1900,6 +1900,24 @@ class HardwareSource(metaclass=SharedInstance):
         result_str = pickle.dumps(result)
         return result_str
 
+    def get_acquisition_statistics(self, task_id: str=None) -> dict:
+        """Return the statistics of the intervals between acquisitions of a task of this hardware source.
+
+        The statistics are a dict with keys count, mean_interval, min_interval, max_interval, jitter (the standard
+        deviation of the intervals), target_period, mean_error (the mean absolute difference between the intervals and
+        the target period) and late_count, in seconds. Values are None when unknown.
+
+        .. versionadded:: 1.0
+
+        :param task_id: The task, 'view' or 'record'. Pass None for the most recently started task.
+        :type task_id: str
+
+        Scriptable: Yes
+        """
+        if task_id is None:
+            return self.__hardware_source.acquisition_statistics.as_dict()
+        return self.__hardware_source.get_task_acquisition_statistics(task_id).as_dict()
+
     def get_property_as_float(self, name):
         return float(self.__hardware_source.get_property(name))
 
@@ -2085,7 +2103,8 @@ class Library(metaclass=SharedInstance):
                "get_data_item_by_uuid", "get_graphic_by_uuid",
                "get_source_data_items", "get_dependent_data_items", "has_library_value", "get_library_value",
                "set_library_value", "delete_library_value",
-               "copy_data_item", "snapshot_data_item"]
+               "copy_data_item", "snapshot_data_item", "get_computation_profile", "reset_computation_profile",
+               "get_data_channel_update_counts", "reset_data_channel_update_counts"]
 
     def __init__(self, document_model: DocumentModelModule.DocumentModel):
         self.__document_model = document_model
@@ -2404,6 +2423,50 @@ class Library(metaclass=SharedInstance):
             return
         raise KeyError()
 
+    def get_computation_profile(self) -> typing.List[dict]:
+        """Return the timings of the computations in the library, most total compute time first.
+
+        Each entry is a dict describing the computation of a data item with keys data_item_uuid, title, processing_id,
+        computation_count, memoized_count, incremental_count, cancelled_count and result_nbytes. The keys
+        queue_latency, evaluate_duration, compute_duration and merge_duration map to dicts of count, total, max, last
+        and mean, in seconds.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        return self.__document_model.computation_profile.get_records()
+
+    def get_data_channel_update_counts(self) -> typing.List[dict]:
+        """Return the frames of each hardware source data channel produced, displayed and dropped before display.
+
+        Each entry is a dict with keys hardware_source_id, channel_id, produced_count, displayed_count, dropped_count
+        and pending_count. Frames are dropped when the display falls behind the acquisition.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        return self.__document_model.get_data_channel_update_counts()
+
+    def reset_computation_profile(self) -> None:
+        """Clear the timings of the computations in the library.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        self.__document_model.computation_profile.reset()
+
+    def reset_data_channel_update_counts(self) -> None:
+        """Clear the counts of the frames of the hardware source data channels in the library.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        self.__document_model.reset_data_channel_update_counts()
+
 
 class DocumentWindow(metaclass=SharedInstance):
 
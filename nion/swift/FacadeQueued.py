@@ -425,6 +425,12 @@ class Library:
     def delete_library_value(self, key):
         call_method(self, 'delete_library_value', key)
 
+    def get_computation_profile(self):
+        return call_method(self, 'get_computation_profile')
+
+    def get_data_channel_update_counts(self):
+        return call_method(self, 'get_data_channel_update_counts')
+
     def get_data_item_by_uuid(self, data_item_uuid):
         return call_method(self, 'get_data_item_by_uuid', data_item_uuid)
 
@@ -449,6 +455,12 @@ class Library:
     def has_library_value(self, key):
         return call_method(self, 'has_library_value', key)
 
+    def reset_computation_profile(self):
+        call_method(self, 'reset_computation_profile')
+
+    def reset_data_channel_update_counts(self):
+        call_method(self, 'reset_data_channel_update_counts')
+
     def set_library_value(self, key, value):
         call_method(self, 'set_library_value', key, value)
 
@@ -615,6 +627,9 @@ class HardwareSource:
     def create_view_task(self, frame_parameters=None, channels_enabled=None, buffer_size=1):
         return call_method(self, 'create_view_task', frame_parameters=frame_parameters, channels_enabled=channels_enabled, buffer_size=buffer_size)
 
+    def get_acquisition_statistics(self, task_id=None):
+        return call_threadsafe_method(self, 'get_acquisition_statistics', task_id=task_id)
+
     def get_default_frame_parameters(self):
         return call_method(self, 'get_default_frame_parameters')
 
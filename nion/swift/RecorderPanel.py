@@ -1,7 +1,9 @@
 # standard libraries
 import gettext
 import numpy
+import threading
 import time
+import typing
 
 # third party libraries
 # None
@@ -20,6 +22,102 @@ from nion.swift.model import DataItem
 _ = gettext.gettext
 
 
+class Recorder:
+    """Record the frames of a data item into a sequence on a thread.
+
+    A frame is sampled every interval seconds, scheduled from the start of the recording so that delays do not
+    accumulate, until count frames are recorded or the recorder is stopped. The sequence is allocated for count frames
+    with the first frame and each frame is copied into it once.
+
+    Recording finishes early if a frame is missing, is a sequence, or changes shape or dtype, or if getting a frame
+    raises an exception, which is printed.
+    """
+
+    def __init__(self, get_xdata: typing.Callable[[], DataAndMetadata.DataAndMetadata], interval: float, count: int):
+        self.__get_xdata = get_xdata
+        self.__interval = interval
+        self.__count = count
+        self.__lock = threading.RLock()
+        self.__stop_event = threading.Event()
+        self.__thread = None
+        self.__sequence_data = None
+        self.__intensity_calibration = None
+        self.__dimensional_calibrations = None
+        self.__data_descriptor = None
+        self.__recorded_count = 0
+        self.__is_finished = False
+
+    def start(self) -> None:
+        self.__thread = threading.Thread(target=self.__record, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.__is_finished
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def recorded_count(self) -> int:
+        return self.__recorded_count
+
+    @property
+    def sequence_xdata(self) -> typing.Optional[DataAndMetadata.DataAndMetadata]:
+        """Return the frames recorded so far as a sequence. The data is a view of the recording, not a copy."""
+        with self.__lock:
+            if self.__recorded_count == 0:
+                return None
+            return DataAndMetadata.new_data_and_metadata(self.__sequence_data[:self.__recorded_count], intensity_calibration=self.__intensity_calibration,
+                                                         dimensional_calibrations=self.__dimensional_calibrations, data_descriptor=self.__data_descriptor)
+
+    @property
+    def compacted_sequence_xdata(self) -> typing.Optional[DataAndMetadata.DataAndMetadata]:
+        """Return a copy of the frames recorded so far as a sequence, not holding on to the space for unrecorded frames."""
+        with self.__lock:
+            if self.__recorded_count == 0:
+                return None
+            return DataAndMetadata.new_data_and_metadata(numpy.copy(self.__sequence_data[:self.__recorded_count]), intensity_calibration=self.__intensity_calibration,
+                                                         dimensional_calibrations=self.__dimensional_calibrations, data_descriptor=self.__data_descriptor)
+
+    def __record(self) -> None:
+        try:
+            start_time = time.perf_counter()
+            for index in range(self.__count):
+                delay = start_time + index * self.__interval - time.perf_counter()
+                if self.__stop_event.wait(max(delay, 0.0)):
+                    break
+                if not self.__record_frame(index, self.__get_xdata()):
+                    break
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.__is_finished = True
+
+    def __record_frame(self, index: int, xdata: DataAndMetadata.DataAndMetadata) -> bool:
+        if not xdata or xdata.is_sequence:
+            return False
+        if index == 0:
+            self.__sequence_data = numpy.empty((self.__count, ) + tuple(xdata.data_shape), xdata.data_dtype)
+            self.__intensity_calibration = xdata.intensity_calibration
+            self.__dimensional_calibrations = [Calibration.Calibration(scale=self.__interval, units="s")] + list(xdata.dimensional_calibrations)
+            self.__data_descriptor = DataAndMetadata.DataDescriptor(True, xdata.data_descriptor.collection_dimension_count, xdata.data_descriptor.datum_dimension_count)
+        elif tuple(xdata.data_shape) != self.__sequence_data.shape[1:] or xdata.data_dtype != self.__sequence_data.dtype:
+            return False
+        self.__sequence_data[index] = xdata.data
+        with self.__lock:
+            self.__recorded_count = index + 1
+        return True
+
+
 class RecorderDialog(Dialog.ActionDialog):
 
     def __init__(self, document_controller, data_item):
@@ -91,14 +189,11 @@ class RecorderDialog(Dialog.ActionDialog):
         button_row.add_spacing(8)
 
         self.__recording_state = "stopped"
-        self.__recording_last = 0.0
+        self.__recorder = None
         self.__recording_index = 0
         self.__recording_data_item = None
         self.__recording_transacted = False
 
-        self.__recording_interval = self.__recording_interval_property.value / 1000
-        self.__recording_count = self.__recording_count_property.value
-
         def record_pressed():
             if self.__recording_state == "recording":
                 self.__stop_recording()
@@ -120,7 +215,7 @@ class RecorderDialog(Dialog.ActionDialog):
 
         def data_item_deleted(data_item):
             if data_item == self.__recording_data_item:
-                self.__stop_recording()
+                self.__stop_recording(recording_data_item_deleted=True)
             if data_item == self.__data_item:
                 self.__stop_recording()
                 self.request_close()
@@ -131,73 +226,77 @@ class RecorderDialog(Dialog.ActionDialog):
         data_item_content_changed()
 
     def close(self):
+        self.__stop_recording()
         self.__data_item_content_changed_event_listener.close()
         self.__data_item_content_changed_event_listener = None
         self.__data_item_deleted_event_listener.close()
         self.__data_item_deleted_event_listener = None
         super().close()
 
+    @property
+    def _record_button_for_testing(self):
+        return self.__record_button
+
+    @property
+    def _recording_interval_model_for_testing(self):
+        return self.__recording_interval_property
+
+    @property
+    def _recording_count_model_for_testing(self):
+        return self.__recording_count_property
+
     def periodic(self):
         super().periodic()
         if self.__recording_state == "recording":
-            current_time = time.time()
-            if current_time - self.__recording_last > self.__recording_interval:
-                self.__recording_last = current_time
-                # first create an empty data item to hold the recorded data if it doesn't already exist
-                if not self.__recording_data_item:
-                    data_item = DataItem.DataItem(large_format=True)
-                    data_item.ensure_data_source()
-                    data_item.title = _("Recording of ") + self.__data_item.title
-                    self.document_controller.document_model.append_data_item(data_item)
-                    self.__recording_data_item = data_item
-                    self.__recording_transacted = False
-                # next grab the current data and stop if it is a sequence (can't record sequences)
-                current_xdata = self.__data_item.xdata
-                if current_xdata.is_sequence:
-                    self.__stop_recording()
-                    return
-                # now record the new data. it may or may not be a new frame at this point.
-                last_xdata = self.__recording_data_item.xdata
-                self.__recording_index += 1
-                if current_xdata and last_xdata and current_xdata.data_shape == self.__recording_data_item.data_shape[1:]:
-                    # continue, append the new data to existing data and update existing data item
-                    intensity_calibration = last_xdata.intensity_calibration
-                    dimensional_calibrations = last_xdata.dimensional_calibrations
-                    data_descriptor = last_xdata.data_descriptor
-                    sequence_xdata = DataAndMetadata.new_data_and_metadata(numpy.vstack([last_xdata.data, [current_xdata.data]]), intensity_calibration=intensity_calibration, dimensional_calibrations=dimensional_calibrations, data_descriptor=data_descriptor)
-                    self.__recording_data_item.set_xdata(sequence_xdata)
-                elif current_xdata and not last_xdata:
-                    # first acquisition, create the sequence
-                    intensity_calibration = current_xdata.intensity_calibration
-                    dimensional_calibrations = [Calibration.Calibration(scale=self.__recording_interval, units="s")] + list(current_xdata.dimensional_calibrations)
-                    data_descriptor = DataAndMetadata.DataDescriptor(True, current_xdata.data_descriptor.collection_dimension_count, current_xdata.data_descriptor.datum_dimension_count)
-                    sequence_xdata = DataAndMetadata.new_data_and_metadata(current_xdata.data[numpy.newaxis, ...], intensity_calibration=intensity_calibration, dimensional_calibrations=dimensional_calibrations, data_descriptor=data_descriptor)
-                    self.__recording_data_item.set_xdata(sequence_xdata)
-                    self.__recording_data_item._enter_transaction_state()
-                    self.__recording_transacted = True
-                else:
-                    # something is amiss. stop.
-                    self.__stop_recording()
-                    return
-            # finally -- check if we've reached the maximum count
-            if self.__recording_index >= self.__recording_count:
+            self.__update_recording_data_item()
+            if self.__recorder.is_finished:
                 self.__stop_recording()
 
+    def __update_recording_data_item(self):
+        # the recorder samples the frames on its own thread; show the frames recorded so far in the recording data item.
+        recorded_count = self.__recorder.recorded_count
+        if recorded_count > self.__recording_index:
+            self.__recording_index = recorded_count
+            # first create an empty data item to hold the recorded data if it doesn't already exist
+            if not self.__recording_data_item:
+                data_item = DataItem.DataItem(large_format=True)
+                data_item.ensure_data_source()
+                data_item.title = _("Recording of ") + self.__data_item.title
+                self.document_controller.document_model.append_data_item(data_item)
+                self.__recording_data_item = data_item
+                self.__recording_transacted = False
+            # the sequence data is a view of the recording, so no frames are copied. in the transaction, the data is
+            # written to storage once when the recording stops.
+            self.__recording_data_item.set_xdata(self.__recorder.sequence_xdata)
+            if not self.__recording_transacted:
+                self.__recording_data_item._enter_transaction_state()
+                self.__recording_transacted = True
+
     def __begin_recording(self):
         self.__recording_state = "recording"
-        self.__recording_last = 0.0
         self.__recording_index = 0
-        self.__recording_interval = self.__recording_interval_property.value / 1000
-        self.__recording_count = self.__recording_count_property.value
+        recording_interval = self.__recording_interval_property.value / 1000
+        recording_count = self.__recording_count_property.value
+        self.__recorder = Recorder(lambda: self.__data_item.xdata, recording_interval, recording_count)
+        self.__recorder.start()
         self.__record_button.text = _("Stop")
 
-    def __stop_recording(self):
+    def __stop_recording(self, recording_data_item_deleted: bool=False):
         if self.__recording_state == "recording":
             self.__recording_state = "stopped"
-            self.__recording_last = 0.0
+            self.__recorder.stop()
+            # show the frames recorded since the last update unless the recording data item has been deleted; a deleted
+            # data item is closed, so it is neither updated nor taken out of its transaction.
+            if not recording_data_item_deleted:
+                self.__update_recording_data_item()
+                # the sequence data is a view of the space allocated for all frames; if the recording stopped early,
+                # keep only the recorded frames.
+                if self.__recording_data_item and self.__recorder.recorded_count < self.__recorder.count:
+                    self.__recording_data_item.set_xdata(self.__recorder.compacted_sequence_xdata)
+            self.__recorder = None
             self.__recording_index = 0
-            if self.__recording_data_item and self.__recording_transacted:
+            if self.__recording_data_item and self.__recording_transacted and not recording_data_item_deleted:
                 self.__recording_data_item._exit_transaction_state()
-                self.__recording_data_item = None
-                self.__recording_transacted = False
+            self.__recording_data_item = None
+            self.__recording_transacted = False
             self.__record_button.text = _("Record")
@@ -5,6 +5,7 @@
 # standard libraries
 import threading
 import time
+import typing
 
 # third-party libraries
 import numpy
@@ -257,6 +258,14 @@ class ThumbnailManager(metaclass=Utility.Singleton):
                 assert thumbnail_source._ui == ui
             return thumbnail_source.add_ref()
 
+    def prefetch_thumbnail_data(self, displays: typing.Sequence[Display]) -> None:
+        """Load the cached thumbnail data for the displays with a single cache request.
+
+        Thumbnail sources created for the displays afterwards find their cached data in memory, if the cache keeps it.
+        """
+        if displays:
+            displays[0]._display_cache.prefetch(displays, ["thumbnail_data"])
+
     def thumbnail_data_for_display(self, display: Display) -> numpy.ndarray:
         thumbnail_source = self.__thumbnail_sources.get(display) if display else None
         if thumbnail_source:
@@ -1,4 +1,5 @@
 # standard libraries
+import collections
 import copy
 import functools
 import logging
@@ -6,11 +7,14 @@ import os
 import pickle
 import queue
 import sqlite3
+import struct
 import sys
 import threading
+import time
+import weakref
 
 # third party libraries
-# None
+import numpy
 
 # local libraries
 # None
@@ -53,6 +57,14 @@ class TracingCache:
         logging.debug("%s.set_cached_value_dirty(%s, %s, %s)", id(self), target, key, dirty)
         self.__storage_cache.set_cached_value_dirty(target, key, dirty)
 
+    def get_cached_values_bulk(self, targets, key, default_value=None):
+        logging.debug("%s.get_cached_values_bulk(%s, %s, %s)", id(self), len(targets), key, default_value)
+        return self.__storage_cache.get_cached_values_bulk(targets, key, default_value)
+
+    def prefetch(self, targets, keys):
+        logging.debug("%s.prefetch(%s, %s)", id(self), len(targets), keys)
+        self.__storage_cache.prefetch(targets, keys)
+
 
 class SuspendableCache:
 
@@ -169,14 +181,47 @@ class SuspendableCache:
                 _, object_dirty_dict = self.__cache_dirty.setdefault(id(target), (target, dict()))
                 object_dirty_dict[key] = dirty
 
+    # grab the last cached values for a list of targets, going to the cache db once for all of them.
+    def get_cached_values_bulk(self, targets, key, default_value=None):
+        values = list()
+        storage_targets = list()
+        storage_indexes = list()
+        # first check temporary cache.
+        with self.__cache_mutex:
+            for index, target in enumerate(targets):
+                _, object_dict = self.__cache.get(id(target), (target, dict()))
+                _, object_list = self.__cache_remove.get(id(target), (target, list()))
+                if key in object_dict:
+                    values.append(object_dict.get(key))
+                elif key in object_list:
+                    values.append(None)
+                else:
+                    values.append(default_value)
+                    storage_targets.append(target)
+                    storage_indexes.append(index)
+        # the rest come from the cache db
+        if self.__storage_cache and storage_targets:
+            storage_values = self.__storage_cache.get_cached_values_bulk(storage_targets, key, default_value)
+            for index, value in zip(storage_indexes, storage_values):
+                values[index] = value
+        return values
+
+    # hint that the values will be requested soon.
+    def prefetch(self, targets, keys):
+        if self.__storage_cache:
+            self.__storage_cache.prefetch(targets, keys)
+
 
 class ShadowCache:
     """Shadow another cache, allowing cache usage before the other cache is created.
 
     Set the other cache using set_storage_cache. Anything cached on this object before
-    set_storage_cache is called will be spilled into the other cache."""
+    set_storage_cache is called will be spilled into the other cache.
+
+    The values cached on this object belong to a single target, passed here or to set_storage_cache."""
 
-    def __init__(self):
+    def __init__(self, target=None):
+        self.__weak_target = weakref.ref(target) if target is not None else None
         self.__storage_cache = None
         self.__cache = dict()
         self.__cache_remove = list()
@@ -189,6 +234,7 @@ class ShadowCache:
         return self.__storage_cache
 
     def set_storage_cache(self, storage_cache, target):
+        self.__weak_target = weakref.ref(target)
         self.__storage_cache = storage_cache
         self.__spill_cache(target)
 
@@ -275,6 +321,31 @@ class ShadowCache:
             with self.__cache_mutex:
                 self.__cache_dirty[key] = dirty
 
+    # grab the last cached values for a list of targets.
+    def get_cached_values_bulk(self, targets, key, default_value=None):
+        # the temporary cache only holds values for the target of this cache; the other targets come from the cache db
+        target = self.__weak_target() if self.__weak_target else None
+        values = [default_value] * len(targets)
+        storage_targets = list()
+        storage_indexes = list()
+        with self.__cache_mutex:
+            for index, target_ in enumerate(targets):
+                if target_ is target and key in self.__cache:
+                    values[index] = self.__cache.get(key)
+                else:
+                    storage_targets.append(target_)
+                    storage_indexes.append(index)
+        if self.storage_cache and storage_targets:
+            storage_values = self.storage_cache.get_cached_values_bulk(storage_targets, key, default_value)
+            for index, value in zip(storage_indexes, storage_values):
+                values[index] = value
+        return values
+
+    # hint that the values will be requested soon.
+    def prefetch(self, targets, keys):
+        if self.storage_cache:
+            self.storage_cache.prefetch(targets, keys)
+
 
 def db_make_directory_if_needed(directory_path):
     if os.path.exists(directory_path):
@@ -339,11 +410,69 @@ class DictStorageCache:
         cache_dirty = self.__cache_dirty.setdefault(target.uuid, dict())
         cache_dirty[key] = dirty
 
+    def get_cached_entries_bulk(self, targets, keys, default_value=None):
+        entries = dict()
+        for target in targets:
+            for key in keys:
+                entries[(target.uuid, key)] = self.get_cached_value(target, key, default_value), self.is_cached_value_dirty(target, key)
+        return entries
+
+    def get_cached_values_bulk(self, targets, key, default_value=None):
+        return [self.get_cached_value(target, key, default_value) for target in targets]
+
+    def prefetch(self, targets, keys):
+        pass
+
+
+_CACHE_VALUE_VERSION = 1  # version 0 is a protocol 0 pickle; version 1 is written by _encode_cache_value
+
+
+def _encode_cache_value(value) -> bytes:
+    # numeric numpy arrays are written as a header (dtype, shape) followed by the raw bytes; anything else is pickled.
+    if isinstance(value, numpy.ndarray) and value.dtype.fields is None and not value.dtype.hasobject:
+        dtype_str = value.dtype.str.encode("ascii")
+        header = struct.pack("<cB{}sB{}Q".format(len(dtype_str), value.ndim), b"A", len(dtype_str), dtype_str, value.ndim, *value.shape)
+        return header + numpy.ascontiguousarray(value).tobytes()
+    return b"P" + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode_cache_value(data: bytes, version: int):
+    if version == 0:
+        if sys.version < '3':
+            return pickle.loads(bytes(bytearray(data)))
+        return pickle.loads(data, encoding='latin1')
+    data = bytes(data)
+    if data[0:1] == b"A":
+        dtype_len = data[1]
+        dtype = numpy.dtype(data[2:2 + dtype_len].decode("ascii"))
+        ndim = data[2 + dtype_len]
+        offset = 3 + dtype_len
+        shape = struct.unpack_from("<{}Q".format(ndim), data, offset)
+        offset += 8 * ndim
+        # copy so that the array is writable, like an unpickled array.
+        return numpy.frombuffer(data, dtype, offset=offset, count=int(numpy.prod(shape, dtype=numpy.int64))).reshape(shape).copy()
+    return pickle.loads(data[1:])
+
 
 class DbStorageCache:
-    def __init__(self, cache_filename):
+    """Store cached values in a sqlite database, accessed from a dedicated thread.
+
+    If flush_period is specified, the cache operates in write-behind mode: writes are held in a pending map in which
+    repeated writes to the same (uuid, key) are collapsed, and the pending writes are written in a single transaction
+    every flush_period seconds or when flush_count pending writes accumulate. Reads see pending writes.
+
+    Each row records the version of its value encoding. Rows from older cache files are converted when the cache is
+    opened.
+    """
+
+    def __init__(self, cache_filename, flush_period: float=None, flush_count: int=1024):
         self.__queue = queue.Queue()
         self.__queue_lock = threading.RLock()
+        self.__flush_period = flush_period
+        self.__flush_count = flush_count
+        self.__pending = dict()  # maps (uuid_str, key) to a pending write
+        self.__pending_lock = threading.RLock()
+        self.__pending_time = None
         self.__started_event = threading.Event()
         self.__thread = threading.Thread(target=self.__run, args=[cache_filename])
         self.__thread.daemon = True
@@ -369,7 +498,11 @@ class DbStorageCache:
         self.__create()
         self.__started_event.set()
         while True:
-            action = self.__queue.get()
+            try:
+                action = self.__queue.get(timeout=self.__flush_period)
+            except queue.Empty:
+                self.__flush_pending()
+                continue
             item, result, event, action_name = action
             # logging.debug("item %s  result %s  event %s  action %s", item, result, event, action_name)
             if item:
@@ -391,6 +524,11 @@ class DbStorageCache:
                     # logging.debug("FINISH")
                     if event:
                         event.set()
+            else:
+                self.__flush_pending()
+            pending_time = self.__pending_time
+            if pending_time is not None and time.perf_counter() - pending_time >= self.__flush_period:
+                self.__flush_pending()
             self.__queue.task_done()
             if not item:
                 break
@@ -399,7 +537,27 @@ class DbStorageCache:
 
     def __create(self):
         with self.conn:
-            self.execute("CREATE TABLE IF NOT EXISTS cache(uuid STRING, key STRING, value BLOB, dirty INTEGER, PRIMARY KEY(uuid, key))")
+            self.execute("CREATE TABLE IF NOT EXISTS cache(uuid STRING, key STRING, value BLOB, dirty INTEGER, version INTEGER DEFAULT 0, PRIMARY KEY(uuid, key))")
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(cache)")]
+            if "version" not in columns:
+                self.execute("ALTER TABLE cache ADD COLUMN version INTEGER DEFAULT 0")
+        self.__migrate()
+
+    def __migrate(self):
+        # convert values written with an older encoding to the current encoding. values that cannot be read are removed.
+        update_rows = list()
+        remove_rows = list()
+        for uuid_str, key, value, version in self.conn.execute("SELECT uuid, key, value, version FROM cache WHERE version IS NULL OR version < ?", (_CACHE_VALUE_VERSION, )):
+            try:
+                encoded_value = _encode_cache_value(_decode_cache_value(value, version or 0))
+                update_rows.append((sqlite3.Binary(encoded_value), _CACHE_VALUE_VERSION, uuid_str, key))
+            except Exception as e:
+                logging.debug("Cache migration error: %s", e)
+                remove_rows.append((uuid_str, key))
+        if update_rows or remove_rows:
+            with self.conn:
+                self.conn.executemany("UPDATE cache SET value=?, version=? WHERE uuid=? AND key=?", update_rows)
+                self.conn.executemany("DELETE FROM cache WHERE uuid=? AND key=?", remove_rows)
 
     def execute(self, stmt, args=None, log=False):
         if args:
@@ -415,18 +573,14 @@ class DbStorageCache:
 
     def __set_cached_value(self, target, key, value, dirty=False):
         with self.conn:
-            self.execute("INSERT OR REPLACE INTO cache (uuid, key, value, dirty) VALUES (?, ?, ?, ?)",
-                         (str(target.uuid), key, sqlite3.Binary(pickle.dumps(value, 0)), 1 if dirty else 0))
+            self.execute("INSERT OR REPLACE INTO cache (uuid, key, value, dirty, version) VALUES (?, ?, ?, ?, ?)",
+                         (str(target.uuid), key, sqlite3.Binary(_encode_cache_value(value)), 1 if dirty else 0, _CACHE_VALUE_VERSION))
 
     def __get_cached_value(self, target, key, default_value=None):
-        last_result = self.execute("SELECT value FROM cache WHERE uuid=? AND key=?", (str(target.uuid), key))
+        last_result = self.execute("SELECT value, version FROM cache WHERE uuid=? AND key=?", (str(target.uuid), key))
         value_row = last_result.fetchone()
         if value_row is not None:
-            if sys.version < '3':
-                result = pickle.loads(bytes(bytearray(value_row[0])))
-            else:
-                result = pickle.loads(value_row[0], encoding='latin1')
-            return result
+            return _decode_cache_value(value_row[0], value_row[1] or 0)
         else:
             return default_value
 
@@ -442,11 +596,105 @@ class DbStorageCache:
         else:
             return True
 
+    def __has_cached_value(self, target, key):
+        last_result = self.execute("SELECT 1 FROM cache WHERE uuid=? AND key=?", (str(target.uuid), key))
+        return last_result.fetchone() is not None
+
     def __set_cached_value_dirty(self, target, key, dirty=True):
         with self.conn:
             self.execute("UPDATE cache SET dirty=? WHERE uuid=? AND key=?", (1 if dirty else 0, str(target.uuid), key))
 
+    def __get_cached_entries_bulk(self, uuid_strs, keys, default_value):
+        # read the rows in as few queries as the sqlite variable limit allows, then apply the pending writes. this
+        # runs on the db thread, so the pending writes cannot be flushed in between.
+        with self.__pending_lock:
+            pending = dict(self.__pending)
+        rows = dict()
+        chunk_size = max(1, 500 - len(keys))
+        for i in range(0, len(uuid_strs), chunk_size):
+            chunk = uuid_strs[i:i + chunk_size]
+            stmt = "SELECT uuid, key, value, version, dirty FROM cache WHERE uuid IN ({}) AND key IN ({})".format(",".join("?" * len(chunk)), ",".join("?" * len(keys)))
+            for uuid_str, key, value, version, dirty in self.conn.execute(stmt, list(chunk) + list(keys)):
+                rows[(uuid_str, key)] = value, version, dirty != 0
+        entries = dict()
+        for uuid_str in uuid_strs:
+            for key in keys:
+                entry_key = uuid_str, key
+                pending_action_name, pending_value, pending_dirty = pending.get(entry_key, (None, None, None))
+                row = rows.get(entry_key)
+                if pending_action_name == "set":
+                    entries[entry_key] = pending_value, pending_dirty
+                elif pending_action_name == "remove" or row is None:
+                    entries[entry_key] = default_value, True
+                else:
+                    value, version, dirty = row
+                    entries[entry_key] = _decode_cache_value(value, version or 0), pending_dirty if pending_action_name == "dirty" else dirty
+        return entries
+
+    def __flush_pending(self):
+        # write the pending writes in a single transaction. runs on the db thread.
+        with self.__pending_lock:
+            pending = self.__pending
+            self.__pending = dict()
+            self.__pending_time = None
+        if pending:
+            set_rows = list()
+            dirty_rows = list()
+            remove_rows = list()
+            for (uuid_str, key), (action_name, value, dirty) in pending.items():
+                if action_name == "set":
+                    set_rows.append((uuid_str, key, sqlite3.Binary(_encode_cache_value(value)), 1 if dirty else 0, _CACHE_VALUE_VERSION))
+                elif action_name == "dirty":
+                    dirty_rows.append((1 if dirty else 0, uuid_str, key))
+                else:
+                    remove_rows.append((uuid_str, key))
+            try:
+                with self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO cache (uuid, key, value, dirty, version) VALUES (?, ?, ?, ?, ?)", set_rows)
+                    self.conn.executemany("UPDATE cache SET dirty=? WHERE uuid=? AND key=?", dirty_rows)
+                    self.conn.executemany("DELETE FROM cache WHERE uuid=? AND key=?", remove_rows)
+            except Exception as e:
+                import traceback
+                logging.debug("DB Error: %s", e)
+                traceback.print_exc()
+
+    def __put_pending(self, target, key, action_name, value, dirty):
+        # add a write to the pending map, collapsing it with an earlier pending write to the same key.
+        pending_key = str(target.uuid), key
+        with self.__pending_lock:
+            if action_name == "dirty":
+                pending_action_name, pending_value, pending_dirty = self.__pending.get(pending_key, (None, None, None))
+                if pending_action_name == "remove":
+                    return
+                if pending_action_name == "set":
+                    action_name, value = pending_action_name, pending_value
+            self.__pending[pending_key] = action_name, value, dirty
+            if self.__pending_time is None:
+                self.__pending_time = time.perf_counter()
+            pending_count = len(self.__pending)
+        if pending_count >= self.__flush_count:
+            with self.__queue_lock:
+                _queue = self.__queue
+            if _queue:
+                _queue.put((self.__flush_pending, None, None, "flush"))
+
+    def __get_pending(self, target, key):
+        with self.__pending_lock:
+            return self.__pending.get((str(target.uuid), key))
+
+    def flush(self):
+        """Write pending writes to the database and wait for them to finish."""
+        event = threading.Event()
+        with self.__queue_lock:
+            _queue = self.__queue
+        if _queue:
+            _queue.put((self.__flush_pending, None, event, "flush"))
+            event.wait()
+
     def set_cached_value(self, target, key, value, dirty=False):
+        if self.__flush_period is not None:
+            self.__put_pending(target, key, "set", value, dirty)
+            return
         event = threading.Event()
         with self.__queue_lock:
             _queue = self.__queue
@@ -455,6 +703,9 @@ class DbStorageCache:
         # event.wait()
 
     def get_cached_value(self, target, key, default_value=None):
+        pending = self.__get_pending(target, key)
+        if pending is not None and pending[0] != "dirty":
+            return pending[1] if pending[0] == "set" else default_value
         event = threading.Event()
         result = list()
         with self.__queue_lock:
@@ -465,6 +716,9 @@ class DbStorageCache:
         return result[0] if len(result) > 0 else None
 
     def remove_cached_value(self, target, key):
+        if self.__flush_period is not None:
+            self.__put_pending(target, key, "remove", None, None)
+            return
         event = threading.Event()
         with self.__queue_lock:
             _queue = self.__queue
@@ -473,19 +727,226 @@ class DbStorageCache:
         # event.wait()
 
     def is_cached_value_dirty(self, target, key):
+        pending = self.__get_pending(target, key)
+        if pending is not None and pending[0] != "dirty":
+            return pending[2] if pending[0] == "set" else True
         event = threading.Event()
         result = list()
         with self.__queue_lock:
             _queue = self.__queue
         if _queue:
+            if pending is not None:
+                # a pending dirty flag only applies if the value exists in the db
+                _queue.put((functools.partial(self.__has_cached_value, target, key), result, event, "has_cached_value"))
+                event.wait()
+                return pending[2] if result[0] else True
             _queue.put((functools.partial(self.__is_cached_value_dirty, target, key), result, event, "is_cached_value_dirty"))
             event.wait()
         return result[0]
 
     def set_cached_value_dirty(self, target, key, dirty=True):
+        if self.__flush_period is not None:
+            self.__put_pending(target, key, "dirty", None, dirty)
+            return
         event = threading.Event()
         with self.__queue_lock:
             _queue = self.__queue
         if _queue:
             _queue.put((functools.partial(self.__set_cached_value_dirty, target, key, dirty), None, event, "set_cached_value_dirty"))
         # event.wait()
+
+    def get_cached_entries_bulk(self, targets, keys, default_value=None):
+        """Return a dict mapping (uuid, key) to (value, dirty) for each target and key, using a single request.
+
+        The value and dirty flag are those get_cached_value and is_cached_value_dirty would return.
+        """
+        uuids = {str(target.uuid): target.uuid for target in targets}
+        keys = list(keys)
+        if not uuids or not keys:
+            return dict()
+        event = threading.Event()
+        result = list()
+        with self.__queue_lock:
+            _queue = self.__queue
+        if _queue:
+            _queue.put((functools.partial(self.__get_cached_entries_bulk, list(uuids.keys()), keys, default_value), result, event, "get_cached_entries_bulk"))
+            event.wait()
+        entries = result[0] if len(result) > 0 else dict()
+        return {(uuids[uuid_str], key): entry for (uuid_str, key), entry in entries.items()}
+
+    def get_cached_values_bulk(self, targets, key, default_value=None):
+        """Return the cached values of key for each target, using a single request."""
+        entries = self.get_cached_entries_bulk(targets, [key], default_value)
+        return [entries.get((target.uuid, key), (default_value, True))[0] for target in targets]
+
+    def prefetch(self, targets, keys):
+        # values are not kept in memory, so there is nothing to prefetch. see LRUStorageCache.
+        pass
+
+
+def _get_value_size(value) -> int:
+    # estimate the memory size of a cached value. numpy arrays report their buffer size.
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + 96
+    return sys.getsizeof(value)
+
+
+class LRUStorageCache:
+    """Keep recently used cached values in memory in front of another storage cache.
+
+    Values are kept in a least recently used order and evicted when the total size of the values exceeds max_bytes.
+    Writes go through to the other storage cache. The absence of a value is also remembered so that repeated
+    requests for missing values do not go to the other storage cache.
+
+    Values are returned without copying; callers must not modify them.
+
+    The hit_count, miss_count, and eviction_count counters can be used to choose max_bytes.
+    """
+
+    _unknown = object()
+    _missing = object()
+
+    def __init__(self, storage_cache, max_bytes: int=64 * 1024 * 1024):
+        self.__storage_cache = storage_cache
+        self.__max_bytes = max_bytes
+        self.__entries = collections.OrderedDict()  # maps (uuid, key) to [value, dirty, size]; value and dirty may be unknown
+        self.__byte_count = 0
+        self.__write_generation = 0  # incremented on each write; used to avoid caching stale reads
+        self.__lock = threading.RLock()
+        self.__hit_count = 0
+        self.__miss_count = 0
+        self.__eviction_count = 0
+
+    def close(self):
+        self.__storage_cache.close()
+
+    @property
+    def storage_cache(self):
+        return self.__storage_cache
+
+    @property
+    def max_bytes(self) -> int:
+        return self.__max_bytes
+
+    @property
+    def byte_count(self) -> int:
+        return self.__byte_count
+
+    @property
+    def hit_count(self) -> int:
+        return self.__hit_count
+
+    @property
+    def miss_count(self) -> int:
+        return self.__miss_count
+
+    @property
+    def eviction_count(self) -> int:
+        return self.__eviction_count
+
+    def suspend_cache(self):
+        self.__storage_cache.suspend_cache()
+
+    def spill_cache(self):
+        self.__storage_cache.spill_cache()
+
+    def __put_entry(self, entry_key, value, dirty, write_generation=None) -> None:
+        # update the entry, keeping the known value or dirty flag if the new one is unknown, then evict.
+        # if write_generation is passed, the value was read before any writes since then and may be stale.
+        with self.__lock:
+            if write_generation is None:
+                self.__write_generation += 1
+            elif write_generation != self.__write_generation:
+                return
+            entry = self.__entries.pop(entry_key, None)
+            if entry is not None:
+                self.__byte_count -= entry[2]
+                value = entry[0] if value is LRUStorageCache._unknown else value
+                dirty = entry[1] if dirty is None else dirty
+            size = _get_value_size(value) if value is not LRUStorageCache._unknown and value is not LRUStorageCache._missing else 0
+            if size > self.__max_bytes:
+                value = LRUStorageCache._unknown
+                size = 0
+            self.__entries[entry_key] = [value, dirty, size]
+            self.__byte_count += size
+            while self.__byte_count > self.__max_bytes and len(self.__entries) > 1:
+                _, evicted_entry = self.__entries.popitem(last=False)
+                self.__byte_count -= evicted_entry[2]
+                self.__eviction_count += 1
+
+    def set_cached_value(self, target, key, value, dirty=False):
+        self.__storage_cache.set_cached_value(target, key, value, dirty)
+        self.__put_entry((target.uuid, key), value, dirty)
+
+    def get_cached_value(self, target, key, default_value=None):
+        entry_key = target.uuid, key
+        with self.__lock:
+            entry = self.__entries.get(entry_key)
+            if entry is not None and entry[0] is not LRUStorageCache._unknown:
+                self.__hit_count += 1
+                self.__entries.move_to_end(entry_key)
+                return default_value if entry[0] is LRUStorageCache._missing else entry[0]
+            self.__miss_count += 1
+            write_generation = self.__write_generation
+        value = self.__storage_cache.get_cached_value(target, key, LRUStorageCache._missing)
+        self.__put_entry(entry_key, value, None, write_generation)
+        return default_value if value is LRUStorageCache._missing else value
+
+    def remove_cached_value(self, target, key):
+        self.__storage_cache.remove_cached_value(target, key)
+        self.__put_entry((target.uuid, key), LRUStorageCache._missing, True)
+
+    def is_cached_value_dirty(self, target, key):
+        entry_key = target.uuid, key
+        with self.__lock:
+            entry = self.__entries.get(entry_key)
+            if entry is not None and entry[1] is not None:
+                self.__hit_count += 1
+                self.__entries.move_to_end(entry_key)
+                return entry[1]
+            self.__miss_count += 1
+            write_generation = self.__write_generation
+        dirty = self.__storage_cache.is_cached_value_dirty(target, key)
+        self.__put_entry(entry_key, LRUStorageCache._unknown, dirty, write_generation)
+        return dirty
+
+    def set_cached_value_dirty(self, target, key, dirty=True):
+        self.__storage_cache.set_cached_value_dirty(target, key, dirty)
+        with self.__lock:
+            self.__write_generation += 1
+            entry = self.__entries.get((target.uuid, key))
+            if entry is not None:
+                if entry[0] is LRUStorageCache._unknown:
+                    # the value may not exist, in which case the dirty flag does not change.
+                    entry[1] = None
+                elif entry[0] is not LRUStorageCache._missing:
+                    entry[1] = dirty
+
+    def get_cached_values_bulk(self, targets, key, default_value=None):
+        self.prefetch(targets, [key])
+        return [self.get_cached_value(target, key, default_value) for target in targets]
+
+    def prefetch(self, targets, keys):
+        """Load the values and dirty flags that are not in memory with a single request to the other storage cache."""
+        get_cached_entries_bulk = getattr(self.__storage_cache, "get_cached_entries_bulk", None)
+        if not callable(get_cached_entries_bulk):
+            return
+        with self.__lock:
+            fetch_targets = list()
+            for target in targets:
+                for key in keys:
+                    entry = self.__entries.get((target.uuid, key))
+                    if entry is None or entry[0] is LRUStorageCache._unknown or entry[1] is None:
+                        fetch_targets.append(target)
+                        break
+            write_generation = self.__write_generation
+        if fetch_targets:
+            entries = get_cached_entries_bulk(fetch_targets, keys, LRUStorageCache._missing)
+            for entry_key, (value, dirty) in entries.items():
+                self.__put_entry(entry_key, value, dirty, write_generation)
+
+
+def make_library_storage_cache(cache_path: str) -> LRUStorageCache:
+    """Return the storage cache for a library: recently used values in memory in front of the cache file at cache_path."""
+    return LRUStorageCache(DbStorageCache(cache_path, flush_period=0.5))
@@ -0,0 +1,214 @@
+"""
+    Run computation scripts in worker processes.
+
+    Data is passed to and from the workers through shared memory. Only the small description of each data (shape,
+    dtype, calibrations, metadata) is pickled.
+"""
+
+# standard libraries
+import ast
+import concurrent.futures
+import functools
+import multiprocessing
+import threading
+import typing
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.data import DataAndMetadata
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None  # requires Python 3.8
+
+
+def is_available() -> bool:
+    """Return whether computations can be run in worker processes."""
+    return shared_memory is not None
+
+
+def _xdata_to_shared_memory(xdata: DataAndMetadata.DataAndMetadata) -> typing.Tuple[typing.Any, dict]:
+    # copy the data into a new shared memory block; return the block and a picklable description of the xdata.
+    data = numpy.ascontiguousarray(xdata.data)
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    numpy.ndarray(data.shape, data.dtype, buffer=shm.buf)[...] = data
+    description = {"name": shm.name, "dtype": data.dtype.str, "shape": data.shape,
+                   "intensity_calibration": xdata.intensity_calibration, "dimensional_calibrations": xdata.dimensional_calibrations,
+                   "metadata": xdata.metadata, "timestamp": xdata.timestamp, "data_descriptor": xdata.data_descriptor}
+    return shm, description
+
+
+def _xdata_from_shared_memory(shm, description: dict, copy: bool) -> DataAndMetadata.DataAndMetadata:
+    # make xdata from a shared memory block. without copy, the data refers to the block directly.
+    data = numpy.ndarray(description["shape"], numpy.dtype(description["dtype"]), buffer=shm.buf)
+    if copy:
+        data = numpy.copy(data)
+    return DataAndMetadata.new_data_and_metadata(data, description["intensity_calibration"], description["dimensional_calibrations"],
+                                                 description["metadata"], description["timestamp"], description["data_descriptor"])
+
+
+def _close_shared_memory(shm) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        pass  # an array still refers to the block; it is released when the array is freed
+
+
+def _release_result(future: concurrent.futures.Future) -> None:
+    # unlink the result block of an abandoned evaluation.
+    if not future.cancelled() and future.exception() is None:
+        description = future.result()[0]
+        if description:
+            shm = shared_memory.SharedMemory(name=description["name"])
+            shm.close()
+            shm.unlink()
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(script: str):
+    return compile(script, "expr", "exec")
+
+
+class _Target:
+    # stands in for the computation target in the worker process; collects the result xdata.
+
+    def __init__(self):
+        self.xdata = None
+
+    @property
+    def data(self) -> numpy.ndarray:
+        return self.xdata.data if self.xdata else None
+
+    @data.setter
+    def data(self, data: numpy.ndarray) -> None:
+        self.xdata = DataAndMetadata.new_data_and_metadata(numpy.copy(data))
+
+    def set_data(self, data: numpy.ndarray) -> None:
+        self.data = data
+
+    @property
+    def data_and_metadata(self) -> DataAndMetadata.DataAndMetadata:
+        return self.xdata
+
+    def set_data_and_metadata(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
+        self.xdata = data_and_metadata
+
+
+class _Object:
+    # stands in for a computation variable object in the worker process; holds the attributes used by the script.
+
+    def __init__(self, attributes: dict):
+        self.__dict__.update(attributes)
+
+
+def _execute_script(script: str, variable_descriptions: dict) -> typing.Tuple[typing.Optional[dict], typing.Optional[str]]:
+    # runs in the worker process. the variable descriptions map variable names to values or, for objects, to a dict of
+    # attributes; xdata attributes are shared memory descriptions. returns the result description and error text.
+    shms = list()
+    try:
+        def load_value(value):
+            if isinstance(value, dict) and value.get("type") == "xdata":
+                shm = shared_memory.SharedMemory(name=value["description"]["name"])
+                shms.append(shm)
+                return _xdata_from_shared_memory(shm, value["description"], False)
+            return value["value"]
+
+        def execute() -> typing.Tuple[typing.Optional[dict], typing.Optional[str]]:
+            g = dict()
+            for name, variable_description in variable_descriptions.items():
+                if variable_description["type"] == "object":
+                    g[name] = _Object({k: load_value(v) for k, v in variable_description["attributes"].items()})
+                else:
+                    g[name] = load_value(variable_description)
+            target = _Target()
+            g["target"] = target
+            try:
+                exec(_compile(script), g, dict())
+            except Exception as e:
+                return None, str(e) or "Unable to evaluate script."
+            if target.xdata is None:
+                return None, None
+            result_shm, description = _xdata_to_shared_memory(target.xdata)
+            result_shm.close()
+            return description, None
+
+        return execute()
+    finally:
+        for shm in shms:
+            _close_shared_memory(shm)
+
+
+class ComputationProcessPool:
+    """Run computation scripts in a pool of worker processes.
+
+    Only scripts whose variables are scalars or objects whose attributes used by the script are xdata or picklable
+    values can be run. The script sees objects as plain objects with those attributes, so it cannot call methods on
+    them or use the api.
+
+    The workers are started with the spawn method so that they do not inherit the state of the threads of this process.
+    """
+
+    def __init__(self, max_workers: int):
+        self.__max_workers = max_workers
+        self.__executor = None
+        self.__executor_lock = threading.RLock()
+
+    def close(self) -> None:
+        with self.__executor_lock:
+            if self.__executor:
+                self.__executor.shutdown(wait=False)
+                self.__executor = None
+
+    def __get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self.__executor_lock:
+            if self.__executor is None:
+                self.__executor = concurrent.futures.ProcessPoolExecutor(self.__max_workers, multiprocessing.get_context("spawn"))
+            return self.__executor
+
+    def execute_code(self, expression: str, target, variables: dict, cancel_event: threading.Event=None) -> typing.Optional[str]:
+        """Run the expression in a worker process and set the result xdata on target. Return the error text.
+
+        Returns without setting the result if cancel_event is set before the worker finishes.
+        """
+        attribute_names = dict()  # maps variable names to the attribute names used by the expression
+        for node in ast.walk(ast.parse(expression)):
+            if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in variables:
+                attribute_names.setdefault(node.value.id, set()).add(node.attr)
+        shms = list()
+
+        def describe_value(value) -> dict:
+            if isinstance(value, DataAndMetadata.DataAndMetadata):
+                shm, description = _xdata_to_shared_memory(value)
+                shms.append(shm)
+                return {"type": "xdata", "description": description}
+            return {"type": "value", "value": value}
+
+        try:
+            variable_descriptions = dict()
+            for name, value in variables.items():
+                if name in attribute_names:
+                    attributes = {attribute_name: describe_value(getattr(value, attribute_name)) for attribute_name in attribute_names[name]}
+                    variable_descriptions[name] = {"type": "object", "attributes": attributes}
+                else:
+                    variable_descriptions[name] = describe_value(value)
+            future = self.__get_executor().submit(_execute_script, expression, variable_descriptions)
+            while not concurrent.futures.wait([future], timeout=0.05).done:
+                if cancel_event and cancel_event.is_set():
+                    future.add_done_callback(_release_result)
+                    return None
+            description, error_text = future.result()
+            if description:
+                shm = shared_memory.SharedMemory(name=description["name"])
+                try:
+                    target.xdata = _xdata_from_shared_memory(shm, description, True)
+                finally:
+                    shm.close()
+                    shm.unlink()
+            return error_text
+        finally:
+            for shm in shms:
+                _close_shared_memory(shm)
+                shm.unlink()
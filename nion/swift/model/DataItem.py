@@ -23,6 +23,7 @@ from nion.swift.model import Cache
 from nion.swift.model import Connection
 from nion.swift.model import Display
 from nion.swift.model import Graphics
+from nion.swift.model import HDF5Handler
 from nion.swift.model import Symbolic
 from nion.swift.model import Utility
 from nion.utils import Event
@@ -118,6 +119,13 @@ class UuidsToStringsConverter:
         return [uuid.UUID(uuid_str) for uuid_str in value]
 
 
+class StoragePolicyToDictConverter:
+    def convert(self, value):
+        return value.write_to_dict() if value is not None else None
+    def convert_back(self, value):
+        return HDF5Handler.HDF5StoragePolicy.read_from_dict(value) if value is not None else None
+
+
 class BufferedDataSource(Observable.Observable, Persistence.PersistentObject):
 
     """
@@ -304,6 +312,20 @@ class BufferedDataSource(Observable.Observable, Persistence.PersistentObject):
             return self.persistent_object_context.load_data(self)
         return None
 
+    def get_data_slice(self, key) -> typing.Optional[numpy.ndarray]:
+        """Return the data sliced by key.
+
+        If the data is not loaded, only the slice is read from storage (a hyperslab for HDF5, a memory mapped read for
+        ndata). Otherwise the loaded data is sliced, which may return a view.
+        """
+        data_and_metadata = self.__data_and_metadata
+        if data_and_metadata is None:
+            return None
+        if not data_and_metadata.data_if_loaded and self.persistent_object_context:
+            return self.persistent_object_context.load_data_slice(self, key)
+        data = data_and_metadata.data
+        return data[key] if data is not None else None
+
     def __set_data_metadata_direct(self, data_and_metadata, data_modified=None):
         self.__data_and_metadata = data_and_metadata
         if self.__data_and_metadata:
@@ -323,9 +345,12 @@ class BufferedDataSource(Observable.Observable, Persistence.PersistentObject):
         self.data_modified = data_modified if data_modified else datetime.datetime.utcnow()
         self.data_changed_event.fire(self)
 
-    def set_data_and_metadata(self, data_and_metadata, data_modified=None):
+    def set_data_and_metadata(self, data_and_metadata, data_modified=None, sub_area=None):
         """Sets the underlying data and data-metadata to the data_and_metadata.
 
+        The sub_area ((top, left), (height, width)) is the area changed from the previous data, if known; only that area
+        is rewritten in storage when possible.
+
         Note: this does not make a copy of the data.
         """
         self.increment_data_ref_count()
@@ -344,7 +369,7 @@ class BufferedDataSource(Observable.Observable, Persistence.PersistentObject):
             self.__set_data_metadata_direct(new_data_and_metadata, data_modified)
             if self.__data_and_metadata is not None:
                 if self.persistent_object_context:
-                    self.persistent_object_context.rewrite_data_item_data(self, self.__data_and_metadata.data)  # ouch, up reference to data item
+                    self.persistent_object_context.rewrite_data_item_data(self, self.__data_and_metadata.data, sub_area)  # ouch, up reference to data item
                     self.__data_and_metadata.unloadable = True
         finally:
             self.decrement_data_ref_count()
@@ -512,6 +537,15 @@ class BufferedDataSource(Observable.Observable, Persistence.PersistentObject):
         return self.__data_and_metadata.size_and_data_format_as_string if self.__data_and_metadata else _("No Data")
 
 
+def union_sub_areas(sub_area1, sub_area2):
+    """Return the smallest sub area ((top, left), (height, width)) containing both sub areas."""
+    top = min(sub_area1[0][0], sub_area2[0][0])
+    left = min(sub_area1[0][1], sub_area2[0][1])
+    bottom = max(sub_area1[0][0] + sub_area1[1][0], sub_area2[0][0] + sub_area2[1][0])
+    right = max(sub_area1[0][1] + sub_area1[1][1], sub_area2[0][1] + sub_area2[1][1])
+    return (top, left), (bottom - top, right - left)
+
+
 class SessionManager(abc.ABC):
 
     @property
@@ -1074,6 +1108,8 @@ class DataItem(LibraryItem):
     def __init__(self, data=None, item_uuid=None, large_format=False):
         super().__init__(item_uuid)
         self.large_format = large_format
+        # storage policy (chunking, compression) passed to the storage handler for large format data items. see HDF5Handler.
+        self.define_property("large_format_storage_policy", converter=StoragePolicyToDictConverter())
         self.define_item("data_source", data_source_factory, item_changed=self.__data_source_changed)
         self.define_item("computation", computation_factory)
         self.define_relationship("displays", Display.display_factory, insert=self.__insert_display, remove=self.__remove_display)
@@ -1089,6 +1125,7 @@ class DataItem(LibraryItem):
         self.__change_changed = False
         self.__pending_xdata_lock = threading.RLock()
         self.__pending_xdata = None
+        self.__pending_sub_area = None
         if data is not None:
             self.set_data_source(BufferedDataSource(data))
         self.add_display(Display.Display())  # always have one display, for now
@@ -1098,6 +1135,7 @@ class DataItem(LibraryItem):
         data_item_copy = super().__deepcopy__(memo)
         # format
         data_item_copy.large_format = self.large_format
+        data_item_copy.large_format_storage_policy = self.large_format_storage_policy
         # data source
         data_item_copy.set_data_source(copy.deepcopy(self.data_source))
         # computation
@@ -1143,6 +1181,7 @@ class DataItem(LibraryItem):
         data_item = super().snapshot()
         # format
         data_item.large_format = self.large_format
+        data_item.large_format_storage_policy = self.large_format_storage_policy
         # data sources
         data_source = self.data_source
         if data_source:
@@ -1252,23 +1291,37 @@ class DataItem(LibraryItem):
             return max(data_modified_list)
         return super().date_for_sorting
 
-    def update_data_and_metadata(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
+    def update_data_and_metadata(self, data_and_metadata: DataAndMetadata.DataAndMetadata, sub_area=None) -> None:
         assert threading.current_thread() == threading.main_thread()
         with self.data_item_changes():
-            self.set_xdata(data_and_metadata)
+            self.set_xdata(data_and_metadata, sub_area=sub_area)
             self.timezone = Utility.get_local_timezone()
             self.timezone_offset = Utility.TimezoneMinutesToStringConverter().convert(Utility.local_utcoffset_minutes())
 
-    def set_pending_xdata(self, xd: DataAndMetadata.DataAndMetadata) -> None:
+    def set_pending_xdata(self, xd: DataAndMetadata.DataAndMetadata, sub_area=None) -> None:
+        """Set the xdata for the next update. Threadsafe.
+
+        The sub_area ((top, left), (height, width)) is the area changed from the previous xdata, or None if all of the
+        data may have changed. The areas of pending updates that are replaced are combined.
+        """
         with self.__pending_xdata_lock:
+            if self.__pending_xdata is not None:
+                sub_area = union_sub_areas(self.__pending_sub_area, sub_area) if self.__pending_sub_area is not None and sub_area is not None else None
             self.__pending_xdata = xd
+            self.__pending_sub_area = sub_area
 
-    def update_to_pending_xdata(self):
+    def take_pending_xdata(self) -> typing.Tuple[typing.Optional[DataAndMetadata.DataAndMetadata], typing.Any]:
+        """Return and clear the pending xdata and its changed sub area. Threadsafe."""
         with self.__pending_xdata_lock:
-            pending_xdata = self.__pending_xdata
+            pending_xdata, pending_sub_area = self.__pending_xdata, self.__pending_sub_area
             self.__pending_xdata = None
+            self.__pending_sub_area = None
+        return pending_xdata, pending_sub_area
+
+    def update_to_pending_xdata(self):
+        pending_xdata, pending_sub_area = self.take_pending_xdata()
         if pending_xdata:
-            self.update_data_and_metadata(pending_xdata)
+            self.update_data_and_metadata(pending_xdata, pending_sub_area)
 
     def __handle_data_changed(self, data_source):
         self.__change_changed = True
@@ -1419,13 +1472,17 @@ class DataItem(LibraryItem):
     def xdata(self) -> DataAndMetadata.DataAndMetadata:
         return self.data_source.data_and_metadata if self.data_source else None
 
+    def get_data_slice(self, key) -> typing.Optional[numpy.ndarray]:
+        """Return the data sliced by key, reading only the slice from storage if the data is not loaded."""
+        return self.data_source.get_data_slice(key) if self.data_source else None
+
     def set_data(self, data: numpy.ndarray, data_modified: datetime.datetime=None) -> None:
         self.set_xdata(DataAndMetadata.new_data_and_metadata(data, data_modified))
 
-    def set_xdata(self, xdata: DataAndMetadata.DataAndMetadata, data_modified: datetime.datetime=None) -> None:
+    def set_xdata(self, xdata: DataAndMetadata.DataAndMetadata, data_modified: datetime.datetime=None, sub_area=None) -> None:
         with self.data_source_changes():
             if self.data_source:
-                self.data_source.set_data_and_metadata(xdata, data_modified)
+                self.data_source.set_data_and_metadata(xdata, data_modified, sub_area)
 
     # grab a data reference as a context manager. the object
     # returned defines data and data properties. reading data
@@ -1513,8 +1570,9 @@ class DataItem(LibraryItem):
 
     def __update_displays(self):
         data_and_metadata = self.xdata
+        data_slice_fn = self.data_source.get_data_slice if self.data_source else None
         for display in self.displays:
-            display.update_data(data_and_metadata)
+            display.update_data(data_and_metadata, data_slice_fn)
 
     @property
     def data_modified(self) -> datetime.datetime:
@@ -169,12 +169,49 @@ def calculate_display_range(display_limits, data_range, data_sample, xdata, comp
     return data_range
 
 
+def get_picked_data_and_metadata(data_and_metadata: DataAndMetadata.DataAndMetadata, data_slice_fn: typing.Callable, sequence_index: int, collection_index) -> DataAndMetadata.DataAndMetadata:
+    """Return the data and metadata with the sequence index and picked collection index applied, loaded with data_slice_fn.
+
+    The returned data is only the slice needed for display, which data_slice_fn may read from storage without loading
+    the full data. Collections that are displayed by summing or by stacking rows are not picked.
+    """
+    key = list()
+    dimensional_shape = data_and_metadata.dimensional_shape
+    if data_and_metadata.is_sequence:
+        key.append(min(max(sequence_index, 0), dimensional_shape[0] - 1))
+    collection_dimension_count = data_and_metadata.collection_dimension_count
+    datum_dimension_count = data_and_metadata.datum_dimension_count
+    is_picked = collection_dimension_count > 0
+    if collection_dimension_count == 1 and datum_dimension_count == 1 and data_and_metadata.collection_dimension_shape[0] <= 16:
+        is_picked = False
+    elif collection_dimension_count == 2 and datum_dimension_count == 1:
+        is_picked = False
+    if is_picked:
+        collection_dimension_shape = data_and_metadata.collection_dimension_shape
+        for i in range(collection_dimension_count):
+            index = collection_index[i] if collection_index and i < len(collection_index) else 0
+            key.append(min(max(index, 0), collection_dimension_shape[i] - 1))
+    if not key or min(dimensional_shape) == 0:
+        return data_and_metadata
+    key = tuple(key)
+    data_shape = data_and_metadata.data_shape[len(key):]
+    dimensional_calibrations = data_and_metadata.dimensional_calibrations[len(key):]
+    data_descriptor = DataAndMetadata.DataDescriptor(False, 0 if is_picked else collection_dimension_count, datum_dimension_count)
+    return DataAndMetadata.DataAndMetadata(lambda: data_slice_fn(key), (data_shape, data_and_metadata.data_dtype), data_and_metadata.intensity_calibration,
+                                           dimensional_calibrations, data_and_metadata.metadata, data_and_metadata.timestamp, data_descriptor=data_descriptor,
+                                           timezone=data_and_metadata.timezone, timezone_offset=data_and_metadata.timezone_offset)
+
+
 class DisplayValues:
-    """Display data used to render the display."""
+    """Display data used to render the display.
+
+    If data_slice_fn is passed and the data is not loaded, only the slice of the data needed for display is read.
+    """
 
-    def __init__(self, data_and_metadata, sequence_index, collection_index, slice_center, slice_width, display_limits, complex_display_type, color_map_data):
+    def __init__(self, data_and_metadata, sequence_index, collection_index, slice_center, slice_width, display_limits, complex_display_type, color_map_data, data_slice_fn=None):
         self.__lock = threading.RLock()
         self.__data_and_metadata = data_and_metadata
+        self.__data_slice_fn = data_slice_fn
         self.__sequence_index = sequence_index
         self.__collection_index = collection_index
         self.__slice_center = slice_center
@@ -214,6 +251,8 @@ class DisplayValues:
                 data_and_metadata = self.__data_and_metadata
                 if data_and_metadata is not None:
                     timestamp = data_and_metadata.timestamp
+                    if callable(self.__data_slice_fn) and not data_and_metadata.data_if_loaded:
+                        data_and_metadata = get_picked_data_and_metadata(data_and_metadata, self.__data_slice_fn, self.__sequence_index, self.__collection_index)
                     data_and_metadata, modified = Core.function_display_data_no_copy(data_and_metadata, self.__sequence_index, self.__collection_index, self.__slice_center, self.__slice_width, self.__complex_display_type)
                     if data_and_metadata:
                         data_and_metadata.data_metadata.timestamp = timestamp
@@ -298,7 +337,7 @@ class Display(Observable.Observable, Persistence.PersistentObject):
     def __init__(self):
         super().__init__()
         self.__container_weak_ref = None
-        self.__cache = Cache.ShadowCache()
+        self.__cache = Cache.ShadowCache(self)
         self.__color_map_data = None
         self.define_property("display_type", changed=self.__display_type_changed)
         self.define_property("complex_display_type", changed=self.__property_changed)
@@ -333,6 +372,7 @@ class Display(Observable.Observable, Persistence.PersistentObject):
         self.__graphics_map = dict()  # type: typing.MutableMapping[uuid.UUID, Graphics.Graphic]
         self.__graphic_changed_listeners = list()
         self.__data_and_metadata = None  # the most recent data to be displayed. should have immediate data available.
+        self.__data_slice_fn = None  # reads a slice of the data without loading it; see DisplayValues.
         self.graphic_selection = GraphicSelection()
 
         def graphic_selection_changed():
@@ -633,9 +673,10 @@ class Display(Observable.Observable, Persistence.PersistentObject):
 
     # message sent when data changes.
     # thread safe
-    def update_data(self, data_and_metadata):
+    def update_data(self, data_and_metadata, data_slice_fn=None):
         old_data_shape = self.__data_and_metadata.data_shape if self.__data_and_metadata else None
         self.__data_and_metadata = data_and_metadata
+        self.__data_slice_fn = data_slice_fn
         new_data_shape = self.__data_and_metadata.data_shape if self.__data_and_metadata else None
         if old_data_shape != new_data_shape:
             self.validate_slice_indexes()
@@ -669,7 +710,7 @@ class Display(Observable.Observable, Persistence.PersistentObject):
 
         if not secondary or not self.__is_master or not self.__last_display_values:
             if not self.__current_display_values:
-                self.__current_display_values = DisplayValues(self.__data_and_metadata, self.sequence_index, self.collection_index, self.slice_center, self.slice_width, self.display_limits, self.complex_display_type, self.__color_map_data)
+                self.__current_display_values = DisplayValues(self.__data_and_metadata, self.sequence_index, self.collection_index, self.slice_center, self.slice_width, self.display_limits, self.complex_display_type, self.__color_map_data, self.__data_slice_fn)
 
                 def finalize(display_values):
                     self.__last_display_values = display_values
@@ -1,15 +1,19 @@
 # standard libraries
 import asyncio
 import collections
+import concurrent.futures
+import contextlib
 import copy
 import datetime
 import functools
 import gettext
+import itertools
 import json
 import logging
 import numbers
 import os.path
 import shutil
+import sqlite3
 import threading
 import time
 import typing
@@ -24,6 +28,7 @@ import scipy
 from nion.data import DataAndMetadata
 from nion.data import Image
 from nion.swift.model import Cache
+from nion.swift.model import ComputationProcessPool
 from nion.swift.model import Connection
 from nion.swift.model import DataGroup
 from nion.swift.model import DataItem
@@ -151,6 +156,10 @@ class DataItemStorage:
             read_data()
             write_properties(properties, file_datetime)
             write_data(data, file_datetime)
+
+        The storage_handler may respond to these methods to read or write part of the data:
+            read_data_slice(key)
+            write_data_slice(key, data, file_datetime)
     """
 
     def __init__(self, storage_handler=None, data_item=None, properties=None):
@@ -158,6 +167,7 @@ class DataItemStorage:
         self.__properties = Utility.clean_dict(copy.deepcopy(properties) if properties else dict())
         self.__properties_lock = threading.RLock()
         self.__weak_data_item = weakref.ref(data_item) if data_item else None
+        self.__written_data_shape_and_dtype = None
         self.write_delayed = False
 
     def close(self):
@@ -235,16 +245,37 @@ class DataItemStorage:
                     del storage_dict[name]
         self.update_properties()
 
-    def update_data(self, data):
+    def update_data(self, data, sub_area=None):
+        # sub_area ((top, left), (height, width)) is the area changed since the previous data. if the previous data was
+        # written with the same shape and dtype, only the changed area is written when the storage handler supports it.
         if not self.write_delayed:
             file_datetime = self.data_item.created_local
             if data is not None:
+                if sub_area is not None and len(data.shape) >= 2 and self.__written_data_shape_and_dtype == (data.shape, data.dtype):
+                    key = slice(sub_area[0][0], sub_area[0][0] + sub_area[1][0]), slice(sub_area[0][1], sub_area[0][1] + sub_area[1][1])
+                    write_data_slice = getattr(self.__storage_handler, "write_data_slice", None)
+                    if callable(write_data_slice):
+                        try:
+                            write_data_slice(key, data[key], file_datetime)
+                            return
+                        except NotImplementedError:
+                            pass
                 self.__storage_handler.write_data(data, file_datetime)
+                self.__written_data_shape_and_dtype = data.shape, data.dtype
+        else:
+            self.__written_data_shape_and_dtype = None
 
     def load_data(self):
         assert self.data_item.has_data
         return self.__storage_handler.read_data()
 
+    def load_data_slice(self, key):
+        read_data_slice = getattr(self.__storage_handler, "read_data_slice", None)
+        if callable(read_data_slice):
+            return read_data_slice(key)
+        data = self.__storage_handler.read_data()
+        return data[key] if data is not None else None
+
     def set_property(self, object, name, value):
         storage_dict = self.__update_modified_and_get_storage_dict(object)
         with self.__properties_lock:
@@ -286,6 +317,10 @@ class MemoryStorageSystem:
             self.__data_read_event.fire(self.__uuid)
             return self.__data.get(self.__uuid)
 
+        def read_data_slice(self, key):
+            data = self.__data.get(self.__uuid)
+            return data[key].copy() if data is not None else None
+
         def write_properties(self, properties, file_datetime):
             self.__properties[self.__uuid] = Utility.clean_dict(copy.deepcopy(properties))
 
@@ -308,28 +343,267 @@ class MemoryStorageSystem:
         return MemoryStorageSystem.MemoryStorageHandler(uuid, self.properties, self.data, self._test_data_read_event)
 
 
+def map_threaded(fn: typing.Callable, items: typing.Sequence, max_workers: typing.Optional[int]) -> typing.List:
+    """Return the list of fn applied to each of items, using up to max_workers threads.
+
+    The results are in the same order as items. If max_workers is None or less than 2, items are processed serially.
+    """
+    if max_workers is not None and max_workers > 1 and len(items) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
+    return [fn(item) for item in items]
+
+
+def _scan_directory(directory: str) -> typing.Tuple[typing.List[str], typing.List[str]]:
+    # return the files and sub-directories of directory. ignore errors and do not follow symbolic links to
+    # directories, like os.walk.
+    file_paths = list()
+    directory_paths = list()
+    try:
+        for dir_entry in os.scandir(directory):
+            try:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    directory_paths.append(dir_entry.path)
+                elif not dir_entry.is_dir():
+                    file_paths.append(dir_entry.path)
+            except OSError:
+                pass
+    except OSError:
+        pass
+    return file_paths, directory_paths
+
+
 from nion.swift.model import NDataHandler
 from nion.swift.model import HDF5Handler
 
+class LibraryManifest:
+
+    """
+        Stores a snapshot of the properties of each file in a file storage system.
+
+        Each entry is keyed by the file path and records the file modification time, size, and change time. An entry
+        is only used while those values are unchanged; otherwise the properties must be read from the file.
+
+        The manifest is a sqlite database and may be used from multiple threads.
+    """
+
+    def __init__(self, manifest_path: str):
+        Cache.db_make_directory_if_needed(os.path.dirname(manifest_path))
+        self.__lock = threading.RLock()
+        self.__conn = sqlite3.connect(manifest_path, check_same_thread=False)
+        self.__conn.execute("PRAGMA synchronous = OFF")
+        with self.__conn:
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS manifest(path STRING PRIMARY KEY, mtime INTEGER, size INTEGER, ctime INTEGER, properties STRING)")
+
+    def close(self):
+        with self.__lock:
+            if self.__conn:
+                self.__conn.close()
+                self.__conn = None
+
+    @staticmethod
+    def get_file_key(file_path: str) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """Return the key used to validate manifest entries for the file; None if the file does not exist."""
+        try:
+            stat_result = os.stat(file_path)
+            return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ctime_ns
+        except OSError:
+            return None
+
+    def read_file_keys(self) -> typing.Dict[str, typing.Tuple[int, int, int]]:
+        with self.__lock:
+            return {row[0]: tuple(row[1:]) for row in self.__conn.execute("SELECT path, mtime, size, ctime FROM manifest")}
+
+    def read_properties(self, file_path: str, file_key: typing.Tuple[int, int, int]) -> typing.Optional[dict]:
+        """Return the properties for the file if the manifest entry matches file_key; otherwise None."""
+        with self.__lock:
+            row = self.__conn.execute("SELECT mtime, size, ctime, properties FROM manifest WHERE path=?", (file_path, )).fetchone()
+        if row is not None and tuple(row[0:3]) == tuple(file_key):
+            return json.loads(row[3])
+        return None
+
+    def write_properties(self, file_path: str, file_key: typing.Tuple[int, int, int], properties: dict) -> None:
+        try:
+            properties_str = json.dumps(Utility.clean_dict(properties))
+        except Exception as e:
+            # the file is still valid, the manifest will read it from the file next time
+            self.remove(file_path)
+            return
+        with self.__lock:
+            with self.__conn:
+                self.__conn.execute("INSERT OR REPLACE INTO manifest (path, mtime, size, ctime, properties) VALUES (?, ?, ?, ?, ?)", (file_path, ) + tuple(file_key) + (properties_str, ))
+
+    def update_file_key(self, file_path: str, old_file_key: typing.Optional[typing.Tuple[int, int, int]], new_file_key: typing.Optional[typing.Tuple[int, int, int]]) -> None:
+        """Update the key of the entry if it currently matches old_file_key; otherwise remove the entry."""
+        with self.__lock:
+            with self.__conn:
+                updated = False
+                if old_file_key is not None and new_file_key is not None:
+                    cursor = self.__conn.execute("UPDATE manifest SET mtime=?, size=?, ctime=? WHERE path=? AND mtime=? AND size=? AND ctime=?", tuple(new_file_key) + (file_path, ) + tuple(old_file_key))
+                    updated = cursor.rowcount > 0
+                if not updated:
+                    self.__conn.execute("DELETE FROM manifest WHERE path=?", (file_path, ))
+
+    def remove(self, file_path: str) -> None:
+        with self.__lock:
+            with self.__conn:
+                self.__conn.execute("DELETE FROM manifest WHERE path=?", (file_path, ))
+
+    def retain(self, file_paths: typing.Iterable[str]) -> None:
+        """Remove the entries for files not in file_paths."""
+        file_paths = set(file_paths)
+        with self.__lock:
+            removed_file_paths = [(file_path, ) for (file_path, ) in self.__conn.execute("SELECT path FROM manifest") if file_path not in file_paths]
+            if removed_file_paths:
+                with self.__conn:
+                    self.__conn.executemany("DELETE FROM manifest WHERE path=?", removed_file_paths)
+
+
+class ManifestStorageHandler:
+
+    """
+        Wraps a storage handler so that properties are read from the library manifest when the file is unchanged.
+
+        Writes go to the wrapped storage handler and then update the manifest.
+
+        Pass file_key if it is already known from scanning the files; it will be used for the first properties read.
+    """
+
+    def __init__(self, storage_handler, manifest: LibraryManifest, file_key: typing.Optional[typing.Tuple[int, int, int]]=None):
+        self.__storage_handler = storage_handler
+        self.__manifest = manifest
+        self.__file_key = file_key
+
+    def close(self):
+        self.__storage_handler.close()
+
+    @property
+    def storage_handler(self):
+        return self.__storage_handler
+
+    @property
+    def reference(self):
+        return self.__storage_handler.reference
+
+    @property
+    def is_valid(self):
+        return self.__storage_handler.is_valid
+
+    def read_properties(self):
+        file_path = self.reference
+        file_key = self.__file_key if self.__file_key is not None else LibraryManifest.get_file_key(file_path)
+        self.__file_key = None
+        properties = self.__manifest.read_properties(file_path, file_key) if file_key is not None else None
+        if properties is None:
+            properties = self.__storage_handler.read_properties()
+            if file_key is not None:
+                self.__manifest.write_properties(file_path, file_key, properties)
+        return properties
+
+    def read_data(self):
+        return self.__storage_handler.read_data()
+
+    def read_data_slice(self, key):
+        read_data_slice = getattr(self.__storage_handler, "read_data_slice", None)
+        if callable(read_data_slice):
+            return read_data_slice(key)
+        data = self.__storage_handler.read_data()
+        return data[key] if data is not None else None
+
+    def write_properties(self, properties, file_datetime):
+        self.__storage_handler.write_properties(properties, file_datetime)
+        file_path = self.reference
+        file_key = LibraryManifest.get_file_key(file_path)
+        if file_key is not None:
+            self.__manifest.write_properties(file_path, file_key, properties)
+        else:
+            self.__manifest.remove(file_path)
+
+    def write_data(self, data, file_datetime):
+        file_path = self.reference
+        old_file_key = LibraryManifest.get_file_key(file_path)
+        self.__storage_handler.write_data(data, file_datetime)
+        # writing data does not change properties, so only the key needs updating
+        self.__manifest.update_file_key(file_path, old_file_key, LibraryManifest.get_file_key(file_path))
+
+    def write_data_slice(self, key, data, file_datetime):
+        write_data_slice = getattr(self.__storage_handler, "write_data_slice", None)
+        if not callable(write_data_slice):
+            raise NotImplementedError()
+        file_path = self.reference
+        old_file_key = LibraryManifest.get_file_key(file_path)
+        write_data_slice(key, data, file_datetime)
+        self.__manifest.update_file_key(file_path, old_file_key, LibraryManifest.get_file_key(file_path))
+
+    def remove(self):
+        self.__storage_handler.remove()
+        self.__manifest.remove(self.reference)
+
+
 class FileStorageSystem:
 
+    """Find and make storage handlers for files in a list of directories.
+
+    The directory scan and the file matching use up to max_workers threads, which reduces the time to find files on
+    high latency (network) file systems. The persistent object context also uses max_workers when reading the
+    properties of the storage handlers. The storage handlers are returned in sorted file path order for each file
+    handler, independent of max_workers. Pass None to scan serially.
+
+    If manifest_path is specified, a library manifest is kept at that path and the storage handlers read the properties
+    of unchanged files from the manifest instead of from the files. See LibraryManifest.
+    """
+
     _file_handlers = [NDataHandler.NDataHandler, HDF5Handler.HDF5Handler]
 
-    def __init__(self, directories):
+    def __init__(self, directories, max_workers: typing.Optional[int]=None, manifest_path: str=None):
         self.__directories = directories
         self.__file_handlers = FileStorageSystem._file_handlers
+        self.__max_workers = max_workers
+        self.__manifest = LibraryManifest(manifest_path) if manifest_path else None
+
+    def close(self):
+        if self.__manifest:
+            self.__manifest.close()
+            self.__manifest = None
+
+    @property
+    def max_workers(self) -> typing.Optional[int]:
+        return self.__max_workers
+
+    def __find_file_paths(self) -> typing.List[str]:
+        absolute_file_paths = set()
+        directories = list(self.__directories)
+        while directories:
+            scan_results = map_threaded(_scan_directory, directories, self.__max_workers)
+            directories = list()
+            for file_paths, directory_paths in scan_results:
+                absolute_file_paths.update(file_paths)
+                directories.extend(directory_paths)
+        return sorted(absolute_file_paths)
 
     def find_data_items(self):
         storage_handlers = list()
-        absolute_file_paths = set()
-        for directory in self.__directories:
-            for root, dirs, files in os.walk(directory):
-                absolute_file_paths.update([os.path.join(root, data_file) for data_file in files])
+        absolute_file_paths = self.__find_file_paths()
+        file_keys = dict()
+        if self.__manifest:
+            # files with a valid manifest entry matched a file handler when the entry was written.
+            manifest_file_keys = self.__manifest.read_file_keys()
+            self.__manifest.retain(absolute_file_paths)
+            for data_file, file_key in zip(absolute_file_paths, map_threaded(LibraryManifest.get_file_key, absolute_file_paths, self.__max_workers)):
+                if file_key is not None and manifest_file_keys.get(data_file) == file_key:
+                    file_keys[data_file] = file_key
         for file_handler in self.__file_handlers:
-            for data_file in filter(file_handler.is_matching, absolute_file_paths):
+            def is_matching(data_file: str) -> bool:
+                if data_file in file_keys:
+                    return data_file.endswith(file_handler.get_extension())
+                return file_handler.is_matching(data_file)
+            matches = map_threaded(is_matching, absolute_file_paths, self.__max_workers)
+            for data_file in itertools.compress(absolute_file_paths, matches):
                 try:
                     storage_handler = file_handler(data_file)
                     assert storage_handler.is_valid
+                    if self.__manifest:
+                        storage_handler = ManifestStorageHandler(storage_handler, self.__manifest, file_keys.get(data_file))
                     storage_handlers.append(storage_handler)
                 except Exception as e:
                     logging.error("Exception reading file: %s", data_file)
@@ -368,7 +642,12 @@ class FileStorageSystem:
         # if there are two handlers, first is small, second is large
         # if there is only one handler, it is used in all cases
         file_handler = file_handler if file_handler else (self.__file_handlers[-1] if data_item.large_format else self.__file_handlers[0])
-        return file_handler.make(os.path.join(self.__directories[0], self.__get_default_path(data_item)))
+        storage_handler = file_handler.make(os.path.join(self.__directories[0], self.__get_default_path(data_item)))
+        if data_item.large_format and hasattr(storage_handler, "storage_policy"):
+            storage_handler.storage_policy = data_item.large_format_storage_policy
+        if self.__manifest:
+            storage_handler = ManifestStorageHandler(storage_handler, self.__manifest)
+        return storage_handler
 
 
 class PersistentDataItemContext(Persistence.PersistentObjectContext):
@@ -392,18 +671,24 @@ class PersistentDataItemContext(Persistence.PersistentObjectContext):
         self.__log_migrations = log_migrations
         self.__log_copying = log_copying
 
+    def close(self):
+        for persistent_storage_system in self.__persistent_storage_systems:
+            if hasattr(persistent_storage_system, "close"):
+                persistent_storage_system.close()
+
     @property
     def persistent_storage_systems(self):
         return self.__persistent_storage_systems
 
     def read_data_items_version_stats(self):
-        storage_handlers = list()  # storage_handler
+        properties_list = list()
         for persistent_storage_system in self.__persistent_storage_systems:
-            storage_handlers.extend(persistent_storage_system.find_data_items())
+            storage_handlers = persistent_storage_system.find_data_items()
+            max_workers = getattr(persistent_storage_system, "max_workers", None)
+            properties_list.extend(map_threaded(lambda storage_handler: storage_handler.read_properties(), storage_handlers, max_workers))
         count = [0, 0, 0]  # data item matches version, data item has higher version, data item has lower version
         writer_version = DataItem.DataItem.writer_version
-        for storage_handler in storage_handlers:
-            properties = storage_handler.read_properties()
+        for properties in properties_list:
             version = properties.get("version", 0)
             if version < writer_version:
                 count[2] += 1
@@ -422,20 +707,24 @@ class PersistentDataItemContext(Persistence.PersistentObjectContext):
 
         Pass target_document to copy data items into new document. Useful for auto migration.
         """
-        storage_handlers = list()  # storage_handler
-        for persistent_storage_system in self.__persistent_storage_systems:
-            storage_handlers.extend(persistent_storage_system.find_data_items())
         data_items_by_uuid = dict()
         ReaderInfo = collections.namedtuple("ReaderInfo", ["properties", "changed_ref", "storage_handler"])
         reader_info_list = list()
-        for storage_handler in storage_handlers:
+        def read_properties(storage_handler):
             try:
-                reader_info_list.append(ReaderInfo(storage_handler.read_properties(), [False], storage_handler))
+                return ReaderInfo(storage_handler.read_properties(), [False], storage_handler)
             except Exception as e:
                 logging.debug("Error reading %s", storage_handler.reference)
                 import traceback
                 traceback.print_exc()
                 traceback.print_stack()
+            return None
+        for persistent_storage_system in self.__persistent_storage_systems:
+            storage_handlers = persistent_storage_system.find_data_items()
+            max_workers = getattr(persistent_storage_system, "max_workers", None)
+            for reader_info in map_threaded(read_properties, storage_handlers, max_workers):
+                if reader_info is not None:
+                    reader_info_list.append(reader_info)
         if not self.__ignore_older_files:
             self.__migrate_to_latest(reader_info_list)
         for reader_info in reader_info_list:
@@ -470,7 +759,7 @@ class PersistentDataItemContext(Persistence.PersistentObjectContext):
                                 logging.info("Warning: Duplicate data item %s", data_item.uuid)
                             data_items_by_uuid[data_item.uuid] = data_item
                         else:
-                            large_format = isinstance(storage_handler, HDF5Handler.HDF5Handler)
+                            large_format = isinstance(getattr(storage_handler, "storage_handler", storage_handler), HDF5Handler.HDF5Handler)
                             data_item = DataItem.DataItem(item_uuid=data_item_uuid, large_format=large_format)
                             data_item.begin_reading()
                             persistent_storage = DataItemStorage(storage_handler=storage_handler, data_item=data_item, properties=properties)
@@ -1083,9 +1372,9 @@ class PersistentDataItemContext(Persistence.PersistentObjectContext):
         persistent_storage = self._get_persistent_storage_for_object(data_item)
         persistent_storage.update_properties()
 
-    def rewrite_data_item_data(self, data_item, data: numpy.ndarray) -> None:
+    def rewrite_data_item_data(self, data_item, data: numpy.ndarray, sub_area=None) -> None:
         persistent_storage = self._get_persistent_storage_for_object(data_item)
-        persistent_storage.update_data(data)
+        persistent_storage.update_data(data, sub_area)
 
     def erase_data_item(self, data_item):
         persistent_storage = self._get_persistent_storage_for_object(data_item)
@@ -1096,15 +1385,443 @@ class PersistentDataItemContext(Persistence.PersistentObjectContext):
         persistent_storage = self._get_persistent_storage_for_object(data_item)
         return persistent_storage.load_data()
 
+    def load_data_slice(self, data_item, key):
+        persistent_storage = self._get_persistent_storage_for_object(data_item)
+        return persistent_storage.load_data_slice(key)
+
     def _test_get_file_path(self, data_item):
         persistent_storage = self._get_persistent_storage_for_object(data_item)
         return persistent_storage._storage_handler.reference
 
 
+class ComputationTarget:
+    """Evaluation target for a computation that collects the results without cloning the target data item.
+
+    Writes of data and xdata are captured directly. Any other use of the target falls back to an API object for a
+    recorded clone of the data item, made on first use. The collected results are applied to the data item on the
+    main thread by calling merge.
+    """
+
+    def __init__(self, api, data_item: DataItem.DataItem):
+        self.__api = api
+        self.__data_item = data_item
+        self.__xdata = None
+        self.__data_item_clone = None
+        self.__data_item_clone_recorder = None
+        self.__data_item_clone_data_modified = None
+        self.__api_data_item = None
+
+    def __get_api_data_item(self):
+        if self.__api_data_item is None:
+            self.__data_item_clone = self.__data_item.clone()
+            self.__data_item_clone_data_modified = self.__data_item.data_modified or datetime.datetime.min
+            self.__data_item_clone_recorder = Recorder.Recorder(self.__data_item_clone)
+            self.__api_data_item = self.__api._new_api_object(self.__data_item_clone)
+            if self.__xdata is not None:
+                self.__api_data_item.xdata = self.__xdata
+                self.__xdata = None
+        return self.__api_data_item
+
+    def __getattr__(self, name):
+        if name.startswith("_ComputationTarget__"):
+            raise AttributeError(name)
+        return getattr(self.__get_api_data_item(), name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_") or hasattr(type(self), name):
+            super().__setattr__(name, value)
+        else:
+            setattr(self.__get_api_data_item(), name, value)
+
+    @property
+    def uuid(self) -> uuid.UUID:
+        return self.__data_item.uuid
+
+    @property
+    def xdata(self) -> DataAndMetadata.DataAndMetadata:
+        if self.__api_data_item is not None:
+            return self.__api_data_item.xdata
+        if self.__xdata is not None:
+            return self.__xdata
+        # nothing is written yet, so this is the data of the data item itself; return a read only view of it so that
+        # the computation cannot modify the data item outside of the merge.
+        xdata = self.__data_item.xdata
+        if xdata is None:
+            return None
+        data = xdata.data.view()
+        data.flags.writeable = False
+        return DataAndMetadata.new_data_and_metadata(data, xdata.intensity_calibration, xdata.dimensional_calibrations, xdata.metadata, xdata.timestamp,
+                                                     data_descriptor=xdata.data_descriptor, timezone=xdata.timezone, timezone_offset=xdata.timezone_offset)
+
+    @xdata.setter
+    def xdata(self, xdata: DataAndMetadata.DataAndMetadata) -> None:
+        if self.__api_data_item is not None:
+            self.__api_data_item.xdata = xdata
+        else:
+            self.__xdata = xdata
+
+    @property
+    def data(self) -> numpy.ndarray:
+        xdata = self.xdata
+        return xdata.data if xdata else None
+
+    @data.setter
+    def data(self, data: numpy.ndarray) -> None:
+        self.xdata = DataAndMetadata.new_data_and_metadata(numpy.copy(data))
+
+    def set_data(self, data: numpy.ndarray) -> None:
+        self.data = data
+
+    @property
+    def data_and_metadata(self) -> DataAndMetadata.DataAndMetadata:
+        return self.xdata
+
+    def set_data_and_metadata(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
+        self.xdata = data_and_metadata
+
+    def merge(self, data_item: DataItem.DataItem) -> None:
+        """Apply the collected results to the data item. Must be called on the main thread."""
+        if self.__api_data_item is not None:
+            if (self.__data_item_clone.data_modified or datetime.datetime.min) > self.__data_item_clone_data_modified:
+                data_item.set_xdata(self.__api_data_item.data_and_metadata)
+            self.__data_item_clone_recorder.apply(data_item)
+        elif self.__xdata is not None:
+            data_item.set_xdata(self.__xdata)
+
+
+def _get_computation_object_key(object, include_data_modified: bool=True) -> typing.Any:
+    # describe an object bound to a computation variable for the memoization key. data sources are described by the
+    # data modified time of the data item along with the display and crop graphic properties, which together determine
+    # the source data seen by the computation.
+    if isinstance(object, DataItem.DataSource):
+        data_item = object.data_item
+        display = data_item.displays[0] if len(data_item.displays) > 0 else None
+        graphic = object.graphic
+        data_modified = data_item.data_modified if include_data_modified else None
+        return {"uuid": str(data_item.uuid), "data_modified": data_modified.isoformat() if data_modified else None,
+                "display": display.write_to_dict() if display else None, "graphic": graphic.write_to_dict() if graphic else None}
+    if isinstance(object, Graphics.Graphic):
+        return object.write_to_dict()
+    return None
+
+
+class ComputationChangeTracker:
+    """Track the areas of source data changed since incremental computations last read them.
+
+    For each computed data item, the tracker holds a key for the inputs other than the source data and, for each source
+    data item, the area changed since the computation read it. Updates to the source data must be made through
+    update_data_item for the changed area to be known; other changes are detected by the data modified time and make
+    the whole source changed.
+
+    Data items are tracked from the start of an evaluation so that changes made while the computation runs are included
+    in the next evaluation.
+    """
+
+    class SourceChanges:
+        def __init__(self, data_modified: datetime.datetime, data: numpy.ndarray):
+            self.data_modified = data_modified
+            self.data = data  # the source data read by the computation; only kept if needed to update the result
+            self.sub_area = None  # ((top, left), (height, width)) changed since the computation read the data
+            self.is_full = False  # set when the changed area is not known
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__states = weakref.WeakKeyDictionary()  # maps computed data item to (inputs key, {source data item: changes})
+
+    def update_data_item(self, data_item: DataItem.DataItem, xdata: DataAndMetadata.DataAndMetadata, sub_area) -> None:
+        """Update the data item to xdata, where sub_area is the changed area or None if unknown. Call on main thread."""
+        with self.__lock:
+            changes_list = [source_changes[data_item] for _, source_changes in self.__states.values() if data_item in source_changes]
+            old_xdata = data_item.xdata if changes_list else None
+            data_modified = data_item.data_modified
+            data_item.update_data_and_metadata(xdata, sub_area)
+            same_shape = old_xdata is not None and xdata is not None and old_xdata.data_shape_and_dtype == xdata.data_shape_and_dtype
+            for changes in changes_list:
+                if sub_area is None or not same_shape or changes.data_modified != data_modified:
+                    changes.is_full = True
+                else:
+                    changes.sub_area = DataItem.union_sub_areas(changes.sub_area, sub_area) if changes.sub_area else sub_area
+                    changes.data_modified = data_item.data_modified
+
+    def begin_evaluation(self, data_item: DataItem.DataItem, inputs_key: str, source_data_items: typing.Sequence[DataItem.DataItem], keep_data: bool) -> typing.Tuple[typing.Optional[typing.Mapping[DataItem.DataItem, "ComputationChangeTracker.SourceChanges"]], typing.Mapping[DataItem.DataItem, numpy.ndarray]]:
+        """Start tracking the sources for an evaluation of the computation of data_item.
+
+        Return the changes since the previous evaluation, or None if they are not known, and the current source data.
+        """
+        with self.__lock:
+            state = self.__states.pop(data_item, None)
+            previous_source_changes = None
+            if state and state[0] == inputs_key and set(state[1].keys()) == set(source_data_items):
+                previous_source_changes = state[1]
+                for source_data_item, changes in previous_source_changes.items():
+                    if changes.is_full or changes.data_modified != source_data_item.data_modified:
+                        previous_source_changes = None
+                        break
+            source_changes = dict()
+            current_data = dict()
+            for source_data_item in source_data_items:
+                current_data[source_data_item] = source_data_item.data
+                source_changes[source_data_item] = ComputationChangeTracker.SourceChanges(source_data_item.data_modified, current_data[source_data_item] if keep_data else None)
+            self.__states[data_item] = inputs_key, source_changes
+            return previous_source_changes, current_data
+
+    def end_full_evaluation(self, data_item: DataItem.DataItem) -> None:
+        """Finish a full evaluation, which may have read source data changed after the evaluation started."""
+        with self.__lock:
+            state = self.__states.get(data_item)
+            for changes in state[1].values() if state else list():
+                if changes.data is not None and changes.sub_area is not None:
+                    changes.is_full = True
+
+    def discard(self, data_item: DataItem.DataItem) -> None:
+        """Stop tracking the sources of data_item, for instance because its result was not merged."""
+        with self.__lock:
+            self.__states.pop(data_item, None)
+
+
+class _SubAreaDataSource:
+    # stands in for the data source of a pointwise computation evaluated on a sub area of the source data.
+
+    def __init__(self, xdata: DataAndMetadata.DataAndMetadata):
+        self.__xdata = xdata
+
+    @property
+    def data(self) -> numpy.ndarray:
+        return self.__xdata.data
+
+    @property
+    def xdata(self) -> DataAndMetadata.DataAndMetadata:
+        return self.__xdata
+
+    display_xdata = cropped_xdata = cropped_display_xdata = xdata
+
+
+class ComputationProfile:
+    """Collect the timings of the computations of a document model. Threadsafe.
+
+    For each computed data item, records the count of recomputes along with the queue latency (queued to started),
+    the evaluation duration, the recompute duration and the merge duration, in seconds, and the size of the last result.
+    Records are dropped when the data item is freed.
+    """
+
+    class Durations:
+        def __init__(self):
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+            self.last = 0.0
+
+        def add(self, duration: typing.Optional[float]) -> None:
+            if duration is not None:
+                self.count += 1
+                self.total += duration
+                self.max = max(self.max, duration)
+                self.last = duration
+
+        def write_to_dict(self) -> dict:
+            return {"count": self.count, "total": self.total, "max": self.max, "last": self.last,
+                    "mean": self.total / self.count if self.count else 0.0}
+
+    class Record:
+        def __init__(self, processing_id: typing.Optional[str]):
+            self.processing_id = processing_id
+            self.computation_count = 0
+            self.memoized_count = 0
+            self.incremental_count = 0
+            self.cancelled_count = 0
+            self.queue_latency = ComputationProfile.Durations()
+            self.evaluate_duration = ComputationProfile.Durations()
+            self.compute_duration = ComputationProfile.Durations()
+            self.merge_duration = ComputationProfile.Durations()
+            self.result_nbytes = 0
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__records = weakref.WeakKeyDictionary()
+
+    def __get_record(self, data_item: DataItem.DataItem) -> "ComputationProfile.Record":
+        record = self.__records.get(data_item)
+        if record is None:
+            computation = data_item.computation
+            record = ComputationProfile.Record(computation.processing_id if computation else None)
+            self.__records[data_item] = record
+        return record
+
+    def record_computation(self, computation_queue_item: "ComputationQueueItem") -> None:
+        with self.__lock:
+            record = self.__get_record(computation_queue_item.data_item)
+            record.computation_count += 1
+            record.memoized_count += 1 if computation_queue_item.memoized else 0
+            record.incremental_count += 1 if computation_queue_item.is_incremental else 0
+            record.cancelled_count += 1 if computation_queue_item.is_cancelled else 0
+            record.queue_latency.add(computation_queue_item.queue_latency)
+            record.evaluate_duration.add(computation_queue_item.evaluate_duration)
+            record.compute_duration.add(computation_queue_item.compute_duration)
+            if computation_queue_item.result_nbytes is not None:
+                record.result_nbytes = computation_queue_item.result_nbytes
+
+    def record_merge(self, data_item: DataItem.DataItem, merge_duration: float) -> None:
+        with self.__lock:
+            self.__get_record(data_item).merge_duration.add(merge_duration)
+
+    def get_records(self) -> typing.List[dict]:
+        """Return a list of dicts describing the computations, most total recompute time first."""
+        with self.__lock:
+            records = list(self.__records.items())
+            results = list()
+            for data_item, record in records:
+                results.append({"data_item_uuid": str(data_item.uuid), "title": data_item.title, "processing_id": record.processing_id,
+                                "computation_count": record.computation_count, "memoized_count": record.memoized_count,
+                                "incremental_count": record.incremental_count, "cancelled_count": record.cancelled_count,
+                                "queue_latency": record.queue_latency.write_to_dict(),
+                                "evaluate_duration": record.evaluate_duration.write_to_dict(),
+                                "compute_duration": record.compute_duration.write_to_dict(),
+                                "merge_duration": record.merge_duration.write_to_dict(),
+                                "result_nbytes": record.result_nbytes})
+        return sorted(results, key=lambda result: result["compute_duration"]["total"], reverse=True)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__records.clear()
+
+
 class ComputationQueueItem:
-    def __init__(self, data_item):
+    """A request to recompute the computation of a data item.
+
+    If storage_cache is passed, the computation is memoized: the key of the inputs of the result held by the data item
+    is recorded in the storage cache and evaluation is skipped when the inputs have the same key.
+
+    If process_pool is passed, the computation is evaluated in a worker process.
+
+    If change_tracker is passed, the computation is updated only over the changed area of its sources when possible. The
+    incremental kind describes how the result depends on the sources:
+        * pointwise: the result has the shape of the sources and each element depends only on the same source elements
+        * sum: the sum over the first datum dimension of a single source
+        * mask-sum: the sum of a 3d single source over a mask made by a graphic
+    """
+
+    memo_cache_key = "computation_memo"
+
+    def __init__(self, data_item, storage_cache=None, process_pool=None, change_tracker=None, incremental: str=None, profile: ComputationProfile=None):
         self.data_item = data_item
+        self.storage_cache = storage_cache
+        self.process_pool = process_pool
+        self.change_tracker = change_tracker
+        self.incremental = incremental
+        self.profile = profile
         self.valid = True
+        self.memoized = False  # set when the evaluation was skipped because the result is already in the data item
+        self.is_incremental = False  # set when the result was updated only over the changed area of the sources
+        # set when the result is no longer wanted; passed to the computation so it can stop early.
+        self.cancel_event = threading.Event()
+        # perf_counter times used to report queue latency and compute duration
+        self.queued_time = time.perf_counter()
+        self.started_time = None
+        self.finished_time = None
+        self.evaluate_duration = None  # the time spent evaluating, excluding throttling; None if not evaluated
+        self.result_nbytes = None  # the size of the result data; None if not evaluated
+
+    def cancel(self) -> None:
+        """Abandon this item; its result will not be merged. Threadsafe."""
+        self.valid = False
+        self.cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def queue_latency(self) -> typing.Optional[float]:
+        """Return the time from queueing to the start of the recompute, in seconds."""
+        return self.started_time - self.queued_time if self.started_time is not None else None
+
+    @property
+    def compute_duration(self) -> typing.Optional[float]:
+        """Return the duration of the recompute, in seconds."""
+        return self.finished_time - self.started_time if self.finished_time is not None and self.started_time is not None else None
+
+    def __get_memo_key(self, computation) -> typing.Optional[str]:
+        try:
+            return computation.get_memoization_key(_get_computation_object_key)
+        except Exception as e:
+            # the inputs may be changing on another thread; evaluate normally in that case.
+            return None
+
+    def __get_memo_value(self, data_item, memo_key: str) -> typing.Tuple[str, typing.Optional[str]]:
+        data_modified = data_item.data_modified
+        return memo_key, data_modified.isoformat() if data_modified else None
+
+    def __evaluate_incremental(self, api, target, computation) -> bool:
+        # update the previous result over the area of the sources changed since the previous evaluation. returns whether
+        # the result was updated; if not, the computation must be evaluated fully. also starts tracking the changes to
+        # the sources for the next evaluation.
+        data_item = self.data_item
+        values = computation.get_variable_values()
+        data_sources = {name: value for name, value in values.items() if isinstance(value, DataItem.DataSource)}
+        try:
+            inputs_key = computation.get_memoization_key(functools.partial(_get_computation_object_key, include_data_modified=False))
+        except Exception as e:
+            inputs_key = None
+        if not inputs_key or not data_sources:
+            self.change_tracker.discard(data_item)
+            return False
+        source_data_items = [data_source.data_item for data_source in data_sources.values()]
+        previous_source_changes, current_data = self.change_tracker.begin_evaluation(data_item, inputs_key, source_data_items, self.incremental != "pointwise")
+        sub_areas = [changes.sub_area for changes in previous_source_changes.values() if changes.sub_area] if previous_source_changes else list()
+        result_xdata = data_item.xdata
+        if not sub_areas or result_xdata is None or any(data_source.graphic for data_source in data_sources.values()):
+            return False
+        sub_area = functools.reduce(DataItem.union_sub_areas, sub_areas)
+        slices = slice(sub_area[0][0], sub_area[0][0] + sub_area[1][0]), slice(sub_area[0][1], sub_area[0][1] + sub_area[1][1])
+        result_data = result_xdata.data
+        source_xdatas = [source_data_item.xdata for source_data_item in source_data_items]
+        if any(numpy.iscomplexobj(current_data[source_data_item]) or Image.is_data_rgb_type(current_data[source_data_item]) or source_xdata is None or source_xdata.is_sequence
+               for source_data_item, source_xdata in zip(source_data_items, source_xdatas)):
+            return False
+        new_data = None
+        if self.incremental == "pointwise":
+            if all(current_data[source_data_item].shape == result_data.shape and source_xdata.datum_dimension_count == 2 and source_xdata.collection_dimension_count == 0
+                   for source_data_item, source_xdata in zip(source_data_items, source_xdatas)):
+                variable_overrides = dict()
+                for (name, data_source), source_xdata in zip(data_sources.items(), source_xdatas):
+                    sub_area_xdata = DataAndMetadata.new_data_and_metadata(current_data[data_source.data_item][slices], source_xdata.intensity_calibration, source_xdata.dimensional_calibrations)
+                    variable_overrides[name] = _SubAreaDataSource(sub_area_xdata)
+                sub_area_target = ComputationTarget(api, data_item)
+                computation.needs_update = True
+                error_text = computation.evaluate_with_target(api, sub_area_target, self.cancel_event, variable_overrides=variable_overrides)
+                sub_area_xdata = sub_area_target.xdata if not error_text else None
+                if sub_area_xdata is not None and sub_area_xdata.data_shape_and_dtype == (tuple(sub_area[1]), result_data.dtype):
+                    new_data = numpy.copy(result_data)
+                    new_data[slices] = sub_area_xdata.data
+        elif self.incremental in ("sum", "mask-sum") and len(source_data_items) == 1:
+            source_data_item, source_xdata = source_data_items[0], source_xdatas[0]
+            data, previous_data = current_data[source_data_item], previous_source_changes[source_data_item].data
+            if self.incremental == "sum" and source_xdata.collection_dimension_count == 2 and source_xdata.datum_dimension_count == 1:
+                # the sum is over the datum dimension, so each element of the result depends on one position
+                sub_area_sum = numpy.sum(data[slices], 2)
+                if result_data.shape == data.shape[0:2] and sub_area_sum.dtype == result_data.dtype:
+                    new_data = numpy.copy(result_data)
+                    new_data[slices] = sub_area_sum
+            elif self.incremental == "sum" and source_xdata.collection_dimension_count == 0 and source_xdata.datum_dimension_count == 2:
+                if result_data.shape == data.shape[1:2]:
+                    delta = data[slices].astype(result_data.dtype) - previous_data[slices].astype(result_data.dtype)
+                    new_data = numpy.copy(result_data)
+                    new_data[slices[1]] += numpy.sum(delta, 0)
+            elif self.incremental == "mask-sum" and source_xdata.collection_dimension_count == 2 and source_xdata.datum_dimension_count == 1:
+                graphics = [value for value in values.values() if isinstance(value, Graphics.Graphic)]
+                if len(graphics) == 1 and result_data.shape == data.shape[2:3]:
+                    mask = graphics[0].get_mask(data.shape[0:2])[slices].astype(bool)
+                    delta = data[slices][mask].astype(result_data.dtype) - previous_data[slices][mask].astype(result_data.dtype)
+                    new_data = result_data + numpy.sum(delta, 0)
+            computation.needs_update = False
+            computation.last_evaluate_data_time = time.perf_counter()
+        if new_data is None:
+            computation.needs_update = True
+            return False
+        target.xdata = DataAndMetadata.new_data_and_metadata(new_data, result_xdata.intensity_calibration, result_xdata.dimensional_calibrations,
+                                                             result_xdata.metadata, result_xdata.timestamp, result_xdata.data_descriptor)
+        self.is_incremental = True
+        return True
 
     def recompute(self) -> typing.Sequence[typing.Callable[[], None]]:
         # evaluate the computation in a thread safe manner
@@ -1116,25 +1833,54 @@ class ComputationQueueItem:
         if computation:
             try:
                 api = PlugInManager.api_broker_fn("~1.0", None)
-                data_item_clone = data_item.clone()
-                data_item_data_modified = data_item.data_modified or datetime.datetime.min
-                data_item_clone_recorder = Recorder.Recorder(data_item_clone)
-                api_data_item = api._new_api_object(data_item_clone)
+                target = ComputationTarget(api, data_item)
                 error_text = computation.error_text
+                memo_key = None
                 if computation.needs_update:
-                    error_text = computation.evaluate_with_target(api, api_data_item)
-                    throttle_time = max(DocumentModel.computation_min_period - (time.perf_counter() - computation.last_evaluate_data_time), 0)
-                    time.sleep(max(throttle_time, 0.0))
-                if self.valid:  # TODO: race condition for 'valid'
-                    def data_item_merge(data_item, data_item_clone, data_item_clone_recorder):
-                        data_item_data_clone_modified = data_item_clone.data_modified or datetime.datetime.min
+                    memo_key = self.__get_memo_key(computation) if self.storage_cache else None
+                    memo_value = self.storage_cache.get_cached_value(data_item, self.memo_cache_key) if memo_key else None
+                    if memo_value is not None and tuple(memo_value) == self.__get_memo_value(data_item, memo_key):
+                        computation.needs_update = False
+                        error_text = None
+                        self.memoized = True
+                        if self.change_tracker:
+                            self.change_tracker.discard(data_item)
+                    else:
+                        evaluate_start_time = time.perf_counter()
+                        if self.change_tracker and self.__evaluate_incremental(api, target, computation):
+                            error_text = None
+                        else:
+                            error_text = computation.evaluate_with_target(api, target, self.cancel_event, self.process_pool)
+                            if self.change_tracker:
+                                self.change_tracker.end_full_evaluation(data_item)
+                        self.evaluate_duration = time.perf_counter() - evaluate_start_time
+                        result_data = target.data if not error_text else None
+                        self.result_nbytes = result_data.nbytes if result_data is not None else 0
+                        throttle_time = max(DocumentModel.computation_min_period - (time.perf_counter() - computation.last_evaluate_data_time), 0)
+                        self.cancel_event.wait(max(throttle_time, 0.0))
+                if self.is_cancelled:
+                    # the evaluation above may have consumed an update that arrived after this item was started;
+                    # make sure the item superseding this one evaluates again.
+                    computation.needs_update = True
+                if self.change_tracker and (not self.valid or error_text):
+                    # the previous result will not be replaced by this one, so the tracked changes no longer apply
+                    self.change_tracker.discard(data_item)
+                if self.valid:
+                    def data_item_merge(data_item, target):
+                        if not self.valid:
+                            if self.change_tracker:
+                                self.change_tracker.discard(data_item)
+                            return  # superseded while waiting for the main thread
+                        merge_start_time = time.perf_counter()
                         with data_item.data_item_changes(), data_item.data_source_changes():
-                            if data_item_data_clone_modified > data_item_data_modified:
-                                data_item.set_xdata(api_data_item.data_and_metadata)
-                            data_item_clone_recorder.apply(data_item)
+                            target.merge(data_item)
                             if computation.error_text != error_text:
                                 computation.error_text = error_text
-                    pending_data_item_merges.append(functools.partial(data_item_merge, data_item, data_item_clone, data_item_clone_recorder))
+                        if self.profile:
+                            self.profile.record_merge(data_item, time.perf_counter() - merge_start_time)
+                        if memo_key and not self.memoized and error_text is None:
+                            self.storage_cache.set_cached_value(data_item, self.memo_cache_key, self.__get_memo_value(data_item, memo_key))
+                    pending_data_item_merges.append(functools.partial(data_item_merge, data_item, target))
             except Exception as e:
                 import traceback
                 traceback.print_exc()
@@ -1142,6 +1888,50 @@ class ComputationQueueItem:
         return pending_data_item_merges
 
 
+class DataChannelUpdatePolicy:
+    """Describe how the updates of hardware source data channels are passed to their data items for display.
+
+    Updates are queued on the acquisition thread and displayed when the main thread next performs the data item
+    updates. The mode is one of:
+        latest: display the latest update; a queued frame replaced before being displayed is dropped. The default.
+        every_nth: queue only every nth frame (and its partial updates) and drop the others, otherwise like latest.
+        block: block the acquisition thread until the previous update of the data item has been displayed, waiting at
+            most timeout seconds, otherwise like latest. Never blocks the main thread.
+    """
+
+    modes = ("latest", "every_nth", "block")
+
+    def __init__(self, mode: str="latest", *, n: int=1, timeout: float=1.0):
+        if mode not in DataChannelUpdatePolicy.modes:
+            raise ValueError("Unknown data channel update policy mode: {}".format(mode))
+        if n < 1:
+            raise ValueError("Data channel update policy n must be positive.")
+        self.mode = mode
+        self.n = n
+        self.timeout = timeout
+
+
+class DataChannelUpdateCounts:
+    """Count the frames of a data channel produced, displayed and dropped before display.
+
+    Frames are counted when complete; partial updates are not counted. Modified with the pending updates lock.
+    """
+
+    def __init__(self, hardware_source_id: str, channel_id: typing.Optional[str]):
+        self.hardware_source_id = hardware_source_id
+        self.channel_id = channel_id
+        self.produced_count = 0
+        self.displayed_count = 0
+        self.dropped_count = 0
+        self.frame_index = 0  # the index of the frame to which the next update belongs
+
+    def write_to_dict(self) -> dict:
+        return {"hardware_source_id": self.hardware_source_id, "channel_id": self.channel_id,
+                "produced_count": self.produced_count, "displayed_count": self.displayed_count,
+                "dropped_count": self.dropped_count,
+                "pending_count": self.produced_count - self.displayed_count - self.dropped_count}
+
+
 class AutoMigration:
     def __init__(self, paths: typing.List[str], log_copying: bool=True):
         self.paths = paths
@@ -1153,9 +1943,17 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
     """The document model manages storage and dependencies between data items and other objects.
 
     The document model provides a dispatcher object which will run tasks in a thread pool.
+
+    Computations run on computation_thread_count threads. Independent computations run in parallel; a computation does
+    not start while a computation it depends on (directly or indirectly) is queued or running.
+
+    If computation_process_count is greater than zero, processing marked as isolatable is evaluated in that many worker
+    processes instead of on the computation threads.
     """
 
     computation_min_period = 0.0
+    computation_thread_count = 1
+    computation_process_count = 0  # worker processes for isolatable computations; 0 evaluates them on the threads
 
     def __init__(self, library_storage=None, persistent_storage_systems=None, storage_cache=None, log_migrations=True, ignore_older_files=False, auto_migrations=None):
         super(DocumentModel, self).__init__()
@@ -1169,9 +1967,20 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         self.dependency_removed_event = Event.Event()
 
         self.computation_updated_event = Event.Event()
+        self.computation_finished_event = Event.Event()  # fired with the computation queue item, from the computation thread
 
         self.__thread_pool = ThreadPool.ThreadPool()
         self.__computation_thread_pool = ThreadPool.ThreadPool()
+        self.__computation_process_pool = None
+        self.__computation_change_tracker = ComputationChangeTracker()
+        self.__computation_profile = ComputationProfile()
+        # maps data items to the (event loop, future) pairs waiting for their next computation
+        self.__computation_waiters = dict()
+        # while make_data_items_with_computation runs, maps new data items to their computation queue items
+        self.__computation_batch = None
+        self.__computation_batch_excluded_data_items = set()
+        if self.computation_process_count > 0 and ComputationProcessPool.is_available():
+            self.__computation_process_pool = ComputationProcessPool.ComputationProcessPool(self.computation_process_count)
         self.persistent_object_context = PersistentDataItemContext(persistent_storage_systems, ignore_older_files, log_migrations)
         self.__library_storage = library_storage if library_storage else FilePersistentStorage()
         self.persistent_object_context._set_persistent_storage_for_object(self, self.__library_storage)
@@ -1189,10 +1998,10 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         self.__uuid_to_data_item = dict()
         self.__computation_changed_listeners = dict()
         self.__data_item_references = dict()
-        self.__recompute_lock = threading.RLock()
         self.__computation_queue_lock = threading.RLock()
         self.__computation_pending_queue = list()  # type: typing.List[ComputationQueueItem]
         self.__computation_active_items = list()  # type: typing.List[ComputationQueueItem]
+        self.__computation_deferred_count = 0  # recompute calls that found no runnable item; dispatched again when an item finishes
         self.define_type("library")
         self.define_relationship("data_groups", DataGroup.data_group_factory)
         self.define_relationship("workspaces", WorkspaceLayout.factory)  # TODO: file format. Rename workspaces to workspace_layouts.
@@ -1215,8 +2024,11 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
 
         self.__hardware_source_call_soon_event_listeners = dict()
 
-        self.__pending_data_item_updates_lock = threading.RLock()
-        self.__pending_data_item_updates = list()
+        self.__pending_data_item_updates_lock = threading.Condition(threading.RLock())
+        self.__pending_data_item_updates = dict()  # maps data item to the data channel counts and whether the update is a frame
+        self.__skipped_data_items = set()  # data items whose updates were skipped; their next update changes all data
+        self.__data_channel_update_policy = DataChannelUpdatePolicy()
+        self.__data_channel_update_counts = dict()  # maps (hardware source id, channel id) to data channel update counts
 
         self.__pending_data_item_merges_lock = threading.RLock()
         self.__pending_data_item_merges = list()
@@ -1239,7 +2051,10 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         for auto_migration in self.__auto_migrations:
             file_persistent_storage_system = FileStorageSystem(auto_migration.paths)
             persistent_object_context = PersistentDataItemContext([file_persistent_storage_system], ignore_older_files=False, log_migrations=False, log_copying=auto_migration.log_copying)
-            data_items = persistent_object_context.read_data_items(target_document=self, deletions=deletions, utilized_deletions=utilized_deletions)
+            try:
+                data_items = persistent_object_context.read_data_items(target_document=self, deletions=deletions, utilized_deletions=utilized_deletions)
+            finally:
+                persistent_object_context.close()
             self.__finish_read_partial(data_items)
         self.__finish_read(utilized_deletions)
 
@@ -1292,7 +2107,7 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         with self.__computation_queue_lock:
             self.__computation_pending_queue.clear()
             for computation_queue_item in self.__computation_active_items:
-                computation_queue_item.valid = False
+                computation_queue_item.cancel()
             self.__computation_active_items.clear()
 
         # close hardware source related stuff
@@ -1326,9 +2141,18 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
 
         self.__thread_pool.close()
         self.__computation_thread_pool.close()
+        if self.__computation_process_pool:
+            self.__computation_process_pool.close()
+        with self.__computation_queue_lock:
+            computation_waiters = self.__computation_waiters
+            self.__computation_waiters = dict()
+        for event_loop, future in itertools.chain.from_iterable(computation_waiters.values()):
+            if not event_loop.is_closed():
+                event_loop.call_soon_threadsafe(future.cancel)
         for data_item in self.data_items:
             data_item.about_to_be_removed()
             data_item.close()
+        self.persistent_object_context.close()
         self.storage_cache.close()
 
     def __call_soon(self, fn):
@@ -1432,7 +2256,9 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         with self.__computation_queue_lock:
             for computation_queue_item in self.__computation_pending_queue + self.__computation_active_items:
                 if computation_queue_item.data_item is data_item:
-                    computation_queue_item.valid = False
+                    computation_queue_item.cancel()
+        self.__cancel_computation_waiters(data_item)
+        self.__discard_data_item_updates([data_item])
         # remove data item from any selections
         self.data_item_will_be_removed_event.fire(data_item)
         # remove the data item from any groups
@@ -1566,10 +2392,27 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
 
     def __computation_needs_update(self, data_item):
         with self.__computation_queue_lock:
+            # a running computation for this data item has stale inputs now; abandon it so only the newest request
+            # is merged. live data items are exempt so they keep updating while their sources change continuously.
+            if not data_item.is_live:
+                for computation_queue_item in self.__computation_active_items:
+                    if computation_queue_item.data_item == data_item:
+                        computation_queue_item.cancel()
             for computation_queue_item in self.__computation_pending_queue:
                 if computation_queue_item.data_item == data_item:
                     return
-            computation_queue_item = ComputationQueueItem(data_item)
+            computation = data_item.computation
+            processing_description = self._processing_descriptions.get(computation.processing_id) if computation else None
+            memoize = processing_description is not None and processing_description.get("memoize", False)
+            isolatable = processing_description is not None and processing_description.get("isolatable", False)
+            process_pool = self.__computation_process_pool if isolatable else None
+            incremental = processing_description.get("incremental") if processing_description is not None else None
+            change_tracker = self.__computation_change_tracker if incremental else None
+            computation_queue_item = ComputationQueueItem(data_item, self.storage_cache if memoize else None, process_pool, change_tracker, incremental, self.__computation_profile)
+            if self.__computation_batch is not None and data_item not in self.__computation_batch_excluded_data_items:
+                # evaluated by make_data_items_with_computation instead of the queue
+                self.__computation_batch[data_item] = computation_queue_item
+                return
             self.__computation_pending_queue.append(computation_queue_item)
         self.dispatch_task2(self.__recompute)
 
@@ -1889,44 +2732,84 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
 
     def start_dispatcher(self):
         self.__thread_pool.start()
-        self.__computation_thread_pool.start(1)
+        self.__computation_thread_pool.start(self.computation_thread_count)
+
+    @property
+    def computation_profile(self) -> ComputationProfile:
+        """Return the timings of the computations in this document model."""
+        return self.__computation_profile
+
+    @property
+    def computation_queue_depth(self) -> int:
+        """Return the number of computations waiting to run."""
+        with self.__computation_queue_lock:
+            return len(self.__computation_pending_queue)
+
+    @property
+    def computation_active_count(self) -> int:
+        """Return the number of computations running."""
+        with self.__computation_queue_lock:
+            return len(self.__computation_active_items)
+
+    def __get_upstream_data_items(self, data_item: DataItem.DataItem) -> typing.Set[DataItem.DataItem]:
+        # return the data items that data_item depends on, directly or indirectly.
+        upstream_data_items = set()
+        with self.__dependency_tree_lock:
+            data_items = [data_item]
+            while data_items:
+                for source_item in self.__dependency_tree_target_to_source_map.get(weakref.ref(data_items.pop()), list()):
+                    if isinstance(source_item, DataItem.DataItem) and source_item not in upstream_data_items:
+                        upstream_data_items.add(source_item)
+                        data_items.append(source_item)
+        return upstream_data_items
 
     def __recompute(self):
+        # there is one __recompute for each item put into the pending queue. each call runs the first item that is not
+        # already running and does not depend on a queued or running item. if no item can run, the call is deferred
+        # until a running item finishes.
+        with self.__computation_queue_lock:
+            pending_data_items = [computation_queue_item.data_item for computation_queue_item in self.__computation_pending_queue]
+        upstream_data_items_map = {data_item: self.__get_upstream_data_items(data_item) for data_item in pending_data_items}
         computation_queue_item = None
-        skipped_pending = False
         with self.__computation_queue_lock:
-            # loop through the items in the pending queue
+            active_data_items = {active_computation_item.data_item for active_computation_item in self.__computation_active_items}
+            busy_data_items = active_data_items.union(pending_computation_item.data_item for pending_computation_item in self.__computation_pending_queue)
             for i, _computation_queue_item in enumerate(self.__computation_pending_queue):
-                # first check to see if the item in the pending queue matches an item in the active list
-                match = None
-                for active_computation_item in self.__computation_active_items:
-                    if _computation_queue_item.data_item == active_computation_item.data_item:
-                        match = _computation_queue_item
-                        break
-                # if it doesn't match, move it to active, and break out of this loop
-                # other items in the queue will be serviced by future calls to __recompute.
-                # there is one __recompute for each item put into the pending queue.
-                if not match:
-                    computation_queue_item = self.__computation_pending_queue.pop(i)
-                    self.__computation_active_items.append(computation_queue_item)
-                    break
-                # otherwise, mark it as skipped so that __recompute is called again.
-                # so that it eventually gets serviced.
-                else:
-                    skipped_pending = True
+                data_item = _computation_queue_item.data_item
+                if data_item in active_data_items:
+                    continue
+                upstream_data_items = upstream_data_items_map.get(data_item)
+                if upstream_data_items is None:
+                    continue  # queued since the upstream items were gathered; a later call will handle it
+                # a cycle would never run, so ignore dependencies in that case
+                if data_item not in upstream_data_items and not upstream_data_items.isdisjoint(busy_data_items):
+                    continue
+                computation_queue_item = self.__computation_pending_queue.pop(i)
+                self.__computation_active_items.append(computation_queue_item)
+                break
+            else:
+                if self.__computation_pending_queue:
+                    self.__computation_deferred_count += 1
 
         if computation_queue_item:
             # an item was put into the active queue, so compute it, then merge
+            computation_queue_item.started_time = time.perf_counter()
             pending_data_item_merges = computation_queue_item.recompute()
+            computation_queue_item.finished_time = time.perf_counter()
+            self.__computation_profile.record_computation(computation_queue_item)
             with self.__pending_data_item_merges_lock:
                 self.__pending_data_item_merges.extend(pending_data_item_merges)
             self.__call_soon(self.perform_data_item_merges)
-            # it is now merged, so remove it from the active queue
+            # it is now merged, so remove it from the active queue and retry the deferred calls
             with self.__computation_queue_lock:
-                self.__computation_active_items.remove(computation_queue_item)
-
-        if skipped_pending:
-            self.dispatch_task2(self.__recompute)
+                if computation_queue_item in self.__computation_active_items:
+                    self.__computation_active_items.remove(computation_queue_item)
+                deferred_count = self.__computation_deferred_count
+                self.__computation_deferred_count = 0
+            self.__notify_computation_waiters(computation_queue_item)
+            for _ in range(deferred_count):
+                self.dispatch_task2(self.__recompute)
+            self.computation_finished_event.fire(computation_queue_item)
 
     def perform_data_item_merges(self):
         with self.__pending_data_item_merges_lock:
@@ -1935,14 +2818,72 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         for pending_data_item_merge in pending_data_item_merges:
             pending_data_item_merge()
 
+    def get_computation_future(self, event_loop: asyncio.AbstractEventLoop, data_item: DataItem.DataItem) -> asyncio.Future:
+        """Return a future for the next completed computation of data_item, with data_item as its result.
+
+        The result of the computation is merged into data_item before the future is done; check the error text of the
+        computation for failures. If the computation is superseded by a newer one, the future waits for the newer one.
+        If the computation of data_item is not queued, running or in need of an update, the future is done once any
+        pending result is merged. The future is cancelled if the document model is closed first.
+
+        The future belongs to event_loop, which must run on the main thread. Threadsafe.
+        """
+        future = event_loop.create_future()
+        with self.__computation_queue_lock:
+            if self.__is_computation_queued(data_item):
+                self.__computation_waiters.setdefault(data_item, list()).append((event_loop, future))
+                return future
+        event_loop.call_soon_threadsafe(functools.partial(self.__finish_computation_waiter, None, data_item, event_loop, future))
+        return future
+
+    def __is_computation_queued(self, data_item: DataItem.DataItem) -> bool:
+        # whether a computation of data_item will finish and notify its waiters. a computation needing an update with
+        # nothing queued (unbound inputs, for instance) never finishes, so it is not waited for. call with lock held.
+        if self.__computation_batch is not None and data_item in self.__computation_batch:
+            return True
+        return any(computation_queue_item.data_item == data_item and computation_queue_item.valid for computation_queue_item in itertools.chain(self.__computation_pending_queue, self.__computation_active_items))
+
+    def __notify_computation_waiters(self, computation_queue_item: ComputationQueueItem) -> None:
+        data_item = computation_queue_item.data_item
+        with self.__computation_queue_lock:
+            computation_waiters = self.__computation_waiters.pop(data_item, list()) if computation_queue_item.valid else list()
+        for event_loop, future in computation_waiters:
+            event_loop.call_soon_threadsafe(functools.partial(self.__finish_computation_waiter, computation_queue_item, data_item, event_loop, future))
+
+    def __cancel_computation_waiters(self, data_item: DataItem.DataItem) -> None:
+        # the computation of data_item will not finish, because the data item or its computation was removed.
+        with self.__computation_queue_lock:
+            computation_waiters = self.__computation_waiters.pop(data_item, list())
+        for event_loop, future in computation_waiters:
+            if not event_loop.is_closed():
+                event_loop.call_soon_threadsafe(future.cancel)
+
+    def __finish_computation_waiter(self, computation_queue_item: typing.Optional[ComputationQueueItem], data_item: DataItem.DataItem, event_loop: asyncio.AbstractEventLoop, future: asyncio.Future) -> None:
+        # called on the event loop after the computation finishes. merge here since the main thread may not have
+        # serviced the call soon yet; wait for the next computation instead if this one was superseded meanwhile.
+        if future.done():
+            return
+        self.perform_data_item_merges()
+        if computation_queue_item is None or computation_queue_item.valid:
+            future.set_result(data_item)
+        else:
+            with self.__computation_queue_lock:
+                if self.__is_computation_queued(data_item):
+                    self.__computation_waiters.setdefault(data_item, list()).append((event_loop, future))
+                    return
+            # superseded by a removal rather than a newer computation
+            future.cancel()
+
+    async def wait_for_computations(self, event_loop: asyncio.AbstractEventLoop, data_items: typing.Sequence[DataItem.DataItem]) -> typing.List[DataItem.DataItem]:
+        """Wait for the next completed computations of the data items, which are computed concurrently.
+
+        See get_computation_future.
+        """
+        return list(await asyncio.gather(*[self.get_computation_future(event_loop, data_item) for data_item in data_items]))
+
     async def recompute_immediate(self, event_loop: asyncio.AbstractEventLoop, data_item: DataItem.DataItem) -> None:
-        computation = data_item.computation
-        if computation:
-            def sync_recompute():
-                with self.__recompute_lock:
-                    pass
-            await event_loop.run_in_executor(None, sync_recompute)
-            self.perform_data_item_merges()
+        if data_item.computation:
+            await self.get_computation_future(event_loop, data_item)
 
     def get_object_specifier(self, object):
         if isinstance(object, DataItem.DataItem):
@@ -2100,36 +3041,98 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
                     self.__pending_starts = 0
                     self.data_item_changed_event.fire()
 
-    def __queue_data_item_update(self, data_item, data_and_metadata):
-        # put the data update to data_item into the pending_data_item_updates list.
-        # the pending_data_item_updates will be serviced when the main thread calls
-        # perform_data_item_updates.
+    def __queue_data_item_update(self, data_item, data_and_metadata, sub_area=None, data_channel_update_counts=None, is_frame=True):
+        # put the data update to data_item into the pending_data_item_updates dict. the pending_data_item_updates will
+        # be serviced when the main thread calls perform_data_item_updates. sub_area is the area changed from the
+        # previous data, if known. for data channels, the update is counted in data_channel_update_counts and the
+        # data channel update policy is applied; is_frame tells whether the update completes a frame.
         if data_item:
+            policy = self.__data_channel_update_policy
             with self.__pending_data_item_updates_lock:
-                found = False
-                pending_data_item_updates = list()
-                for data_item_ in self.__pending_data_item_updates:
-                    # does it match? if so and not yet found, put the new data into the matching
-                    # slot; but then filter the rest of the matches.
-                    if data_item_ == data_item:
-                        if not found:
-                            data_item.set_pending_xdata(data_and_metadata)
-                            pending_data_item_updates.append(data_item)
-                            found = True
-                    else:
-                        pending_data_item_updates.append(data_item_)
-                if not found:  # if not added yet, add it
-                    data_item.set_pending_xdata(data_and_metadata)
-                    pending_data_item_updates.append(data_item)
-                self.__pending_data_item_updates = pending_data_item_updates
+                if data_channel_update_counts:
+                    frame_index = data_channel_update_counts.frame_index
+                    if is_frame:
+                        data_channel_update_counts.produced_count += 1
+                        data_channel_update_counts.frame_index += 1
+                    if policy.mode == "every_nth" and frame_index % policy.n != 0:
+                        if is_frame:
+                            data_channel_update_counts.dropped_count += 1
+                        self.__skipped_data_items.add(data_item)
+                        return
+                    if policy.mode == "block" and threading.current_thread() != threading.main_thread():
+                        self.__pending_data_item_updates_lock.wait_for(lambda: data_item not in self.__pending_data_item_updates, policy.timeout)
+                if data_item in self.__skipped_data_items:
+                    # the skipped updates changed areas not covered by this update
+                    self.__skipped_data_items.discard(data_item)
+                    sub_area = None
+                pending_data_item_update = self.__pending_data_item_updates.get(data_item)
+                if pending_data_item_update:
+                    pending_data_channel_update_counts, pending_is_frame = pending_data_item_update
+                    if pending_data_channel_update_counts and pending_is_frame:
+                        pending_data_channel_update_counts.dropped_count += 1
+                data_item.set_pending_xdata(data_and_metadata, sub_area)
+                self.__pending_data_item_updates[data_item] = data_channel_update_counts, is_frame
 
     def perform_data_item_updates(self):
         assert threading.current_thread() == threading.main_thread()
         with self.__pending_data_item_updates_lock:
             pending_data_item_updates = self.__pending_data_item_updates
-            self.__pending_data_item_updates = list()
+            self.__pending_data_item_updates = dict()
+            for data_channel_update_counts, is_frame in pending_data_item_updates.values():
+                if data_channel_update_counts and is_frame:
+                    data_channel_update_counts.displayed_count += 1
         for data_item in pending_data_item_updates:
-            data_item.update_to_pending_xdata()
+            pending_xdata, pending_sub_area = data_item.take_pending_xdata()
+            if pending_xdata:
+                self.update_data_item_xdata(data_item, pending_xdata, pending_sub_area)
+        if pending_data_item_updates:
+            with self.__pending_data_item_updates_lock:
+                self.__pending_data_item_updates_lock.notify_all()
+
+    @property
+    def data_channel_update_policy(self) -> DataChannelUpdatePolicy:
+        """Return the policy for passing data channel updates to their data items for display."""
+        return self.__data_channel_update_policy
+
+    @data_channel_update_policy.setter
+    def data_channel_update_policy(self, policy: DataChannelUpdatePolicy) -> None:
+        """Set the policy for passing data channel updates to their data items for display. Threadsafe."""
+        with self.__pending_data_item_updates_lock:
+            self.__data_channel_update_policy = policy
+            self.__pending_data_item_updates_lock.notify_all()
+
+    def get_data_channel_update_counts(self) -> typing.List[dict]:
+        """Return a list of dicts counting the frames of each data channel produced, displayed and dropped.
+
+        Each dict has keys hardware_source_id, channel_id, produced_count, displayed_count, dropped_count and
+        pending_count. Comparing the dropped count here to the frames missed by the hardware source tells whether the
+        display or the acquisition is losing frames.
+        """
+        with self.__pending_data_item_updates_lock:
+            return [data_channel_update_counts.write_to_dict() for data_channel_update_counts in self.__data_channel_update_counts.values()]
+
+    def reset_data_channel_update_counts(self) -> None:
+        """Clear the counts of the frames of the data channels. Threadsafe."""
+        with self.__pending_data_item_updates_lock:
+            self.__data_channel_update_counts = dict()
+            for data_item, pending_data_item_update in self.__pending_data_item_updates.items():
+                self.__pending_data_item_updates[data_item] = None, pending_data_item_update[1]
+
+    def update_data_item_xdata(self, data_item: DataItem.DataItem, data_and_metadata: DataAndMetadata.DataAndMetadata, sub_area=None) -> None:
+        """Update the xdata of data_item, where sub_area ((top, left), (height, width)) is the area changed, if known.
+
+        Computations using data_item may be updated only over the changed area. Call on main thread.
+        """
+        assert threading.current_thread() == threading.main_thread()
+        self.__computation_change_tracker.update_data_item(data_item, data_and_metadata, sub_area)
+
+    def __discard_data_item_updates(self, data_items: typing.Sequence[DataItem.DataItem]) -> None:
+        # forget the pending and skipped updates of data items that will not be updated anymore.
+        with self.__pending_data_item_updates_lock:
+            for data_item in data_items:
+                self.__pending_data_item_updates.pop(data_item, None)
+                self.__skipped_data_items.discard(data_item)
+            self.__pending_data_item_updates_lock.notify_all()
 
     # for testing
     def _get_pending_data_item_updates_count(self):
@@ -2220,7 +3223,13 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
 
     def __data_channel_updated(self, hardware_source, data_channel, data_and_metadata):
         data_item_reference = self.__construct_data_item_reference(hardware_source, data_channel)
-        self.__queue_data_item_update(data_item_reference.data_item, data_and_metadata)
+        key = hardware_source.hardware_source_id, data_channel.channel_id
+        with self.__pending_data_item_updates_lock:
+            data_channel_update_counts = self.__data_channel_update_counts.get(key)
+            if data_channel_update_counts is None:
+                data_channel_update_counts = DataChannelUpdateCounts(hardware_source.hardware_source_id, data_channel.channel_id)
+                self.__data_channel_update_counts[key] = data_channel_update_counts
+        self.__queue_data_item_update(data_item_reference.data_item, data_and_metadata, data_channel.updated_sub_area, data_channel_update_counts, data_channel.state == "complete")
 
     def __data_channel_states_updated(self, hardware_source, data_channels):
         data_item_states = list()
@@ -2272,6 +3281,15 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         self.__data_channel_updated_listeners.pop(hardware_source.hardware_source_id, None)
         self.__data_channel_start_listeners.pop(hardware_source.hardware_source_id, None)
         self.__data_channel_stop_listeners.pop(hardware_source.hardware_source_id, None)
+        data_items = list()
+        for data_channel in hardware_source.data_channels:
+            data_item_reference = self.get_data_item_reference(self.make_data_item_reference_key(hardware_source.hardware_source_id, data_channel.channel_id))
+            if data_item_reference.data_item:
+                data_items.append(data_item_reference.data_item)
+        self.__discard_data_item_updates(data_items)
+        with self.__pending_data_item_updates_lock:
+            for key in [key for key in self.__data_channel_update_counts.keys() if key[0] == hardware_source.hardware_source_id]:
+                del self.__data_channel_update_counts[key]
 
     def get_snapshot_new(self, data_item: DataItem.DataItem) -> DataItem.DataItem:
         assert isinstance(data_item, DataItem.DataItem)
@@ -2293,6 +3311,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         if old_computation:
             computation_changed_listener = self.__computation_changed_listeners.pop(data_item, None)
             if computation_changed_listener: computation_changed_listener.close()
+        if not new_computation:
+            self.__cancel_computation_waiters(data_item)
         if new_computation:
             self.__computation_changed_listeners[data_item] = new_computation.computation_mutated_event.listen(computation_mutated)
         computation_mutated()
@@ -2300,10 +3320,58 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
     def make_data_item_with_computation(self, processing_id: str, inputs: typing.List[typing.Tuple[DataItem.DataItem, Graphics.Graphic]], region_list_map: typing.Mapping[str, typing.List[Graphics.Graphic]]=None) -> DataItem.DataItem:
         return self.__make_computation(processing_id, inputs, region_list_map)
 
-    def __make_computation(self, processing_id: str, inputs: typing.List[typing.Tuple[DataItem.DataItem, Graphics.Graphic]], region_list_map: typing.Mapping[str, typing.List[Graphics.Graphic]]=None) -> DataItem.DataItem:
+    def make_data_items_with_computation(self, processing_id: str, inputs_list: typing.Sequence[typing.List[typing.Tuple[DataItem.DataItem, Graphics.Graphic]]], region_list_maps: typing.Sequence[typing.Mapping[str, typing.List[Graphics.Graphic]]]=None) -> typing.List[DataItem.DataItem]:
+        """Create a data item with computation specified by processing_id for each of the inputs and evaluate them.
+
+        The new computations are evaluated together on computation_thread_count threads rather than through the
+        computation queue, then merged. The new data items are in a transaction until merged so that each is written
+        to storage once with its result.
+
+        Returns a list with the new data item for each inputs, or None where the inputs are not suitable. Call on main
+        thread.
+        """
+        assert threading.current_thread() == threading.main_thread()
+        assert self.__computation_batch is None
+        region_list_maps = region_list_maps or [None] * len(inputs_list)
+        new_data_items = list()
+        with contextlib.ExitStack() as exit_stack:
+            with self.__computation_queue_lock:
+                self.__computation_batch = dict()
+                self.__computation_batch_excluded_data_items = set(self.data_items)
+            try:
+                for inputs, region_list_map in zip(inputs_list, region_list_maps):
+                    new_data_items.append(self.__make_computation(processing_id, inputs, region_list_map, exit_stack))
+            finally:
+                with self.__computation_queue_lock:
+                    computation_queue_items = list(self.__computation_batch.values())
+                    self.__computation_batch = None
+                    self.__computation_batch_excluded_data_items = set()
+            for computation_queue_item in computation_queue_items:
+                exit_stack.enter_context(self.data_item_transaction(computation_queue_item.data_item))
+
+            def recompute(computation_queue_item: ComputationQueueItem) -> typing.Sequence[typing.Callable[[], None]]:
+                computation_queue_item.started_time = time.perf_counter()
+                pending_data_item_merges = computation_queue_item.recompute()
+                computation_queue_item.finished_time = time.perf_counter()
+                self.__computation_profile.record_computation(computation_queue_item)
+                return pending_data_item_merges
+
+            with concurrent.futures.ThreadPoolExecutor(max(self.computation_thread_count, 1)) as executor:
+                pending_data_item_merges_list = list(executor.map(recompute, computation_queue_items))
+            for pending_data_item_merges in pending_data_item_merges_list:
+                for pending_data_item_merge in pending_data_item_merges:
+                    pending_data_item_merge()
+        for computation_queue_item in computation_queue_items:
+            self.__notify_computation_waiters(computation_queue_item)
+        return new_data_items
+
+    def __make_computation(self, processing_id: str, inputs: typing.List[typing.Tuple[DataItem.DataItem, Graphics.Graphic]], region_list_map: typing.Mapping[str, typing.List[Graphics.Graphic]]=None, exit_stack: contextlib.ExitStack=None) -> DataItem.DataItem:
         """Create a new data item with computation specified by processing_id, inputs, and region_list_map.
 
         The region_list_map associates a list of graphics corresponding to the required regions with a computation source (key).
+
+        If exit_stack is passed, the new data item is put under a transaction before it is inserted and the transaction
+        is ended when exit_stack closes, so that the new data item is not written until then.
         """
         region_list_map = region_list_map or dict()
 
@@ -2494,6 +3562,9 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
         new_data_item.title = prefix + data_item0.title
         new_data_item.category = data_item0.category
 
+        if exit_stack is not None:
+            exit_stack.enter_context(self.data_item_transaction(new_data_item))
+
         self.append_data_item(new_data_item)
 
         display_specifier = DataItem.DisplaySpecifier.from_data_item(new_data_item)
@@ -2651,6 +3722,20 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, P
             vs["sequence-extract"] = {"title": _("Extract"), "expression": "xd.sequence_extract({src}, index)",
                 "sources": [{"name": "src", "label": _("Source"), "use_display_data": False, "requirements": [requirement_2d_to_3d, requirement_is_sequence]}],
                 "parameters": [index_param]}
+            # these are pure functions of their sources and parameters, so their results can be memoized.
+            for processing_id in ("fft", "inverse-fft", "auto-correlate", "cross-correlate", "sobel", "laplace", "gaussian-blur",
+                                  "median-filter", "uniform-filter", "transpose-flip", "resample", "resize", "histogram", "invert",
+                                  "sequence-register", "sequence-align", "sequence-integrate"):
+                vs[processing_id]["memoize"] = True
+            # these can update their results over the changed area of their sources, see ComputationQueueItem.
+            for processing_id in ("invert", "add", "subtract", "multiply", "divide"):
+                vs[processing_id]["incremental"] = "pointwise"
+            vs["sum"]["incremental"] = "sum"
+            vs["pick-mask-sum"]["incremental"] = "mask-sum"
+            # these hold the interpreter lock for long periods and only use the source xdata and parameters, so they can
+            # run in a worker process when the document model has a process pool.
+            for processing_id in ("sequence-register", "sequence-align"):
+                vs[processing_id]["isolatable"] = True
             cls._builtin_processing_descriptions = vs
         return cls._builtin_processing_descriptions
 
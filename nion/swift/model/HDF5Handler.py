@@ -25,13 +25,93 @@ def make_directory_if_needed(directory_path):
         os.makedirs(directory_path)
 
 
+class HDF5StoragePolicy:
+    """Describe how the data is laid out in an HDF5 file.
+
+    chunks is None for contiguous storage, "frame" for one chunk per frame (the last two dimensions), True to let h5py
+    choose, or a chunk shape. compression and compression_opts are passed to h5py, for instance "gzip" with a level,
+    "lzf", or the id of a registered filter plugin such as lz4 (32004, provided by hdf5plugin). shuffle enables the
+    byte shuffle filter, which usually improves compression of integer data.
+
+    If resizable is True, the first (sequence) axis of the data set is unlimited so that the data can grow or shrink
+    along it without rewriting the file.
+
+    Compression, shuffle, and resizable require chunked storage; "frame" chunks are used if chunks is None.
+    """
+
+    def __init__(self, *, chunks=None, compression=None, compression_opts=None, shuffle: bool=False, resizable: bool=False):
+        self.chunks = chunks
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+        self.resizable = resizable
+
+    def __repr__(self):
+        return "HDF5StoragePolicy(chunks={}, compression={}, compression_opts={}, shuffle={}, resizable={})".format(self.chunks, self.compression, self.compression_opts, self.shuffle, self.resizable)
+
+    def write_to_dict(self) -> dict:
+        return {"chunks": self.chunks, "compression": self.compression, "compression_opts": self.compression_opts, "shuffle": self.shuffle, "resizable": self.resizable}
+
+    @classmethod
+    def read_from_dict(cls, d: dict) -> "HDF5StoragePolicy":
+        chunks = d.get("chunks")
+        chunks = tuple(chunks) if isinstance(chunks, list) else chunks
+        compression_opts = d.get("compression_opts")
+        compression_opts = tuple(compression_opts) if isinstance(compression_opts, list) else compression_opts
+        return cls(chunks=chunks, compression=d.get("compression"), compression_opts=compression_opts, shuffle=d.get("shuffle", False), resizable=d.get("resizable", False))
+
+    @classmethod
+    def from_dataset(cls, dataset) -> "HDF5StoragePolicy":
+        """Return the policy describing an existing data set."""
+        resizable = len(dataset.maxshape) > 0 and dataset.maxshape[0] is None
+        return cls(chunks=dataset.chunks, compression=dataset.compression, compression_opts=dataset.compression_opts, shuffle=dataset.shuffle, resizable=resizable)
+
+    def get_dataset_kwargs(self, shape, dtype) -> dict:
+        """Return the arguments to pass to h5py create_dataset for data of shape and dtype."""
+        chunked = self.chunks is not None or self.compression is not None or self.shuffle or self.resizable
+        if not chunked or len(shape) == 0:
+            return dict()
+        # a fixed size dimension with no elements cannot be chunked; the first dimension is unlimited if resizable
+        if any(s == 0 for s in shape[1 if self.resizable else 0:]):
+            return dict()
+        kwargs = dict()
+        chunks = self.chunks if self.chunks is not None else "frame"
+        if chunks == "frame":
+            chunks = (1, ) * (len(shape) - 2) + tuple(shape[-2:])
+        if chunks is not True:
+            # chunks for fewer dimensions apply to the last dimensions, with one element in each leading dimension
+            chunks = tuple(chunks)
+            chunks = (1, ) * (len(shape) - len(chunks)) + chunks if len(chunks) < len(shape) else chunks[len(chunks) - len(shape):]
+            # chunks must be positive and no larger than fixed size dimensions
+            chunks = tuple(max(1, min(c, s)) if s > 0 else max(1, c) for c, s in zip(chunks, shape))
+        kwargs["chunks"] = chunks
+        if self.compression is not None:
+            kwargs["compression"] = self.compression
+            if self.compression_opts is not None:
+                kwargs["compression_opts"] = self.compression_opts
+        if self.shuffle:
+            kwargs["shuffle"] = True
+        if self.resizable:
+            kwargs["maxshape"] = (None, ) + tuple(shape[1:])
+        return kwargs
+
+
 class HDF5Handler:
+    """Read and write properties and data to an HDF5 file.
 
-    def __init__(self, file_path):
+    The data set is created according to storage_policy, or default_storage_policy if storage_policy is None. If neither
+    is specified, the data is stored contiguously. When the data set is rewritten with a new shape, the layout of the
+    existing data set is kept unless a storage policy is specified.
+    """
+
+    default_storage_policy = None
+
+    def __init__(self, file_path, storage_policy: HDF5StoragePolicy=None):
         self.__file_path = str(file_path)
         self.__lock = threading.RLock()
         self.__fp = None
         self.__dataset = None
+        self.storage_policy = storage_policy
 
     def close(self):
         if self.__fp:
@@ -63,7 +143,7 @@ class HDF5Handler:
     def __ensure_open(self):
         if not self.__fp:
             make_directory_if_needed(os.path.dirname(self.__file_path))
-            self.__fp = h5py.File(self.__file_path)
+            self.__fp = h5py.File(self.__file_path, "a")
 
     def __write_properties_to_dataset(self, properties):
         with self.__lock:
@@ -90,36 +170,78 @@ class HDF5Handler:
             else:
                 self.__dataset = self.__fp.create_dataset("data", data=numpy.empty((0,)))
 
+    def __get_storage_policy(self, dataset=None) -> HDF5StoragePolicy:
+        storage_policy = self.storage_policy or self.default_storage_policy
+        if not storage_policy and dataset is not None:
+            storage_policy = HDF5StoragePolicy.from_dataset(dataset)
+        return storage_policy or HDF5StoragePolicy()
+
+    def __create_dataset(self, data, storage_policy):
+        dataset_kwargs = storage_policy.get_dataset_kwargs(data.shape, data.dtype)
+        return self.__fp.require_dataset("data", shape=data.shape, dtype=data.dtype, data=data, **dataset_kwargs)
+
     def write_data(self, data, file_datetime):
         with self.__lock:
             assert data is not None
             self.__ensure_open()
             json_properties = None
-            # handle three cases:
+            # handle four cases:
             #   1 - 'data' doesn't yet exist (require_dataset)
-            #   2 - 'data' exists but is a different size (delete, then require_dataset)
-            #   3 - 'data' exists and is the same size (overwrite)
+            #   2 - 'data' exists and only the length of a resizable first axis differs (resize, then overwrite)
+            #   3 - 'data' exists but is a different size (delete, then require_dataset)
+            #   4 - 'data' exists and is the same size (overwrite)
             if not "data" in self.__fp:
                 # case 1
-                self.__dataset = self.__fp.require_dataset("data", shape=data.shape, dtype=data.dtype, data=data)
+                self.__dataset = self.__create_dataset(data, self.__get_storage_policy())
             else:
                 self.__dataset = self.__fp["data"]
                 if self.__dataset.shape != data.shape or self.__dataset.dtype != data.dtype:
-                    # case 2
-                    json_properties = self.__dataset.attrs.get("properties", "")
-                    self.__dataset = None
-                    self.__fp.close()
-                    self.__fp = None
-                    os.remove(self.__file_path)
-                    self.__ensure_open()
-                    self.__dataset = self.__fp.require_dataset("data", shape=data.shape, dtype=data.dtype, data=data)
+                    if self.__is_resizable_to(self.__dataset, data):
+                        # case 2
+                        self.__dataset.resize(data.shape[0], axis=0)
+                        self.__dataset[...] = data
+                    else:
+                        # case 3
+                        storage_policy = self.__get_storage_policy(self.__dataset)
+                        json_properties = self.__dataset.attrs.get("properties", "")
+                        self.__dataset = None
+                        self.__fp.close()
+                        self.__fp = None
+                        os.remove(self.__file_path)
+                        self.__ensure_open()
+                        self.__dataset = self.__create_dataset(data, storage_policy)
                 else:
-                    # case 3
-                    self.__dataset[:] = data
+                    # case 4
+                    self.__dataset[...] = data
             if json_properties is not None:
                 self.__dataset.attrs["properties"] = json_properties
             self.__fp.flush()
 
+    def __is_resizable_to(self, dataset, data) -> bool:
+        if dataset.dtype != data.dtype or len(dataset.shape) != len(data.shape) or len(data.shape) == 0:
+            return False
+        if dataset.maxshape[0] is not None or tuple(dataset.shape[1:]) != tuple(data.shape[1:]):
+            return False
+        # an explicit storage policy that does not match the existing data set requires rewriting the file
+        storage_policy = self.storage_policy or self.default_storage_policy
+        if storage_policy:
+            dataset_kwargs = storage_policy.get_dataset_kwargs(data.shape, data.dtype)
+            if not storage_policy.resizable or dataset.compression != dataset_kwargs.get("compression") or dataset.shuffle != dataset_kwargs.get("shuffle", False):
+                return False
+        return True
+
+    def write_data_slice(self, key, data, file_datetime):
+        """Write data into the region key (a slice or tuple of slices) of the existing data set.
+
+        Only the chunks of a chunked data set that intersect the region are rewritten.
+        """
+        with self.__lock:
+            assert data is not None
+            self.__ensure_open()
+            self.__ensure_dataset()
+            self.__dataset[key] = data
+            self.__fp.flush()
+
     def write_properties(self, properties, file_datetime):
         with self.__lock:
             self.__ensure_open()
@@ -142,6 +264,15 @@ class HDF5Handler:
                 return None
             return self.__dataset
 
+    def read_data_slice(self, key):
+        """Read a slice of the data. Only the hyperslab covered by key is read from the file."""
+        with self.__lock:
+            self.__ensure_open()
+            self.__ensure_dataset()
+            if self.__dataset.shape == (0, ):
+                return None
+            return self.__dataset[key]
+
     def remove(self):
         self.close()
         if os.path.isfile(self.__file_path):
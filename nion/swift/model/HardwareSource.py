@@ -18,6 +18,7 @@ import enum
 import functools
 import gettext
 import logging
+import math
 import os
 import threading
 import time
@@ -181,6 +182,193 @@ class HardwareSourceManager(metaclass=Utility.Singleton):
             f()
 
 
+class AcquisitionStatistics:
+    """Statistics of the intervals between the starts of successive acquisitions of a hardware source.
+
+    Times are measured with a monotonic clock, in seconds. The jitter is the standard deviation of the intervals. When
+    the pacing has a target period, the mean absolute difference between the intervals and the target period is
+    recorded too, along with the number of acquisitions that started later than a full period behind schedule.
+
+    Recorded from the acquisition thread; thread safe.
+    """
+
+    def __init__(self, target_period: typing.Optional[float]=None):
+        self.__lock = threading.RLock()
+        self.__target_period = target_period
+        self.reset()
+
+    @property
+    def target_period(self) -> typing.Optional[float]:
+        return self.__target_period
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__last_time = None
+            self.__count = 0
+            self.__mean = 0.0
+            self.__m2 = 0.0
+            self.__min = None
+            self.__max = None
+            self.__error_total = 0.0
+            self.__late_count = 0
+
+    def restart(self) -> None:
+        """Do not measure an interval before the next acquisition, for instance when a task starts."""
+        with self.__lock:
+            self.__last_time = None
+
+    def record_acquisition(self, acquire_time: float) -> None:
+        with self.__lock:
+            if self.__last_time is not None:
+                interval = acquire_time - self.__last_time
+                self.__count += 1
+                delta = interval - self.__mean
+                self.__mean += delta / self.__count
+                self.__m2 += delta * (interval - self.__mean)
+                self.__min = min(self.__min, interval) if self.__min is not None else interval
+                self.__max = max(self.__max, interval) if self.__max is not None else interval
+                if self.__target_period is not None:
+                    self.__error_total += abs(interval - self.__target_period)
+            self.__last_time = acquire_time
+
+    def record_late(self) -> None:
+        with self.__lock:
+            self.__late_count += 1
+
+    def as_dict(self) -> dict:
+        """Return the statistics as a dict with keys count, mean_interval, min_interval, max_interval, jitter,
+        target_period, mean_error and late_count. The values are None when unknown."""
+        with self.__lock:
+            count = self.__count
+            return {
+                "count": count,
+                "mean_interval": self.__mean if count > 0 else None,
+                "min_interval": self.__min,
+                "max_interval": self.__max,
+                "jitter": math.sqrt(self.__m2 / count) if count > 0 else None,
+                "target_period": self.__target_period,
+                "mean_error": self.__error_total / count if count > 0 and self.__target_period is not None else None,
+                "late_count": self.__late_count,
+            }
+
+
+class AcquisitionPacing:
+    """Paces the acquisitions of the tasks of a hardware source.
+
+    The acquisition task calls start when it starts, wait before each acquisition of data elements, and acquired after
+    it, all from the acquisition thread. The base class does not wait at all and is suitable for hardware that paces
+    the acquisition itself, for instance a camera whose acquire call blocks until the next frame is read out.
+
+    The intervals between acquisitions are recorded in statistics.
+
+    A pacing holds the schedule of a single task. The hardware source calls create_state to give each of its tasks a
+    pacing with the same configuration but its own schedule and statistics, so that starting the record task does not
+    reset the schedule of a suspended view task.
+    """
+
+    def __init__(self, target_period: typing.Optional[float]=None):
+        self.statistics = AcquisitionStatistics(target_period)
+
+    def create_state(self) -> "AcquisitionPacing":
+        """Return a pacing with the configuration of this one and its own schedule and statistics."""
+        pacing = copy.copy(self)
+        pacing.statistics = AcquisitionStatistics(self.statistics.target_period)
+        pacing.start()
+        return pacing
+
+    def start(self) -> None:
+        self.statistics.restart()
+
+    def wait(self) -> None:
+        self.statistics.record_acquisition(time.perf_counter())
+
+    def acquired(self) -> None:
+        pass
+
+
+class HardwarePacing(AcquisitionPacing):
+    """Acquire as soon as the previous acquisition finishes, leaving the pacing to the hardware.
+
+    Successive acquisitions still start at least minimum_period seconds apart so that an acquire call that returns
+    immediately, for instance while the hardware is not ready, does not spin the acquisition thread. Hardware taking
+    longer than minimum_period per acquisition is not delayed.
+    """
+
+    def __init__(self, minimum_period: float=0.001):
+        super().__init__()
+        self.__minimum_period = minimum_period
+        self.__last_start_time = None
+
+    def start(self) -> None:
+        super().start()
+        self.__last_start_time = None
+
+    def wait(self) -> None:
+        if self.__last_start_time is not None:
+            delay = self.__last_start_time + self.__minimum_period - time.perf_counter()
+            if delay > 0.0:
+                time.sleep(delay)
+        self.__last_start_time = time.perf_counter()
+        super().wait()
+
+
+class MaximumRatePacing(AcquisitionPacing):
+    """Leave at least 1 / maximum_rate seconds between the end of an acquisition and the start of the next one.
+
+    This keeps tasks whose acquire call returns immediately from starving the other threads. It is the default.
+    """
+
+    def __init__(self, maximum_rate: float=1000.0):
+        super().__init__()
+        self.__minimum_period = 1.0 / maximum_rate
+        self.__last_acquired_time = None
+
+    def start(self) -> None:
+        super().start()
+        self.__last_acquired_time = None
+
+    def wait(self) -> None:
+        if self.__last_acquired_time is not None:
+            delay = self.__last_acquired_time + self.__minimum_period - time.perf_counter()
+            if delay > 0.0:
+                time.sleep(delay)
+        super().wait()
+
+    def acquired(self) -> None:
+        self.__last_acquired_time = time.perf_counter()
+
+
+class TargetRatePacing(AcquisitionPacing):
+    """Start acquisitions at frame_rate per second, scheduled on a monotonic clock from the start of the task.
+
+    Scheduling from the start rather than from the previous acquisition keeps delays from accumulating. When an
+    acquisition starts more than a full period late, the schedule restarts from it instead of acquiring the missed
+    frames in a burst; such acquisitions are counted as late in the statistics.
+    """
+
+    def __init__(self, frame_rate: float):
+        super().__init__(1.0 / frame_rate)
+        self.__period = 1.0 / frame_rate
+        self.__next_time = None
+
+    def start(self) -> None:
+        super().start()
+        self.__next_time = None
+
+    def wait(self) -> None:
+        current_time = time.perf_counter()
+        if self.__next_time is None:
+            self.__next_time = current_time
+        delay = self.__next_time - current_time
+        if delay > 0.0:
+            time.sleep(delay)
+        elif -delay > self.__period:
+            self.statistics.record_late()
+            self.__next_time = current_time
+        self.__next_time += self.__period
+        super().wait()
+
+
 class AcquisitionTask:
     """Basic acquisition task carries out acquisition repeatedly during an acquisition loop, keeping track of state.
 
@@ -194,6 +382,9 @@ class AcquisitionTask:
     In addition the caller can query the state of acquisition using the following method:
         is_finished: whether acquisition has finished or not
 
+    The caller can set pacing to an AcquisitionPacing before the task starts; the default is MaximumRatePacing. A
+    pacing set by a subclass is used as is, so it should not be shared with another task.
+
     Finally, the caller can listen to the following events:
         data_elements_changed_event(data_elements, is_continuous, view_id, is_complete, is_stopping):
             fired when data elements change. the state of acquisition is passed too.
@@ -216,8 +407,6 @@ class AcquisitionTask:
         self.__aborted = False
         self.__is_stopping = False
         self.__is_continuous = continuous
-        self.__last_acquire_time = None
-        self.__minimum_period = 1/1000.0
         self.__frame_index = 0
         self.__view_id = str(uuid.uuid4()) if not continuous else None
         self._test_acquire_exception = None
@@ -226,6 +415,7 @@ class AcquisitionTask:
         self.stop_event = Event.Event()
         self.data_elements_changed_event = Event.Event()
         self.finished_callback_fn = None  # hack to determine when 'record' mode finishes.
+        self.pacing = None  # set to the pacing of the hardware source when started, unless set by the subclass
 
     def __mark_as_finished(self):
         self.__finished = True
@@ -302,13 +492,16 @@ class AcquisitionTask:
     def __start(self):
         if not self._start_acquisition():
             self.abort()
-        self.__last_acquire_time = time.time() - self.__minimum_period
+        if self.pacing is None:
+            self.pacing = MaximumRatePacing()
+        self.pacing.start()
 
     def __execute_acquire_data_elements(self):
         # with Utility.trace(): # (min_elapsed=0.0005, discard="anaconda"):
-        # impose maximum frame rate so that acquire_data_elements can't starve main thread
-        elapsed = time.time() - self.__last_acquire_time
-        time.sleep(max(0.0, self.__minimum_period - elapsed))
+        # wait according to the pacing; by default, impose maximum frame rate so that acquire_data_elements can't
+        # starve main thread
+        pacing = self.pacing
+        pacing.wait()
 
         if self._test_acquire_hook:
             self._test_acquire_hook()
@@ -322,8 +515,7 @@ class AcquisitionTask:
 
         data_elements = copy.copy(partial_data_elements)
 
-        # record the last acquisition time
-        self.__last_acquire_time = time.time()
+        pacing.acquired()
 
         # figure out whether all data elements are complete
         complete = True
@@ -411,6 +603,107 @@ class AcquisitionTask:
         raise NotImplementedError()
 
 
+class FrameBufferPool:
+    """A pool of preallocated buffers holding the frames of a data channel.
+
+    Each frame is returned as a read only array over a buffer. The frame owns a lease on the buffer, which every view
+    derived from the frame keeps alive; the buffer is returned to the pool when the lease is released, that is, once
+    the frame and all views of it are gone. A buffer is reused for a later frame only once returned. When every buffer
+    is in use, a new one is allocated; beyond max_count buffers, the oldest buffer in use is dropped from the pool and
+    left to its remaining users.
+
+    A frame updating only a sub area of the previous frame is made by copying the sub area into a reused buffer along
+    with the areas changed since the buffer last held a frame, so a progressive scan copies only the changed rows.
+    """
+
+    class Buffer:
+        def __init__(self, data: numpy.ndarray):
+            self.data = data
+            self.generation = None  # the generation of the frame held by the buffer; None for a new buffer
+            self.is_leased = False
+
+    class Lease:
+        # exposes the buffer to numpy as a read only array. numpy keeps the lease as the base of the frame and of the
+        # views derived from it, so the lease is released after the last of them.
+        def __init__(self, buffer: "FrameBufferPool.Buffer", release_fn: typing.Callable[["FrameBufferPool.Buffer"], None]):
+            self.__buffer = buffer
+            self.__release_fn = release_fn
+            array_interface = dict(buffer.data.__array_interface__)
+            array_interface["data"] = (array_interface["data"][0], True)
+            self.__array_interface__ = array_interface
+
+        def __del__(self):
+            self.__release_fn(self.__buffer)
+
+    history_count = 16  # the number of recent sub areas used to bring reused buffers up to date
+
+    def __init__(self, max_count: int=4):
+        self.__max_count = max_count
+        self.__buffers = list()  # oldest first
+        self.__current_buffer = None
+        self.__generation = 0
+        self.__sub_areas = list()  # (generation, sub area) of recent frames; sub area is None for full frames
+        self.__lock = threading.RLock()  # leases may be released on any thread
+
+    def __release(self, buffer: "FrameBufferPool.Buffer") -> None:
+        with self.__lock:
+            buffer.is_leased = False
+
+    def __acquire(self, shape, dtype) -> "FrameBufferPool.Buffer":
+        with self.__lock:
+            if self.__buffers and (self.__buffers[0].data.shape != shape or self.__buffers[0].data.dtype != dtype):
+                self.__buffers = list()
+            for buffer in self.__buffers:
+                if buffer is not self.__current_buffer and not buffer.is_leased:
+                    self.__buffers.remove(buffer)
+                    self.__buffers.append(buffer)
+                    buffer.is_leased = True
+                    return buffer
+            buffer = FrameBufferPool.Buffer(numpy.empty(shape, dtype))
+            buffer.is_leased = True
+            self.__buffers.append(buffer)
+            if len(self.__buffers) > self.__max_count:
+                self.__buffers.pop(0 if self.__buffers[0] is not self.__current_buffer else 1)
+            return buffer
+
+    def __get_changed_area(self, generation: typing.Optional[int]):
+        # return the union of the sub areas changed since generation; None if unknown, the empty tuple if none.
+        if generation is None or not self.__sub_areas or self.__sub_areas[0][0] > generation + 1:
+            return None
+        changed_area = tuple()
+        for sub_area_generation, sub_area in self.__sub_areas:
+            if sub_area_generation > generation:
+                if sub_area is None:
+                    return None
+                changed_area = DataItem.union_sub_areas(changed_area, sub_area) if changed_area else sub_area
+        return changed_area
+
+    def update(self, data: numpy.ndarray, sub_area=None) -> numpy.ndarray:
+        """Return a read only frame with the sub area ((top, left), (height, width)) of data pasted into the previous
+        frame, or with all of data if sub_area is None or the data does not match the previous frame."""
+        current_buffer = self.__current_buffer
+        if current_buffer is None or current_buffer.data.shape != data.shape or current_buffer.data.dtype != data.dtype:
+            sub_area = None
+        buffer = self.__acquire(data.shape, data.dtype)
+        if sub_area is None:
+            numpy.copyto(buffer.data, data)
+        else:
+            changed_area = self.__get_changed_area(buffer.generation)
+            if changed_area is None:
+                numpy.copyto(buffer.data, current_buffer.data)
+            elif changed_area:
+                slices = slice(changed_area[0][0], changed_area[0][0] + changed_area[1][0]), slice(changed_area[0][1], changed_area[0][1] + changed_area[1][1])
+                buffer.data[slices] = current_buffer.data[slices]
+            slices = slice(sub_area[0][0], sub_area[0][0] + sub_area[1][0]), slice(sub_area[0][1], sub_area[0][1] + sub_area[1][1])
+            buffer.data[slices] = data[slices]
+        self.__generation += 1
+        self.__sub_areas.append((self.__generation, sub_area))
+        del self.__sub_areas[:-self.history_count]
+        buffer.generation = self.__generation
+        self.__current_buffer = buffer
+        return numpy.asarray(FrameBufferPool.Lease(buffer, self.__release))
+
+
 class DataChannel:
     """A channel of raw data from a hardware source.
 
@@ -430,6 +723,9 @@ class DataChannel:
         * state
         * src_channel_index
         * sub_area
+        * updated_sub_area
+
+    The data of each update is copied into a buffer from a pool owned by the channel and is read only.
     """
     def __init__(self, hardware_source: "HardwareSource", index: int, channel_id: str=None, name: str=None, src_channel_index: int=None, processor=None):
         self.__hardware_source = hardware_source
@@ -441,7 +737,9 @@ class DataChannel:
         self.__start_count = False
         self.__state = None
         self.__sub_area = None
+        self.__updated_sub_area = None
         self.__data_and_metadata = None
+        self.__frame_buffer_pool = FrameBufferPool()
         self.is_dirty = False
         self.data_channel_updated_event = Event.Event()
         self.data_channel_start_event = Event.Event()
@@ -467,6 +765,11 @@ class DataChannel:
     def sub_area(self):
         return self.__sub_area
 
+    @property
+    def updated_sub_area(self):
+        """Return the area of the data changed by the most recent update, or None if all of the data may have changed."""
+        return self.__updated_sub_area
+
     @property
     def src_channel_index(self):
         return self.__src_channel_index
@@ -492,7 +795,10 @@ class DataChannel:
         channel_index = self.index
         channel_id = self.channel_id
         channel_name = self.name
-        metadata = copy.deepcopy(data_and_metadata.metadata)
+        # new_data_and_metadata below deep copies the metadata, so the frame never shares nested values with the
+        # metadata passed in; only the parts modified here need copying to leave the caller's metadata unchanged.
+        metadata = dict(data_and_metadata.metadata)
+        metadata["hardware_source"] = dict(metadata.get("hardware_source", dict()))
         hardware_source_metadata = dict()
         hardware_source_metadata["hardware_source_id"] = hardware_source_id
         hardware_source_metadata["channel_index"] = channel_index
@@ -502,23 +808,21 @@ class DataChannel:
             hardware_source_metadata["channel_name"] = channel_name
         if view_id:
             hardware_source_metadata["view_id"] = view_id
-        metadata.setdefault("hardware_source", dict()).update(hardware_source_metadata)
+        metadata["hardware_source"].update(hardware_source_metadata)
 
         data = data_and_metadata.data
         master_data = self.__data_and_metadata.data if self.__data_and_metadata else None
         data_matches = master_data is not None and data.shape == master_data.shape and data.dtype == master_data.dtype
+        updated_sub_area = None
         if data_matches and sub_area is not None:
             top = sub_area[0][0]
             bottom = sub_area[0][0] + sub_area[1][0]
             left = sub_area[0][1]
             right = sub_area[0][1] + sub_area[1][1]
             if top > 0 or left > 0 or bottom < data.shape[0] or right < data.shape[1]:
-                master_data = numpy.copy(master_data)
-                master_data[top:bottom, left:right] = data[top:bottom, left:right]
-            else:
-                master_data = numpy.copy(data)
-        else:
-            master_data = numpy.copy(data)
+                updated_sub_area = (top, left), (min(bottom, data.shape[0]) - top, min(right, data.shape[1]) - left)
+        master_data = self.__frame_buffer_pool.update(data, updated_sub_area)
+        self.__updated_sub_area = updated_sub_area
 
         data_descriptor = data_and_metadata.data_descriptor
         intensity_calibration = data_and_metadata.intensity_calibration if data_and_metadata else None
@@ -565,7 +869,11 @@ class HardwareSource:
         self.call_soon_event = Event.Event()
         self.__break_for_closing = False
         self.__acquire_thread_trigger = threading.Event()
+        self.__pacing = MaximumRatePacing()  # type: AcquisitionPacing
         self.__tasks = dict()  # type: typing.Dict[str, AcquisitionTask]
+        self.__paced_task_ids = set()  # type: typing.Set[str]
+        self.__task_acquisition_statistics = dict()  # type: typing.Dict[str, AcquisitionStatistics]
+        self.__last_task_id = None
         self.__data_elements_changed_event_listeners = dict()
         self.__start_event_listeners = dict()
         self.__stop_event_listeners = dict()
@@ -591,9 +899,43 @@ class HardwareSource:
     def _call_soon(self, fn):
         self.call_soon_event.fire_any(fn)
 
+    @property
+    def pacing(self) -> AcquisitionPacing:
+        """Return the pacing of the acquisition tasks of this hardware source."""
+        return self.__pacing
+
+    @pacing.setter
+    def pacing(self, pacing: AcquisitionPacing) -> None:
+        """Set the pacing of the acquisition tasks, including running tasks paced by the previous pacing.
+
+        Subclasses can choose the pacing suited to the hardware, for instance HardwarePacing when acquiring a frame
+        waits for the camera, or TargetRatePacing to acquire at a fixed rate. Each task is paced by its own state
+        created from the pacing.
+        """
+        self.__pacing = pacing
+        for task_id, task in list(self.__tasks.items()):
+            if task_id in self.__paced_task_ids:
+                task.pacing = pacing.create_state()
+                self.__task_acquisition_statistics[task_id] = task.pacing.statistics
+
+    @property
+    def acquisition_statistics(self) -> AcquisitionStatistics:
+        """Return the statistics of the intervals between acquisitions of the most recently started task."""
+        return self.get_task_acquisition_statistics(self.__last_task_id)
+
+    def get_task_acquisition_statistics(self, task_id: str) -> AcquisitionStatistics:
+        """Return the statistics of the intervals between acquisitions of the most recent task with task_id.
+
+        The statistics are empty if no task with task_id has run.
+        """
+        statistics = self.__task_acquisition_statistics.get(task_id)
+        return statistics if statistics else AcquisitionStatistics(self.__pacing.statistics.target_period)
+
     def __acquire_thread_loop(self):
-        # acquire_thread_trigger should be set whenever the task list change.
-        while self.__acquire_thread_trigger.wait():
+        # acquire_thread_trigger should be set whenever the task list change. while there is a task, the loop runs again
+        # without waiting on the trigger; the pacing of the task decides how long to wait between acquisitions.
+        task_id = None
+        while task_id or self.__acquire_thread_trigger.wait():
             self.__acquire_thread_trigger.clear()
             # record task gets highest priority
             break_for_closing = self.__break_for_closing
@@ -632,6 +974,7 @@ class HardwareSource:
                         traceback.print_exc()
                 if task.is_finished:
                     del self.__tasks[task_id]
+                    self.__paced_task_ids.discard(task_id)
                     self.__data_elements_changed_event_listeners[task_id].close()
                     del self.__data_elements_changed_event_listeners[task_id]
                     self.__start_event_listeners[task_id].close()
@@ -639,7 +982,6 @@ class HardwareSource:
                     self.__stop_event_listeners[task_id].close()
                     del self.__stop_event_listeners[task_id]
                     self.acquisition_state_changed_event.fire(False)
-                self.__acquire_thread_trigger.set()
             if break_for_closing:
                 break
 
@@ -738,6 +1080,11 @@ class HardwareSource:
         self.__data_elements_changed_event_listeners[task_id] = task.data_elements_changed_event.listen(functools.partial(self.__data_elements_changed, task))
         self.__start_event_listeners[task_id] = task.start_event.listen(self.__start)
         self.__stop_event_listeners[task_id] = task.stop_event.listen(self.__stop)
+        if task.pacing is None:
+            task.pacing = self.__pacing.create_state()
+            self.__paced_task_ids.add(task_id)
+        self.__task_acquisition_statistics[task_id] = task.pacing.statistics
+        self.__last_task_id = task_id
         self.__tasks[task_id] = task
         self.__acquire_thread_trigger.set()
         self.acquisition_state_changed_event.fire(True)
@@ -1063,6 +1410,59 @@ def parse_hardware_aliases_config_file(config_path):
     return False
 
 
+class DataChannelRing:
+    """Fixed capacity storage for the frames of one data channel.
+
+    The data of all frames is kept in one preallocated array of capacity x frame shape; the calibrations, metadata and
+    timestamps are kept in parallel lists. The array is allocated with the first frame and must be reallocated when the
+    frame shape or dtype changes.
+    """
+
+    def __init__(self, capacity: int):
+        self.__capacity = capacity
+        self.__data = None
+        self.__intensity_calibrations = [None] * capacity
+        self.__dimensional_calibrations = [None] * capacity
+        self.__metadatas = [None] * capacity
+        self.__timestamps = [None] * capacity
+        self.__timezones = [None] * capacity
+        self.__data_descriptors = [None] * capacity
+
+    @property
+    def nbytes(self) -> int:
+        return self.__data.nbytes if self.__data is not None else 0
+
+    def fits(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> bool:
+        """Return whether the frame can be written without reallocating the storage."""
+        data = data_and_metadata.data
+        return self.__data is not None and self.__data.shape[1:] == data.shape and self.__data.dtype == data.dtype
+
+    def write(self, index: int, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
+        if not self.fits(data_and_metadata):
+            self.__data = numpy.empty((self.__capacity, ) + data_and_metadata.data.shape, data_and_metadata.data.dtype)
+        slot = index % self.__capacity
+        self.__data[slot] = data_and_metadata.data
+        self.__intensity_calibrations[slot] = data_and_metadata.intensity_calibration
+        self.__dimensional_calibrations[slot] = data_and_metadata.dimensional_calibrations
+        self.__metadatas[slot] = data_and_metadata.metadata
+        self.__timestamps[slot] = data_and_metadata.timestamp
+        self.__timezones[slot] = data_and_metadata.timezone, data_and_metadata.timezone_offset
+        self.__data_descriptors[slot] = data_and_metadata.data_descriptor
+
+    def read(self, index: int, copy: bool) -> DataAndMetadata.DataAndMetadata:
+        """Return the frame written for index, either as a copy or as a read only view of the storage."""
+        slot = index % self.__capacity
+        if copy:
+            data = numpy.copy(self.__data[slot])
+        else:
+            data = self.__data[slot].view()
+            data.flags.writeable = False
+        timezone, timezone_offset = self.__timezones[slot]
+        return DataAndMetadata.new_data_and_metadata(data, self.__intensity_calibrations[slot], self.__dimensional_calibrations[slot],
+                                                     self.__metadatas[slot], self.__timestamps[slot], self.__data_descriptors[slot],
+                                                     timezone=timezone, timezone_offset=timezone_offset)
+
+
 class DataChannelBuffer:
     """A fixed size buffer for a list of hardware source data channels.
 
@@ -1072,6 +1472,17 @@ class DataChannelBuffer:
 
     Possible uses: record every frame, record every nth frame, record frame periodically,
       frame averaging, spectrum imaging.
+
+    The frames are stored in a ring of buffer_size entries backed by one preallocated array per channel. Entries are
+    numbered by a write count; the writer copies each frame into its slot without taking any lock that readers hold, and
+    readers copy out of a slot without blocking the writer, checking afterwards that the writer has not started
+    overwriting it (a sequence lock). The lock shared with readers is held only to publish a new entry and to claim one.
+
+    Grabs return copies by default; pass copy=False for read only views of the ring, which remain valid until the writer
+    wraps around to their slot, buffer_size entries later.
+
+    Entries overwritten before being grabbed are counted in overflow_count; entries skipped by grab_latest and
+    grab_next are counted in drop_count.
     """
 
     class State(enum.Enum):
@@ -1083,9 +1494,16 @@ class DataChannelBuffer:
         self.__state_lock = threading.RLock()
         self.__state = DataChannelBuffer.State.idle
         self.__buffer_size = buffer_size
-        self.__buffer_lock = threading.RLock()
-        self.__buffer = list()
-        self.__done_events = list()
+        self.__write_lock = threading.RLock()  # serializes the writers
+        self.__condition = threading.Condition()  # guards the read index and counters; notified for each new entry
+        self.__rings = [DataChannelRing(buffer_size) for data_channel in data_channels]
+        self.__entry_channel_indexes = [None] * buffer_size  # the indexes of the channels present in each entry
+        self.__first_index = 0  # the earliest entry still in the rings; advanced when the rings are reallocated
+        self.__writing_count = 0  # the number of entries whose writing has started
+        self.__write_count = 0  # the number of entries written
+        self.__read_index = 0  # the next entry to grab
+        self.__overflow_count = 0
+        self.__drop_count = 0
         self.__active_channel_ids = set()
         self.__latest = dict()
         self.__data_channel_updated_listeners = list()
@@ -1113,23 +1531,47 @@ class DataChannelBuffer:
         self.__data_channel_start_listeners = None
         self.__data_channel_stop_listeners = None
 
+    @property
+    def overflow_count(self) -> int:
+        """Return the number of entries overwritten before being grabbed."""
+        return self.__overflow_count
+
+    @property
+    def drop_count(self) -> int:
+        """Return the number of entries skipped by grabbing the latest or next entry."""
+        return self.__drop_count
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes allocated for the ring."""
+        return sum(ring.nbytes for ring in self.__rings)
+
     def __data_channel_updated(self, data_channel: DataChannel, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
         if self.__state == DataChannelBuffer.State.started:
             if data_channel.state == "complete":
-                with self.__buffer_lock:
+                with self.__write_lock:
                     self.__latest[data_channel.channel_id] = data_and_metadata
                     if set(self.__latest.keys()).issuperset(self.__active_channel_ids):
-                        data_and_metadata_list = list()
-                        for data_channel in self.__data_channels:
-                            if data_channel.channel_id in self.__latest:
-                                data_and_metadata_list.append(copy.deepcopy(self.__latest[data_channel.channel_id]))
-                        self.__buffer.append(data_and_metadata_list)
-                        self.__latest = dict()
-                        if len(self.__buffer) > self.__buffer_size:
-                            self.__buffer.pop(0)
-                        for done_event in self.__done_events:
-                            done_event.set()
-                        self.__done_events = list()
+                        self.__write_entry()
+
+    def __write_entry(self) -> None:
+        index = self.__write_count
+        entry = [(channel_index, self.__latest[data_channel.channel_id]) for channel_index, data_channel in enumerate(self.__data_channels) if data_channel.channel_id in self.__latest]
+        self.__latest = dict()
+        if not all(self.__rings[channel_index].fits(data_and_metadata) for channel_index, data_and_metadata in entry):
+            self.__first_index = index
+        # mark the slot as being written before writing it so readers of its previous entry can detect the overwrite.
+        self.__writing_count = index + 1
+        for channel_index, data_and_metadata in entry:
+            self.__rings[channel_index].write(index, data_and_metadata)
+        self.__entry_channel_indexes[index % self.__buffer_size] = tuple(channel_index for channel_index, data_and_metadata in entry)
+        with self.__condition:
+            self.__write_count = index + 1
+            available_index = max(self.__first_index, self.__write_count - self.__buffer_size)
+            if self.__read_index < available_index:
+                self.__overflow_count += available_index - self.__read_index
+                self.__read_index = available_index
+            self.__condition.notify_all()
 
     def __data_channel_start(self, data_channel: DataChannel) -> None:
         self.__active_channel_ids.add(data_channel.channel_id)
@@ -1137,46 +1579,51 @@ class DataChannelBuffer:
     def __data_channel_stop(self, data_channel: DataChannel) -> None:
         self.__active_channel_ids.remove(data_channel.channel_id)
 
-    def grab_latest(self, timeout: float=None) -> typing.List[DataAndMetadata.DataAndMetadata]:
-        """Grab the most recent data from the buffer, blocking until one is available. Clear earlier data."""
+    def __read_entry(self, index: int, copy: bool) -> typing.Optional[typing.List[DataAndMetadata.DataAndMetadata]]:
+        # read the entry without holding any lock; return None if the writer started overwriting it in the meantime.
+        channel_indexes = self.__entry_channel_indexes[index % self.__buffer_size]
+        data_and_metadata_list = [self.__rings[channel_index].read(index, copy) for channel_index in channel_indexes]
+        if index >= self.__first_index and self.__writing_count <= index + self.__buffer_size:
+            return data_and_metadata_list
+        return None
+
+    def __grab(self, timeout: typing.Optional[float], latest: bool, copy: bool) -> typing.List[DataAndMetadata.DataAndMetadata]:
         timeout = timeout if timeout is not None else 10.0
-        with self.__buffer_lock:
-            if len(self.__buffer) == 0:
-                done_event = threading.Event()
-                self.__done_events.append(done_event)
-                self.__buffer_lock.release()
-                done = done_event.wait(timeout)
-                self.__buffer_lock.acquire()
-                if not done:
-                    raise Exception("Could not grab latest.")
-            result = self.__buffer[-1]
-            self.__buffer = list()
-            return result
-
-    def grab_earliest(self, timeout: float=None) -> typing.List[DataAndMetadata.DataAndMetadata]:
+        while True:
+            with self.__condition:
+                if not self.__condition.wait_for(lambda: self.__write_count > self.__read_index, timeout):
+                    raise Exception("Could not grab latest." if latest else "Could not grab earliest.")
+                if latest:
+                    index = self.__write_count - 1
+                    self.__drop_count += index - self.__read_index
+                else:
+                    index = self.__read_index
+                self.__read_index = index + 1
+            data_and_metadata_list = self.__read_entry(index, copy)
+            if data_and_metadata_list is not None:
+                return data_and_metadata_list
+            with self.__condition:
+                self.__overflow_count += 1
+
+    def grab_latest(self, timeout: float=None, copy: bool=True) -> typing.List[DataAndMetadata.DataAndMetadata]:
+        """Grab the most recent data from the buffer, blocking until one is available. Clear earlier data."""
+        return self.__grab(timeout, True, copy)
+
+    def grab_earliest(self, timeout: float=None, copy: bool=True) -> typing.List[DataAndMetadata.DataAndMetadata]:
         """Grab the earliest data from the buffer, blocking until one is available."""
-        timeout = timeout if timeout is not None else 10.0
-        with self.__buffer_lock:
-            if len(self.__buffer) == 0:
-                done_event = threading.Event()
-                self.__done_events.append(done_event)
-                self.__buffer_lock.release()
-                done = done_event.wait(timeout)
-                self.__buffer_lock.acquire()
-                if not done:
-                    raise Exception("Could not grab latest.")
-            return self.__buffer.pop(0)
-
-    def grab_next(self, timeout: float=None) -> typing.List[DataAndMetadata.DataAndMetadata]:
+        return self.__grab(timeout, False, copy)
+
+    def grab_next(self, timeout: float=None, copy: bool=True) -> typing.List[DataAndMetadata.DataAndMetadata]:
         """Grab the next data to finish from the buffer, blocking until one is available."""
-        with self.__buffer_lock:
-            self.__buffer = list()
-        return self.grab_latest(timeout)
+        with self.__condition:
+            self.__drop_count += self.__write_count - self.__read_index
+            self.__read_index = self.__write_count
+        return self.grab_latest(timeout, copy)
 
-    def grab_following(self, timeout: float=None) -> typing.List[DataAndMetadata.DataAndMetadata]:
+    def grab_following(self, timeout: float=None, copy: bool=True) -> typing.List[DataAndMetadata.DataAndMetadata]:
         """Grab the next data to start from the buffer, blocking until one is available."""
-        self.grab_next(timeout)
-        return self.grab_next(timeout)
+        self.grab_next(timeout, False)
+        return self.grab_next(timeout, copy)
 
     def start(self) -> None:
         """Start recording.
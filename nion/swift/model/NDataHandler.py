@@ -274,6 +274,108 @@ def parse_zip(fp):
     return local_files, dir_files, eocd
 
 
+def parse_zip_directory(fp):
+    """
+        Parse the zip file central directory at fp
+
+        :param fp: the file pointer from which to parse the zip file
+        :return: A tuple of local files, directory headers, and end of central directory
+
+        The return value has the same structure as parse_zip. Unlike parse_zip, this method
+        reads the end of central directory record from the end of the file and then reads the
+        central directory in a single read; the local file headers are only read to determine
+        the position of the data for each file.
+
+        This method raises IOError if the zip file structure is not valid.
+    """
+    local_files = {}
+    dir_files = {}
+    fp.seek(0, os.SEEK_END)
+    file_size = fp.tell()
+    if file_size < 22:
+        raise IOError()
+    eocd_pos = file_size - 22
+    fp.seek(eocd_pos)
+    eocd_bytes = fp.read(22)
+    if struct.unpack('<I', eocd_bytes[0:4])[0] != 0x06054b50:
+        # the end of central directory may be followed by a comment; search backwards for it.
+        search_len = min(file_size, 22 + 65535)
+        fp.seek(file_size - search_len)
+        tail_bytes = fp.read(search_len)
+        eocd_index = tail_bytes.rfind(struct.pack('<I', 0x06054b50))
+        if eocd_index < 0 or eocd_index + 22 > len(tail_bytes):
+            raise IOError()
+        eocd_pos = file_size - search_len + eocd_index
+        eocd_bytes = tail_bytes[eocd_index:eocd_index + 22]
+    count, dir_size, dir_offset = struct.unpack('<HII', eocd_bytes[10:20])
+    fp.seek(dir_offset)
+    dir_bytes = fp.read(dir_size)
+    if len(dir_bytes) != dir_size:
+        raise IOError()
+    offset = 0
+    for i in range(count):
+        if offset + 46 > dir_size or struct.unpack('<I', dir_bytes[offset:offset + 4])[0] != 0x02014b50:
+            raise IOError()
+        crc32, data_len = struct.unpack('<II', dir_bytes[offset + 16:offset + 24])
+        name_len, extra_len, comment_len = struct.unpack('<HHH', dir_bytes[offset + 28:offset + 34])
+        local_file_pos = struct.unpack('<I', dir_bytes[offset + 42:offset + 46])[0]
+        name_bytes = dir_bytes[offset + 46:offset + 46 + name_len]
+        # the local file header may have a different extra length than the directory header
+        fp.seek(local_file_pos)
+        local_header_bytes = fp.read(30)
+        if len(local_header_bytes) != 30 or struct.unpack('<I', local_header_bytes[0:4])[0] != 0x04034b50:
+            raise IOError()
+        local_name_len, local_extra_len = struct.unpack('<HH', local_header_bytes[26:30])
+        data_pos = local_file_pos + 30 + local_name_len + local_extra_len
+        local_files[local_file_pos] = (name_bytes, data_pos, data_len, crc32)
+        dir_files[name_bytes] = (dir_offset + offset, local_file_pos)
+        offset += 46 + name_len + extra_len + comment_len
+    eocd = (eocd_pos, dir_offset)
+    return local_files, dir_files, eocd
+
+
+class ZipIndexCache:
+    """
+        A cache of parsed zip directory structures.
+
+        The entries are keyed by file path and are only valid while the file modification time
+        and size are unchanged. Writers should call invalidate after modifying the file.
+    """
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__indexes = dict()
+
+    def parse_zip(self, fp, file_path):
+        """
+            Return the parsed zip structure for the file at fp, parsing it if needed.
+
+            :param fp: the file pointer to the zip file
+            :param file_path: the path of the zip file; used as the cache key
+            :return: A tuple of local files, directory headers, and end of central directory
+
+            See parse_zip_directory.
+        """
+        stat_result = os.fstat(fp.fileno())
+        key = stat_result.st_mtime_ns, stat_result.st_size
+        with self.__lock:
+            entry = self.__indexes.get(file_path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        index = parse_zip_directory(fp)
+        with self.__lock:
+            self.__indexes[file_path] = key, index
+        return index
+
+    def invalidate(self, file_path):
+        with self.__lock:
+            self.__indexes.pop(file_path, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__indexes.clear()
+
+
 def read_data(fp, local_files, dir_files, name_bytes):
     """
         Read a numpy data array from the zip file
@@ -296,6 +398,40 @@ def read_data(fp, local_files, dir_files, name_bytes):
     return None
 
 
+def read_data_memmap(fp, local_files, dir_files, name_bytes, mode="r"):
+    """
+        Read a numpy data array from the zip file as a memory mapped array
+
+        :param fp: a file pointer
+        :param local_files: the local files structure
+        :param dir_files: the directory headers
+        :param name: the name of the data file to read
+        :param mode: the memmap mode; either "r" (read only) or "c" (copy on write)
+        :return: the numpy memmap array, if found
+
+        The data is not read from the file; pages are only read when the array is accessed. The
+        memory map remains valid after fp is closed.
+
+        Arrays which cannot be memory mapped (object arrays or empty arrays) are read as with read_data.
+
+        The local_files and dir_files should be passed from
+        the results of parse_zip.
+    """
+    assert mode in ("r", "c")
+    if name_bytes in dir_files:
+        fp.seek(local_files[dir_files[name_bytes][1]][1])
+        version = numpy.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(fp)
+        if dtype.hasobject or 0 in shape:
+            return read_data(fp, local_files, dir_files, name_bytes)
+        order = "F" if fortran_order else "C"
+        return numpy.memmap(fp, dtype=dtype, mode=mode, offset=fp.tell(), shape=shape, order=order)
+    return None
+
+
 def read_json(fp, local_files, dir_files, name_bytes):
     """
         Read json properties from the zip file
@@ -336,7 +472,7 @@ def rewrite_zip(file_path, properties):
         take care to ensure this does not happen.
     """
     with open(file_path, "r+b") as fp:
-        local_files, dir_files, eocd = parse_zip(fp)
+        local_files, dir_files, eocd = parse_zip_directory(fp)
         # check to make sure directory has two files, named data.npy and metadata.json, and that data.npy is first
         # TODO: check compression, etc.
         if len(dir_files) == 2 and b"data.npy" in dir_files and b"metadata.json" in dir_files and dir_files[b"data.npy"][1] == 0:
@@ -368,14 +504,30 @@ class NDataHandler:
         The handler is meant to be fully independent so that it can easily be plugged into
         earlier versions of Swift as it evolves.
 
+        If memmap_mode is "r" (read only) or "c" (copy on write), read_data will return a numpy
+        memmap over the data file instead of reading the data into memory. In that case the data
+        is always written to a temporary file which then replaces the original file so that
+        previously returned memmaps remain valid. The class attribute memmap_mode is used when
+        memmap_mode is not passed to the constructor.
+
+        The parsed zip directory of each file is kept in a cache shared by all handlers so that
+        is_matching, read_properties, and read_data do not parse the file repeatedly.
+
         :param file_path: The basic directory from which reference are based
+        :param memmap_mode: None, "r", or "c"
 
         TODO: Move NDataHandler into a plug-in
     """
 
-    def __init__(self, file_path):
+    memmap_mode = None
+
+    _zip_index_cache = ZipIndexCache()
+
+    def __init__(self, file_path, memmap_mode=None):
         self.__file_path = str(file_path)
         self.__lock = threading.RLock()
+        self.__memmap_mode = memmap_mode if memmap_mode is not None else NDataHandler.memmap_mode
+        assert self.__memmap_mode in (None, "r", "c")
 
     def close(self):
         pass
@@ -396,7 +548,7 @@ class NDataHandler:
         if file_path.endswith(".ndata") and os.path.exists(file_path):
             try:
                 with open(file_path, "r+b") as fp:
-                    local_files, dir_files, eocd = parse_zip(fp)
+                    local_files, dir_files, eocd = cls._zip_index_cache.parse_zip(fp, file_path)
                     contains_data = b"data.npy" in dir_files
                     contains_metadata = b"metadata.json" in dir_files
                     file_count = contains_data + contains_metadata  # use fact that True is 1, False is 0
@@ -430,11 +582,19 @@ class NDataHandler:
             #logging.debug("WRITE data file %s for %s", absolute_file_path, key)
             make_directory_if_needed(os.path.dirname(absolute_file_path))
             properties = self.read_properties() if os.path.exists(absolute_file_path) else dict()
-            write_zip(absolute_file_path, data, properties)
+            if self.__memmap_mode:
+                # write to a new file so that memmaps of the existing file remain valid
+                temp_file_path = absolute_file_path + ".temp"
+                write_zip(temp_file_path, data, properties)
+                os.replace(temp_file_path, absolute_file_path)
+            else:
+                write_zip(absolute_file_path, data, properties)
             # convert to utc time.
             tz_minutes = Utility.local_utcoffset_minutes(file_datetime)
             timestamp = calendar.timegm(file_datetime.timetuple()) - tz_minutes * 60
             os.utime(absolute_file_path, (time.time(), timestamp))
+            # the modification time is set to the file datetime, so explicitly invalidate the index.
+            self._zip_index_cache.invalidate(absolute_file_path)
 
     def write_properties(self, properties, file_datetime):
         """
@@ -460,6 +620,8 @@ class NDataHandler:
             tz_minutes = Utility.local_utcoffset_minutes(file_datetime)
             timestamp = calendar.timegm(file_datetime.timetuple()) - tz_minutes * 60
             os.utime(absolute_file_path, (time.time(), timestamp))
+            # the modification time is set to the file datetime, so explicitly invalidate the index.
+            self._zip_index_cache.invalidate(absolute_file_path)
 
     def read_properties(self):
         """
@@ -471,7 +633,7 @@ class NDataHandler:
         with self.__lock:
             absolute_file_path = self.__file_path
             with open(absolute_file_path, "rb") as fp:
-                local_files, dir_files, eocd = parse_zip(fp)
+                local_files, dir_files, eocd = self._zip_index_cache.parse_zip(fp, absolute_file_path)
                 properties = read_json(fp, local_files, dir_files, b"metadata.json")
             return properties
 
@@ -481,15 +643,36 @@ class NDataHandler:
 
             :param reference: the reference from which to read
             :return: a numpy array of the data; maybe None
+
+            The returned array will be a numpy memmap if memmap_mode is enabled.
         """
         with self.__lock:
             absolute_file_path = self.__file_path
             #logging.debug("READ data file %s", absolute_file_path)
             with open(absolute_file_path, "rb") as fp:
-                local_files, dir_files, eocd = parse_zip(fp)
+                local_files, dir_files, eocd = self._zip_index_cache.parse_zip(fp, absolute_file_path)
+                if self.__memmap_mode:
+                    return read_data_memmap(fp, local_files, dir_files, b"data.npy", self.__memmap_mode)
                 return read_data(fp, local_files, dir_files, b"data.npy")
             return None
 
+    def read_data_slice(self, key):
+        """
+            Read a slice of the data from the ndata file reference
+
+            :param key: the slice, as passed to numpy indexing
+            :return: a numpy array of the sliced data; maybe None
+
+            Only the parts of the file covered by the slice are read.
+        """
+        with self.__lock:
+            absolute_file_path = self.__file_path
+            with open(absolute_file_path, "rb") as fp:
+                local_files, dir_files, eocd = self._zip_index_cache.parse_zip(fp, absolute_file_path)
+                data = read_data_memmap(fp, local_files, dir_files, b"data.npy", "r")
+                # copy so that the result does not keep the file mapped
+                return numpy.array(data[key]) if data is not None else None
+
     def remove(self):
         """
             Remove the ndata file reference
@@ -499,5 +682,6 @@ class NDataHandler:
         with self.__lock:
             absolute_file_path = self.__file_path
             #logging.debug("DELETE data file %s", absolute_file_path)
+            self._zip_index_cache.invalidate(absolute_file_path)
             if os.path.isfile(absolute_file_path):
                 os.remove(absolute_file_path)
@@ -10,6 +10,8 @@
 # standard libraries
 import ast
 import functools
+import hashlib
+import json
 import threading
 import time
 import typing
@@ -369,6 +371,13 @@ class ComputationContext:
         return None
 
 
+@functools.lru_cache(maxsize=256)
+def _compile_expression(expression: str):
+    # code objects are immutable, so computations with the same expression (for instance, the same processing applied
+    # to many data items) share the compiled code.
+    return compile(expression, "expr", "exec")
+
+
 class Computation(Observable.Observable, Persistence.PersistentObject):
     """A computation on data and other inputs.
 
@@ -408,11 +417,17 @@ class Computation(Observable.Observable, Persistence.PersistentObject):
         self.__bound_item_changed_event_listeners = dict()
         self.__variable_property_changed_listener = dict()
         self.last_evaluate_data_time = 0
+        # compiled code is cached as an (expression, code) tuple so it is replaced atomically
+        self.__compiled_code = None
+        # durations of the most recent compile and exec, in seconds; compile is 0.0 when the cached code was used
+        self.last_compile_duration = 0.0
+        self.last_execute_duration = 0.0
         self.needs_update = expression is not None
         self.computation_mutated_event = Event.Event()
         self.variable_inserted_event = Event.Event()
         self.variable_removed_event = Event.Event()
         self._evaluation_count_for_test = 0
+        self._compile_count_for_test = 0
 
     def read_from_dict(self, properties):
         super().read_from_dict(properties)
@@ -468,6 +483,7 @@ class Computation(Observable.Observable, Persistence.PersistentObject):
     def expression(self, value: str) -> None:
         if value != self.original_expression:
             self.original_expression = value
+            self.__compiled_code = None
             self.processing_id = None
             self.needs_update = True
             self.computation_mutated_event.fire()
@@ -488,7 +504,25 @@ class Computation(Observable.Observable, Persistence.PersistentObject):
             pass
         return names
 
-    def evaluate_with_target(self, api, target) -> str:
+    def get_variable_values(self) -> typing.Dict[str, typing.Any]:
+        """Return the current values of the variables by name. Objects are returned directly, not as api objects."""
+        values = dict()
+        for variable in self.variables:
+            bound_object = self.__bound_items.get(variable.uuid)
+            if bound_object is not None:
+                values[variable.name] = bound_object.value if bound_object else None
+        return values
+
+    def evaluate_with_target(self, api, target, cancel_event: threading.Event=None, process_pool=None, variable_overrides: typing.Mapping[str, typing.Any]=None) -> str:
+        """Evaluate the computation into target.
+
+        The expression can check the cancel_event variable (a threading.Event) to stop early when the result is no
+        longer wanted, for instance because its inputs have changed again.
+
+        If process_pool is passed, the expression is run in a worker process (see ComputationProcessPool).
+
+        The variable_overrides are used in place of the values of the variables with the same names.
+        """
         assert target is not None
         error_text = None
         needs_update = self.needs_update
@@ -504,28 +538,53 @@ class Computation(Observable.Observable, Persistence.PersistentObject):
                     # more important than this protection. so use the resolved object directly.
                     api_object = api._new_api_object(resolved_object) if resolved_object else None
                     variables[variable.name] = api_object if api_object else resolved_object  # use api only if resolved_object is an api style object
+            if variable_overrides:
+                variables.update(variable_overrides)
 
             expression = self.original_expression
             if expression:
-                error_text = self.__execute_code(api, expression, target, variables)
+                if process_pool:
+                    error_text = self.__execute_code_in_process_pool(process_pool, expression, target, variables, cancel_event)
+                else:
+                    error_text = self.__execute_code(api, expression, target, variables, cancel_event)
 
             self._evaluation_count_for_test += 1
             self.last_evaluate_data_time = time.perf_counter()
         return error_text
 
-    def __execute_code(self, api, expression, target, variables) -> typing.Optional[str]:
-        code_lines = []
+    def get_memoization_key(self, get_object_key: typing.Callable[[typing.Any], typing.Any]) -> typing.Optional[str]:
+        """Return a key identifying the expression and the current values of its variables.
+
+        Bound objects are described by get_object_key, which returns a JSON compatible description of the object or
+        None if the object cannot be described. Returns None if the key cannot be made.
+        """
+        values = list()
+        for variable in self.variables:
+            if variable.value_type is not None:
+                value = variable.value
+            else:
+                bound_object = self.__bound_items.get(variable.uuid)
+                resolved_object = bound_object.value if bound_object else None
+                value = get_object_key(resolved_object) if resolved_object is not None else None
+                if value is None:
+                    return None
+            values.append((variable.name, value))
+        key_str = json.dumps([self.original_expression, values], sort_keys=True, default=str)
+        return hashlib.sha1(key_str.encode("utf-8")).hexdigest()
+
+    def __execute_code(self, api, expression, target, variables, cancel_event: threading.Event=None) -> typing.Optional[str]:
         g = variables
         g["api"] = api
         g["target"] = target
+        g["cancel_event"] = cancel_event if cancel_event is not None else threading.Event()
         l = dict()
-        expression_lines = expression.split("\n")
-        code_lines.extend(expression_lines)
-        code = "\n".join(code_lines)
         try:
-            # print(code)
-            compiled = compile(code, "expr", "exec")
-            exec(compiled, g, l)
+            compiled = self.__get_compiled_code(expression)
+            start_time = time.perf_counter()
+            try:
+                exec(compiled, g, l)
+            finally:
+                self.last_execute_duration = time.perf_counter() - start_time
         except Exception as e:
             # import sys, traceback
             # traceback.print_exc()
@@ -533,6 +592,30 @@ class Computation(Observable.Observable, Persistence.PersistentObject):
             return str(e) or "Unable to evaluate script."  # a stack trace would be too much information right now
         return None
 
+    def __execute_code_in_process_pool(self, process_pool, expression, target, variables, cancel_event: threading.Event=None) -> typing.Optional[str]:
+        start_time = time.perf_counter()
+        try:
+            return process_pool.execute_code(expression, target, variables, cancel_event)
+        except Exception as e:
+            return str(e) or "Unable to evaluate script."
+        finally:
+            self.last_compile_duration = 0.0
+            self.last_execute_duration = time.perf_counter() - start_time
+
+    def __get_compiled_code(self, expression: str):
+        # the expression text is part of the cache entry so changes that bypass the expression setter (reading
+        # from dict, undo) are still picked up.
+        compiled_code = self.__compiled_code
+        if compiled_code is None or compiled_code[0] != expression:
+            start_time = time.perf_counter()
+            compiled_code = expression, _compile_expression(expression)
+            self.last_compile_duration = time.perf_counter() - start_time
+            self._compile_count_for_test += 1
+            self.__compiled_code = compiled_code
+        else:
+            self.last_compile_duration = 0.0
+        return compiled_code[1]
+
     def __bind_variable(self, variable: ComputationVariable) -> None:
         def needs_update():
             self.needs_update = True
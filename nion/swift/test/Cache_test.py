@@ -1,15 +1,25 @@
 # standard libraries
+import contextlib
 import logging
+import os
+import pickle
+import shutil
+import sqlite3
 import unittest
 import uuid
 
 # third party libraries
-# None
+import numpy
 
 # local libraries
 from nion.swift.model import Cache
 
 
+class Target:
+    def __init__(self):
+        self.uuid = uuid.uuid4()
+
+
 class TestSuspendableCacheClass(unittest.TestCase):
 
     def setUp(self):
@@ -55,6 +65,255 @@ class TestSuspendableCacheClass(unittest.TestCase):
         suspendable_cache.spill_cache()
         self.assertTrue(suspendable_cache.get_cached_value(suspendable_cache, "key", False))
 
+
+class TestDbStorageCacheClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_write_behind_reads_see_pending_writes(self):
+        target = Target()
+        storage_cache = Cache.DbStorageCache(":memory:", flush_period=60.0)
+        with contextlib.closing(storage_cache):
+            storage_cache.set_cached_value(target, "key", 1, False)
+            storage_cache.set_cached_value(target, "key", 2, True)
+            self.assertEqual(storage_cache.get_cached_value(target, "key"), 2)
+            self.assertTrue(storage_cache.is_cached_value_dirty(target, "key"))
+            storage_cache.set_cached_value_dirty(target, "key", False)
+            self.assertFalse(storage_cache.is_cached_value_dirty(target, "key"))
+            storage_cache.flush()
+            self.assertEqual(storage_cache.get_cached_value(target, "key"), 2)
+            self.assertFalse(storage_cache.is_cached_value_dirty(target, "key"))
+            storage_cache.set_cached_value_dirty(target, "key", True)
+            self.assertTrue(storage_cache.is_cached_value_dirty(target, "key"))
+            storage_cache.remove_cached_value(target, "key")
+            self.assertIsNone(storage_cache.get_cached_value(target, "key"))
+            self.assertTrue(storage_cache.is_cached_value_dirty(target, "key"))
+            storage_cache.set_cached_value_dirty(target, "key", False)
+            self.assertTrue(storage_cache.is_cached_value_dirty(target, "key"))
+            storage_cache.flush()
+            self.assertIsNone(storage_cache.get_cached_value(target, "key"))
+            self.assertTrue(storage_cache.is_cached_value_dirty(target, "key"))
+
+    def test_write_behind_writes_are_stored_when_closed(self):
+        current_working_directory = os.getcwd()
+        cache_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(cache_dir)
+        try:
+            cache_path = os.path.join(cache_dir, "cache.nscache")
+            targets = [Target() for i in range(8)]
+            storage_cache = Cache.DbStorageCache(cache_path, flush_period=60.0, flush_count=4)
+            with contextlib.closing(storage_cache):
+                for i in range(100):
+                    for target in targets:
+                        storage_cache.set_cached_value(target, "key", i, False)
+                storage_cache.set_cached_value_dirty(targets[0], "key", True)
+                storage_cache.remove_cached_value(targets[1], "key")
+            storage_cache = Cache.DbStorageCache(cache_path)
+            with contextlib.closing(storage_cache):
+                self.assertTrue(storage_cache.is_cached_value_dirty(targets[0], "key"))
+                self.assertIsNone(storage_cache.get_cached_value(targets[1], "key"))
+                for target in targets[2:]:
+                    self.assertEqual(storage_cache.get_cached_value(target, "key"), 99)
+                    self.assertFalse(storage_cache.is_cached_value_dirty(target, "key"))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_library_storage_cache_keeps_values_in_memory_and_in_file(self):
+        current_working_directory = os.getcwd()
+        cache_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(cache_dir)
+        try:
+            cache_path = os.path.join(cache_dir, "cache.nscache")
+            target = Target()
+            storage_cache = Cache.make_library_storage_cache(cache_path)
+            with contextlib.closing(storage_cache):
+                self.assertIsInstance(storage_cache, Cache.LRUStorageCache)
+                storage_cache.set_cached_value(target, "key", 7)
+                self.assertEqual(storage_cache.get_cached_value(target, "key"), 7)
+                self.assertEqual(storage_cache.miss_count, 0)
+            storage_cache = Cache.make_library_storage_cache(cache_path)
+            with contextlib.closing(storage_cache):
+                self.assertEqual(storage_cache.get_cached_value(target, "key"), 7)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_cached_values_round_trip(self):
+        target = Target()
+        storage_cache = Cache.DbStorageCache(":memory:")
+        with contextlib.closing(storage_cache):
+            values = [numpy.arange(24, dtype=numpy.uint32).reshape((2, 3, 4)),
+                      numpy.linspace(0, 1, 16).astype(">f8")[::2],
+                      numpy.zeros((0, 4), numpy.complex64),
+                      numpy.array(3, numpy.int16),
+                      numpy.array(["a", "bc"]),
+                      {"calibration": [1.5, "nm"], "data": numpy.ones((2, 2))},
+                      "text", None]
+            for i, value in enumerate(values):
+                storage_cache.set_cached_value(target, str(i), value)
+            for i, value in enumerate(values):
+                cached_value = storage_cache.get_cached_value(target, str(i))
+                if isinstance(value, numpy.ndarray):
+                    self.assertEqual(cached_value.dtype, value.dtype)
+                    self.assertEqual(cached_value.shape, value.shape)
+                    self.assertTrue(numpy.array_equal(cached_value, value))
+                    cached_value[...] = value  # writable
+                elif isinstance(value, dict):
+                    self.assertEqual(cached_value["calibration"], value["calibration"])
+                    self.assertTrue(numpy.array_equal(cached_value["data"], value["data"]))
+                else:
+                    self.assertEqual(cached_value, value)
+
+    def test_cache_file_with_pickled_values_is_migrated(self):
+        current_working_directory = os.getcwd()
+        cache_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(cache_dir)
+        try:
+            cache_path = os.path.join(cache_dir, "cache.nscache")
+            target = Target()
+            thumbnail_data = numpy.arange(64, dtype=numpy.uint32).reshape((8, 8))
+            with contextlib.closing(sqlite3.connect(cache_path)) as conn:
+                with conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS cache(uuid STRING, key STRING, value BLOB, dirty INTEGER, PRIMARY KEY(uuid, key))")
+                    conn.execute("INSERT INTO cache (uuid, key, value, dirty) VALUES (?, ?, ?, ?)", (str(target.uuid), "thumbnail_data", sqlite3.Binary(pickle.dumps(thumbnail_data, 0)), 0))
+                    conn.execute("INSERT INTO cache (uuid, key, value, dirty) VALUES (?, ?, ?, ?)", (str(target.uuid), "statistics_data", sqlite3.Binary(pickle.dumps({"mean": 1.5}, 0)), 1))
+            storage_cache = Cache.DbStorageCache(cache_path)
+            with contextlib.closing(storage_cache):
+                self.assertTrue(numpy.array_equal(storage_cache.get_cached_value(target, "thumbnail_data"), thumbnail_data))
+                self.assertFalse(storage_cache.is_cached_value_dirty(target, "thumbnail_data"))
+                self.assertEqual(storage_cache.get_cached_value(target, "statistics_data"), {"mean": 1.5})
+                self.assertTrue(storage_cache.is_cached_value_dirty(target, "statistics_data"))
+            with contextlib.closing(sqlite3.connect(cache_path)) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM cache WHERE version=0").fetchone()[0], 0)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_get_cached_values_bulk_sees_stored_and_pending_values(self):
+        targets = [Target() for i in range(1200)]
+        storage_cache = Cache.DbStorageCache(":memory:", flush_period=60.0)
+        with contextlib.closing(storage_cache):
+            for i, target in enumerate(targets[:1000]):
+                storage_cache.set_cached_value(target, "key", i, i % 2 == 0)
+            storage_cache.flush()
+            storage_cache.set_cached_value(targets[1000], "key", 1000, False)
+            storage_cache.remove_cached_value(targets[0], "key")
+            storage_cache.set_cached_value_dirty(targets[1], "key", True)
+            storage_cache.set_cached_value_dirty(targets[1001], "key", False)
+            values = storage_cache.get_cached_values_bulk(targets, "key", -1)
+            self.assertEqual(values, [-1] + list(range(1, 1001)) + [-1] * 199)
+            entries = storage_cache.get_cached_entries_bulk(targets[0:3] + targets[1000:1002], ["key"])
+            self.assertEqual(entries[(targets[0].uuid, "key")], (None, True))
+            self.assertEqual(entries[(targets[1].uuid, "key")], (1, True))
+            self.assertEqual(entries[(targets[2].uuid, "key")], (2, True))
+            self.assertEqual(entries[(targets[1000].uuid, "key")], (1000, False))
+            self.assertEqual(entries[(targets[1001].uuid, "key")], (None, True))
+
+
+class TestLRUStorageCacheClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_lru_cache_counts_hits_and_misses(self):
+        target = Target()
+        storage_cache = Cache.DictStorageCache()
+        lru_cache = Cache.LRUStorageCache(storage_cache)
+        self.assertIsNone(lru_cache.get_cached_value(target, "key"))
+        self.assertTrue(lru_cache.is_cached_value_dirty(target, "key"))
+        self.assertEqual(lru_cache.miss_count, 2)
+        # missing values are remembered
+        self.assertEqual(lru_cache.get_cached_value(target, "key", 5), 5)
+        self.assertEqual(lru_cache.hit_count, 1)
+        lru_cache.set_cached_value(target, "key", 1, False)
+        self.assertEqual(storage_cache.get_cached_value(target, "key"), 1)
+        self.assertEqual(lru_cache.get_cached_value(target, "key"), 1)
+        self.assertFalse(lru_cache.is_cached_value_dirty(target, "key"))
+        self.assertEqual(lru_cache.hit_count, 3)
+        lru_cache.set_cached_value_dirty(target, "key")
+        self.assertTrue(lru_cache.is_cached_value_dirty(target, "key"))
+        self.assertTrue(storage_cache.is_cached_value_dirty(target, "key"))
+        lru_cache.remove_cached_value(target, "key")
+        self.assertIsNone(lru_cache.get_cached_value(target, "key"))
+        self.assertIsNone(storage_cache.get_cached_value(target, "key"))
+        self.assertEqual(lru_cache.miss_count, 2)
+
+    def test_lru_cache_evicts_least_recently_used_values_over_budget(self):
+        targets = [Target() for i in range(4)]
+        storage_cache = Cache.DictStorageCache()
+        lru_cache = Cache.LRUStorageCache(storage_cache, max_bytes=3 * 1024 + 512)
+        for target in targets[0:3]:
+            lru_cache.set_cached_value(target, "thumbnail_data", numpy.zeros((256, ), numpy.uint32))
+        self.assertEqual(lru_cache.eviction_count, 0)
+        lru_cache.get_cached_value(targets[0], "thumbnail_data")
+        lru_cache.set_cached_value(targets[3], "thumbnail_data", numpy.zeros((256, ), numpy.uint32))
+        self.assertEqual(lru_cache.eviction_count, 1)
+        self.assertLessEqual(lru_cache.byte_count, lru_cache.max_bytes)
+        hit_count = lru_cache.hit_count
+        lru_cache.get_cached_value(targets[0], "thumbnail_data")
+        self.assertEqual(lru_cache.hit_count, hit_count + 1)
+        miss_count = lru_cache.miss_count
+        self.assertIsNotNone(lru_cache.get_cached_value(targets[1], "thumbnail_data"))
+        self.assertEqual(lru_cache.miss_count, miss_count + 1)
+
+    def test_lru_cache_prefetch_loads_values_and_dirty_flags(self):
+        targets = [Target() for i in range(8)]
+        storage_cache = Cache.DictStorageCache()
+        for i, target in enumerate(targets[:6]):
+            storage_cache.set_cached_value(target, "thumbnail_data", numpy.full((4, 4), i, numpy.uint32), i == 0)
+        lru_cache = Cache.LRUStorageCache(storage_cache)
+        lru_cache.prefetch(targets, ["thumbnail_data"])
+        for i, target in enumerate(targets):
+            self.assertEqual(lru_cache.is_cached_value_dirty(target, "thumbnail_data"), i == 0 or i >= 6)
+            thumbnail_data = lru_cache.get_cached_value(target, "thumbnail_data")
+            if i < 6:
+                self.assertEqual(thumbnail_data[0, 0], i)
+            else:
+                self.assertIsNone(thumbnail_data)
+        self.assertEqual(lru_cache.miss_count, 0)
+        self.assertEqual(lru_cache.hit_count, 16)
+
+    def test_suspendable_cache_bulk_values_include_temporary_values(self):
+        targets = [Target() for i in range(4)]
+        lru_cache = Cache.LRUStorageCache(Cache.DictStorageCache())
+        suspendable_cache = Cache.SuspendableCache(lru_cache)
+        for i, target in enumerate(targets):
+            suspendable_cache.set_cached_value(target, "key", i)
+        suspendable_cache.suspend_cache()
+        suspendable_cache.set_cached_value(targets[1], "key", 11)
+        suspendable_cache.remove_cached_value(targets[2], "key")
+        self.assertEqual(suspendable_cache.get_cached_values_bulk(targets, "key"), [0, 11, None, 3])
+        suspendable_cache.spill_cache()
+        self.assertEqual(suspendable_cache.get_cached_values_bulk(targets, "key"), [0, 11, None, 3])
+
+    def test_shadow_cache_bulk_values_use_temporary_value_only_for_its_target(self):
+        targets = [Target() for i in range(3)]
+        storage_cache = Cache.DictStorageCache()
+        storage_cache.set_cached_value(targets[1], "key", 1)
+        shadow_cache = Cache.ShadowCache(targets[0])
+        shadow_cache.set_cached_value(targets[0], "key", 10)
+        self.assertEqual(shadow_cache.get_cached_values_bulk(targets, "key", -1), [10, -1, -1])
+        shadow_cache.set_storage_cache(storage_cache, targets[0])
+        self.assertEqual(shadow_cache.get_cached_values_bulk(targets, "key", -1), [10, 1, -1])
+
+    def test_lru_cache_works_behind_suspendable_cache(self):
+        target = Target()
+        lru_cache = Cache.LRUStorageCache(Cache.DictStorageCache())
+        suspendable_cache = Cache.SuspendableCache(lru_cache)
+        suspendable_cache.set_cached_value(target, "key", 999, False)
+        suspendable_cache.suspend_cache()
+        suspendable_cache.remove_cached_value(target, "key")
+        self.assertEqual(lru_cache.get_cached_value(target, "key"), 999)
+        self.assertIsNone(suspendable_cache.get_cached_value(target, "key"))
+        suspendable_cache.spill_cache()
+        self.assertIsNone(lru_cache.get_cached_value(target, "key"))
+
+
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,66 @@
+# standard libraries
+import contextlib
+import logging
+import threading
+import unittest
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.data import Calibration
+from nion.data import DataAndMetadata
+from nion.swift.model import ComputationProcessPool
+
+
+class Target:
+    def __init__(self):
+        self.xdata = None
+
+
+class Source:
+    def __init__(self, xdata):
+        self.xdata = xdata
+
+
+@unittest.skipUnless(ComputationProcessPool.is_available(), "requires shared memory")
+class TestComputationProcessPoolClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_execute_code_sets_result_xdata_on_target(self):
+        with contextlib.closing(ComputationProcessPool.ComputationProcessPool(1)) as process_pool:
+            d = numpy.arange(12, dtype=numpy.float32).reshape(3, 4)
+            xdata = DataAndMetadata.new_data_and_metadata(d, intensity_calibration=Calibration.Calibration(units="e"))
+            target = Target()
+            error_text = process_pool.execute_code("target.xdata = src.xdata * x", target, {"src": Source(xdata), "x": 2})
+            self.assertIsNone(error_text)
+            self.assertTrue(numpy.array_equal(target.xdata.data, d * 2))
+            self.assertEqual(target.xdata.data_dtype, numpy.float32)
+            self.assertEqual(target.xdata.intensity_calibration.units, "e")
+
+    def test_execute_code_returns_error_text_when_script_fails(self):
+        with contextlib.closing(ComputationProcessPool.ComputationProcessPool(1)) as process_pool:
+            target = Target()
+            error_text = process_pool.execute_code("target.xdata = undefined_name", target, dict())
+            self.assertTrue(error_text)
+            self.assertIsNone(target.xdata)
+
+    def test_execute_code_does_not_set_result_when_cancelled(self):
+        with contextlib.closing(ComputationProcessPool.ComputationProcessPool(1)) as process_pool:
+            xdata = DataAndMetadata.new_data_and_metadata(numpy.zeros((4, 4)))
+            target = Target()
+            cancel_event = threading.Event()
+            cancel_event.set()
+            error_text = process_pool.execute_code("import time\ntime.sleep(0.5)\ntarget.xdata = src.xdata", target, {"src": Source(xdata)}, cancel_event)
+            self.assertIsNone(error_text)
+            self.assertIsNone(target.xdata)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
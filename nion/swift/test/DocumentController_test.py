@@ -527,6 +527,24 @@ class TestDocumentControllerClass(unittest.TestCase):
             data_item = document_model.get_crop_new(source_data_item, None)
             self.assertIsNotNone(data_item)
 
+    def test_processing_batch_applies_processing_to_each_selected_data_item(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            data_item1 = DataItem.DataItem(numpy.ones((8, 8), numpy.float32))
+            data_item2 = DataItem.DataItem(numpy.full((8, 8), 2, numpy.float32))
+            document_model.append_data_item(data_item1)
+            document_model.append_data_item(data_item2)
+            document_controller.periodic()
+            data_panel = document_controller.find_dock_widget("data-panel").panel
+            data_panel.focused = True
+            document_controller.selection.set_multiple([0, 1])
+            document_controller.periodic()
+            new_data_items = document_controller.processing_batch("invert")
+            self.assertEqual(len(new_data_items), 2)
+            self.assertEqual(len(document_model.data_items), 4)
+            self.assertEqual({data_item.data[0, 0] for data_item in new_data_items}, {-1, -2})
+
     def test_processing_duplicate_does_copy(self):
         document_model = DocumentModel.DocumentModel()
         data_item = DataItem.DataItem(numpy.ones((8, 8), numpy.float32))
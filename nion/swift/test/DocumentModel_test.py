@@ -1,14 +1,17 @@
 # standard libraries
+import asyncio
 import contextlib
 import copy
 import gc
 import random
+import threading
 import unittest
 
 # third party libraries
 import numpy
 
 # local libraries
+from nion.data import DataAndMetadata
 from nion.swift import Application
 from nion.swift import Facade
 from nion.swift.model import Cache
@@ -185,6 +188,443 @@ class TestDocumentModelClass(unittest.TestCase):
             document_model.perform_data_item_merges()
             self.assertTrue(numpy.array_equal(computed_data_item.data, d + 10))
 
+    def test_recompute_writing_xdata_does_not_clone_target(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            d = numpy.zeros((2, 2), numpy.int)
+            data_item = DataItem.DataItem(d)
+            document_model.append_data_item(data_item)
+            computation = document_model.create_computation(Symbolic.xdata_expression("a.xdata + x"))
+            computation.create_object("a", document_model.get_object_specifier(data_item))
+            computation.create_variable("x", value_type="integral", value=5)
+            computed_data_item = DataItem.DataItem(d)
+            document_model.append_data_item(computed_data_item)
+            clone = DataItem.DataItem.clone
+            def clone_not_allowed(data_item):
+                raise Exception("clone not allowed")
+            DataItem.DataItem.clone = clone_not_allowed
+            try:
+                document_model.set_data_item_computation(computed_data_item, computation)
+                document_model.recompute_all()
+            finally:
+                DataItem.DataItem.clone = clone
+            self.assertTrue(numpy.array_equal(computed_data_item.data, d + 5))
+
+    def test_recompute_merges_target_property_changes(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            d = numpy.zeros((2, 2), numpy.int)
+            data_item = DataItem.DataItem(d)
+            document_model.append_data_item(data_item)
+            computation = document_model.create_computation("target.xdata = a.xdata + 1\ntarget.title = 'computed'")
+            computation.create_object("a", document_model.get_object_specifier(data_item))
+            computed_data_item = DataItem.DataItem(d)
+            document_model.append_data_item(computed_data_item)
+            document_model.set_data_item_computation(computed_data_item, computation)
+            document_model.recompute_all(merge=False)
+            self.assertNotEqual(computed_data_item.title, "computed")
+            document_model.perform_data_item_merges()
+            self.assertEqual(computed_data_item.title, "computed")
+            self.assertTrue(numpy.array_equal(computed_data_item.data, d + 1))
+
+    def test_memoized_computation_is_not_evaluated_again_for_same_inputs(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+            document_model.append_data_item(data_item)
+            fft_data_item = document_model.get_fft_new(data_item)
+            document_model.recompute_all()
+            computation = fft_data_item.computation
+            fft_data = numpy.copy(fft_data_item.data)
+            evaluation_count = computation._evaluation_count_for_test
+            computation.needs_update = True
+            computation.computation_mutated_event.fire()
+            document_model.recompute_all()
+            self.assertEqual(computation._evaluation_count_for_test - evaluation_count, 0)
+            self.assertFalse(computation.needs_update)
+            self.assertTrue(numpy.array_equal(fft_data_item.data, fft_data))
+
+    def test_memoized_computation_is_evaluated_when_source_data_changes(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+            document_model.append_data_item(data_item)
+            fft_data_item = document_model.get_fft_new(data_item)
+            document_model.recompute_all()
+            computation = fft_data_item.computation
+            evaluation_count = computation._evaluation_count_for_test
+            data_item.set_data(numpy.random.randn(8, 8))
+            document_model.recompute_all()
+            self.assertEqual(computation._evaluation_count_for_test - evaluation_count, 1)
+
+    def test_computation_without_memoize_is_evaluated_again_for_same_inputs(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+            document_model.append_data_item(data_item)
+            crop_data_item = document_model.get_crop_new(data_item)
+            document_model.recompute_all()
+            computation = crop_data_item.computation
+            evaluation_count = computation._evaluation_count_for_test
+            computation.needs_update = True
+            computation.computation_mutated_event.fire()
+            document_model.recompute_all()
+            self.assertEqual(computation._evaluation_count_for_test - evaluation_count, 1)
+
+    def test_isolatable_computation_in_process_pool_produces_same_data_as_on_thread(self):
+        sequence_data = numpy.random.randn(4, 16, 16)
+        xdata = DataAndMetadata.new_data_and_metadata(sequence_data, data_descriptor=DataAndMetadata.DataDescriptor(True, 0, 2))
+        results = list()
+        computation_process_count = DocumentModel.DocumentModel.computation_process_count
+        try:
+            for process_count in (0, 1):
+                DocumentModel.DocumentModel.computation_process_count = process_count
+                document_model = DocumentModel.DocumentModel()
+                with contextlib.closing(document_model):
+                    data_item = DataItem.new_data_item(xdata)
+                    document_model.append_data_item(data_item)
+                    shifts_data_item = document_model.get_sequence_measure_shifts_new(data_item)
+                    document_model.recompute_all()
+                    self.assertIsNone(shifts_data_item.computation.error_text)
+                    results.append(numpy.copy(shifts_data_item.data))
+        finally:
+            DocumentModel.DocumentModel.computation_process_count = computation_process_count
+        self.assertTrue(numpy.array_equal(results[0], results[1]))
+
+    def __update_sub_area_and_recompute(self, document_model, data_item, sub_area, f):
+        data = numpy.copy(data_item.data)
+        (top, left), (height, width) = sub_area
+        data[top:top + height, left:left + width] = f(data[top:top + height, left:left + width])
+        document_model.update_data_item_xdata(data_item, DataAndMetadata.new_data_and_metadata(data), sub_area)
+        finished_computation_queue_items = list()
+        listener = document_model.computation_finished_event.listen(finished_computation_queue_items.append)
+        with contextlib.closing(listener):
+            document_model.recompute_all()
+        return data, finished_computation_queue_items
+
+    def test_pointwise_computation_updates_only_changed_sub_area_of_source(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(16, 16))
+            document_model.append_data_item(data_item)
+            inverted_data_item = document_model.get_invert_new(data_item)
+            document_model.recompute_all()
+            data, finished_computation_queue_items = self.__update_sub_area_and_recompute(document_model, data_item, ((2, 3), (4, 5)), lambda d: d + 1)
+            self.assertTrue(finished_computation_queue_items[0].is_incremental)
+            self.assertFalse(inverted_data_item.computation.needs_update)
+            self.assertTrue(numpy.array_equal(inverted_data_item.data, -data))
+
+    def test_sum_computation_updates_only_changed_sub_area_of_source(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(16, 16))
+            document_model.append_data_item(data_item)
+            sum_data_item = document_model.get_projection_new(data_item)
+            document_model.recompute_all()
+            for sub_area in (((2, 3), (4, 5)), ((8, 0), (2, 16))):
+                data, finished_computation_queue_items = self.__update_sub_area_and_recompute(document_model, data_item, sub_area, lambda d: d * 2)
+                self.assertTrue(finished_computation_queue_items[0].is_incremental)
+                self.assertTrue(numpy.allclose(sum_data_item.data, numpy.sum(data, 0)))
+
+    def test_mask_sum_computation_updates_only_changed_sub_area_of_source(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            xdata = DataAndMetadata.new_data_and_metadata(numpy.random.randn(8, 8, 12), data_descriptor=DataAndMetadata.DataDescriptor(False, 2, 1))
+            data_item = DataItem.new_data_item(xdata)
+            document_model.append_data_item(data_item)
+            pick_region = Graphics.RectangleGraphic()
+            pick_region.bounds = (0.25, 0.25), (0.5, 0.5)
+            data_item.displays[0].add_graphic(pick_region)
+            pick_data_item = document_model.get_pick_region_new(data_item, pick_region=pick_region)
+            document_model.recompute_all()
+            data = numpy.copy(data_item.data)
+            data[1:4, 1:4] += 1
+            document_model.update_data_item_xdata(data_item, DataAndMetadata.new_data_and_metadata(data, data_descriptor=xdata.data_descriptor), ((1, 1), (3, 3)))
+            finished_computation_queue_items = list()
+            listener = document_model.computation_finished_event.listen(finished_computation_queue_items.append)
+            with contextlib.closing(listener):
+                document_model.recompute_all()
+            self.assertTrue(finished_computation_queue_items[0].is_incremental)
+            self.assertTrue(numpy.allclose(pick_data_item.data, numpy.sum(data[pick_region.get_mask((8, 8)).astype(bool)], 0)))
+
+    def test_incremental_computation_evaluates_fully_when_changed_area_is_not_known(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(16, 16))
+            document_model.append_data_item(data_item)
+            inverted_data_item = document_model.get_invert_new(data_item)
+            document_model.recompute_all()
+            data = numpy.random.randn(16, 16)
+            document_model.update_data_item_xdata(data_item, DataAndMetadata.new_data_and_metadata(numpy.copy(data)), ((0, 0), (2, 2)))
+            document_model.update_data_item_xdata(data_item, DataAndMetadata.new_data_and_metadata(data))
+            finished_computation_queue_items = list()
+            listener = document_model.computation_finished_event.listen(finished_computation_queue_items.append)
+            with contextlib.closing(listener):
+                document_model.recompute_all()
+            self.assertFalse(finished_computation_queue_items[0].is_incremental)
+            self.assertTrue(numpy.array_equal(inverted_data_item.data, -data))
+
+    def test_computation_profile_records_timings_of_each_computation(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+            document_model.append_data_item(data_item)
+            fft_data_item = document_model.get_fft_new(data_item)
+            crop_data_item = document_model.get_crop_new(data_item)
+            document_model.recompute_all()
+            fft_data_item.computation.needs_update = True
+            fft_data_item.computation.computation_mutated_event.fire()
+            document_model.recompute_all()
+            records = {record["data_item_uuid"]: record for record in document_model.computation_profile.get_records()}
+            fft_record = records[str(fft_data_item.uuid)]
+            self.assertEqual(fft_record["computation_count"], 2)
+            self.assertEqual(fft_record["memoized_count"], 1)
+            self.assertEqual(fft_record["evaluate_duration"]["count"], 1)
+            self.assertEqual(fft_record["compute_duration"]["count"], 2)
+            self.assertEqual(fft_record["queue_latency"]["count"], 2)
+            self.assertEqual(fft_record["merge_duration"]["count"], 2)
+            self.assertEqual(fft_record["result_nbytes"], fft_data_item.data.nbytes)
+            self.assertEqual(records[str(crop_data_item.uuid)]["processing_id"], "crop")
+            self.assertGreaterEqual(fft_record["compute_duration"]["total"], fft_record["evaluate_duration"]["total"])
+
+    def test_batch_computations_are_evaluated_without_queue(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_items = list()
+            for i in range(4):
+                data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+                document_model.append_data_item(data_item)
+                data_items.append(data_item)
+            blurred_data_items = document_model.make_data_items_with_computation("gaussian-blur", [[(data_item, None)] for data_item in data_items])
+            self.assertEqual(document_model.computation_queue_depth, 0)
+            self.assertEqual(len(blurred_data_items), 4)
+            blurred_data_item = document_model.get_gaussian_blur_new(data_items[2])
+            document_model.recompute_all()
+            self.assertTrue(numpy.array_equal(blurred_data_items[2].data, blurred_data_item.data))
+            for data_item, blurred_data_item in zip(data_items, blurred_data_items):
+                self.assertIsNone(blurred_data_item.computation.error_text)
+                self.assertFalse(blurred_data_item.computation.needs_update)
+                self.assertEqual(document_model.get_source_data_items(blurred_data_item), [data_item])
+
+    def test_batch_computations_skip_unsuitable_inputs(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item1 = DataItem.DataItem(numpy.random.randn(8))
+            data_item2 = DataItem.DataItem(numpy.random.randn(8, 8))
+            document_model.append_data_item(data_item1)
+            document_model.append_data_item(data_item2)
+            summed_data_items = document_model.make_data_items_with_computation("sum", [[(data_item1, None)], [(data_item2, None)]])
+            self.assertIsNone(summed_data_items[0])
+            self.assertTrue(numpy.allclose(summed_data_items[1].data, numpy.sum(data_item2.data, 0)))
+            self.assertEqual(len(document_model.data_items), 3)
+
+    def test_recompute_runs_source_computation_before_queued_target(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            d = numpy.zeros((2, 2), numpy.int)
+            data_item = DataItem.DataItem(d)
+            document_model.append_data_item(data_item)
+            data_items = [data_item]
+            variables = list()
+            for i in range(2):
+                computation = document_model.create_computation(Symbolic.xdata_expression("a.xdata + x"))
+                computation.create_object("a", document_model.get_object_specifier(data_items[-1]))
+                variables.append(computation.create_variable("x", value_type="integral", value=1))
+                computed_data_item = DataItem.DataItem(d)
+                document_model.append_data_item(computed_data_item)
+                document_model.set_data_item_computation(computed_data_item, computation)
+                data_items.append(computed_data_item)
+            document_model.recompute_all()
+            document_model.recompute_all()
+            self.assertEqual(document_model.computation_queue_depth, 0)
+            finished_computation_queue_items = list()
+            listener = document_model.computation_finished_event.listen(finished_computation_queue_items.append)
+            with contextlib.closing(listener):
+                # queue the target first, then its source
+                variables[1].value = 10
+                variables[0].value = 5
+                self.assertEqual(document_model.computation_queue_depth, 2)
+                document_model.recompute_one()
+                self.assertEqual([item.data_item for item in finished_computation_queue_items], [data_items[1]])
+                self.assertGreaterEqual(finished_computation_queue_items[0].queue_latency, 0.0)
+                self.assertGreaterEqual(finished_computation_queue_items[0].compute_duration, 0.0)
+                document_model.recompute_all()
+                document_model.recompute_all()
+            self.assertTrue(numpy.array_equal(data_items[2].data, d + 15))
+
+    def test_independent_computations_run_in_parallel(self):
+        computation_thread_count = DocumentModel.DocumentModel.computation_thread_count
+        recompute = DocumentModel.ComputationQueueItem.recompute
+        barrier = threading.Barrier(2, timeout=10.0)
+        def recompute_in_parallel(computation_queue_item):
+            barrier.wait()
+            return recompute(computation_queue_item)
+        DocumentModel.DocumentModel.computation_thread_count = 2
+        DocumentModel.ComputationQueueItem.recompute = recompute_in_parallel
+        try:
+            document_model = DocumentModel.DocumentModel()
+            with contextlib.closing(document_model):
+                finished_event = threading.Event()
+                finished_computation_queue_items = list()
+                def computation_finished(computation_queue_item):
+                    finished_computation_queue_items.append(computation_queue_item)
+                    if len(finished_computation_queue_items) == 2:
+                        finished_event.set()
+                listener = document_model.computation_finished_event.listen(computation_finished)
+                with contextlib.closing(listener):
+                    document_model.start_dispatcher()
+                    for i in range(2):
+                        data_item = DataItem.DataItem(numpy.zeros((2, 2)))
+                        document_model.append_data_item(data_item)
+                        document_model.get_invert_new(data_item)
+                    self.assertTrue(finished_event.wait(10.0))
+                self.assertFalse(barrier.broken)
+        finally:
+            DocumentModel.DocumentModel.computation_thread_count = computation_thread_count
+            DocumentModel.ComputationQueueItem.recompute = recompute
+
+    def test_superseded_computation_is_cancelled_and_not_merged(self):
+        recompute = DocumentModel.ComputationQueueItem.recompute
+        started_event = threading.Event()
+        def recompute_and_signal(computation_queue_item):
+            started_event.set()
+            return recompute(computation_queue_item)
+        DocumentModel.ComputationQueueItem.recompute = recompute_and_signal
+        try:
+            document_model = DocumentModel.DocumentModel()
+            with contextlib.closing(document_model):
+                d = numpy.zeros((2, 2), numpy.int)
+                data_item = DataItem.DataItem(d)
+                document_model.append_data_item(data_item)
+                # the first evaluation only finishes when it is cancelled
+                computation = document_model.create_computation("if x == 5: cancel_event.wait(10.0)\ntarget.xdata = a.xdata + x")
+                computation.create_object("a", document_model.get_object_specifier(data_item))
+                x = computation.create_variable("x", value_type="integral", value=5)
+                computed_data_item = DataItem.DataItem(d)
+                document_model.append_data_item(computed_data_item)
+                finished_event = threading.Event()
+                finished_computation_queue_items = list()
+                def computation_finished(computation_queue_item):
+                    finished_computation_queue_items.append(computation_queue_item)
+                    if len(finished_computation_queue_items) == 2:
+                        finished_event.set()
+                listener = document_model.computation_finished_event.listen(computation_finished)
+                with contextlib.closing(listener):
+                    document_model.start_dispatcher()
+                    document_model.set_data_item_computation(computed_data_item, computation)
+                    self.assertTrue(started_event.wait(5.0))
+                    x.value = 10
+                    self.assertTrue(finished_event.wait(5.0))
+                self.assertTrue(finished_computation_queue_items[0].is_cancelled)
+                self.assertFalse(finished_computation_queue_items[1].is_cancelled)
+                document_model.perform_data_item_merges()
+                self.assertTrue(numpy.array_equal(computed_data_item.data, d + 10))
+        finally:
+            DocumentModel.ComputationQueueItem.recompute = recompute
+
+    def test_wait_for_computations_returns_after_results_are_merged(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            event_loop = asyncio.new_event_loop()
+            try:
+                document_model.start_dispatcher()
+                data_items = list()
+                inverted_data_items = list()
+                for i in range(3):
+                    data_item = DataItem.DataItem(numpy.random.randn(4, 4))
+                    document_model.append_data_item(data_item)
+                    data_items.append(data_item)
+                    inverted_data_items.append(document_model.get_invert_new(data_item))
+                result = event_loop.run_until_complete(asyncio.wait_for(document_model.wait_for_computations(event_loop, inverted_data_items), 5.0))
+                self.assertEqual(result, inverted_data_items)
+                for data_item, inverted_data_item in zip(data_items, inverted_data_items):
+                    self.assertTrue(numpy.array_equal(inverted_data_item.data, -data_item.data))
+                # the computation is up to date, so waiting returns without a computation
+                evaluation_count = inverted_data_items[0].computation._evaluation_count_for_test
+                event_loop.run_until_complete(asyncio.wait_for(document_model.get_computation_future(event_loop, inverted_data_items[0]), 5.0))
+                self.assertEqual(inverted_data_items[0].computation._evaluation_count_for_test, evaluation_count)
+                # a change to the source is waited for
+                data_items[0].set_data(numpy.ones((4, 4)))
+                event_loop.run_until_complete(asyncio.wait_for(document_model.recompute_immediate(event_loop, inverted_data_items[0]), 5.0))
+                self.assertTrue(numpy.array_equal(inverted_data_items[0].data, -numpy.ones((4, 4))))
+            finally:
+                event_loop.close()
+
+    def test_computation_target_returns_read_only_data_until_written(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.ones((4, 4)))
+            document_model.append_data_item(data_item)
+            target = DocumentModel.ComputationTarget(None, data_item)
+            self.assertTrue(numpy.array_equal(target.xdata.data, numpy.ones((4, 4))))
+            self.assertFalse(target.data.flags.writeable)
+            with self.assertRaises(ValueError):
+                target.data[0, 0] = 2
+            self.assertTrue(numpy.array_equal(data_item.data, numpy.ones((4, 4))))
+            target.data = numpy.zeros((4, 4))
+            self.assertTrue(target.data.flags.writeable)
+            self.assertTrue(numpy.array_equal(data_item.data, numpy.ones((4, 4))))
+
+    def test_computation_future_does_not_wait_for_computation_that_is_not_queued(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            event_loop = asyncio.new_event_loop()
+            try:
+                document_model.start_dispatcher()
+                data_item = DataItem.DataItem(numpy.random.randn(4, 4))
+                document_model.append_data_item(data_item)
+                inverted_data_item = document_model.get_invert_new(data_item)
+                event_loop.run_until_complete(asyncio.wait_for(document_model.get_computation_future(event_loop, inverted_data_item), 5.0))
+                # needing an update without anything queued (unbound inputs, for instance) never finishes
+                inverted_data_item.computation.needs_update = True
+                result = event_loop.run_until_complete(asyncio.wait_for(document_model.get_computation_future(event_loop, inverted_data_item), 5.0))
+                self.assertEqual(result, inverted_data_item)
+            finally:
+                event_loop.close()
+
+    def test_computation_future_is_cancelled_when_data_item_or_computation_is_removed(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            event_loop = asyncio.new_event_loop()
+            try:
+                # the dispatcher is not started, so the computations stay queued
+                data_item = DataItem.DataItem(numpy.random.randn(4, 4))
+                document_model.append_data_item(data_item)
+                inverted_data_item1 = document_model.get_invert_new(data_item)
+                inverted_data_item2 = document_model.get_invert_new(data_item)
+                future1 = document_model.get_computation_future(event_loop, inverted_data_item1)
+                future2 = document_model.get_computation_future(event_loop, inverted_data_item2)
+                document_model.remove_data_item(inverted_data_item1)
+                document_model.set_data_item_computation(inverted_data_item2, None)
+                event_loop.run_until_complete(asyncio.wait_for(asyncio.wait([future1, future2]), 5.0))
+                self.assertTrue(future1.cancelled())
+                self.assertTrue(future2.cancelled())
+            finally:
+                event_loop.close()
+
+    def test_computation_future_waits_for_batch_computations(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            event_loop = asyncio.new_event_loop()
+            try:
+                data_items = list()
+                for i in range(2):
+                    data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+                    document_model.append_data_item(data_item)
+                    data_items.append(data_item)
+                futures = list()
+                def computation_updated(data_item, computation):
+                    if computation and not futures:
+                        futures.append(document_model.get_computation_future(event_loop, data_item))
+                with contextlib.closing(document_model.computation_updated_event.listen(computation_updated)):
+                    inverted_data_items = document_model.make_data_items_with_computation("invert", [[(data_item, None)] for data_item in data_items])
+                self.assertEqual(len(futures), 1)
+                result = event_loop.run_until_complete(asyncio.wait_for(futures[0], 5.0))
+                self.assertEqual(result, inverted_data_items[0])
+                self.assertTrue(numpy.array_equal(inverted_data_items[0].data, -data_items[0].data))
+            finally:
+                event_loop.close()
+
     def test_data_item_recording(self):
         data_item = DataItem.DataItem(numpy.zeros((16, 16)))
         data_item_recorder = Recorder.Recorder(data_item)
@@ -13,6 +13,7 @@ from nion.swift import Facade
 from nion.swift.model import DocumentModel
 from nion.swift.model import DataItem
 from nion.swift.model import Graphics
+from nion.swift.model import HardwareSource
 from nion.ui import TestUI
 from nion.utils import Geometry
 
@@ -75,6 +76,51 @@ class TestFacadeClass(unittest.TestCase):
             self.assertEqual(api.library, api.library)
             self.assertEqual(api.library.data_items, api.library.data_items)
 
+    def test_library_reports_computation_profile(self):
+        memory_persistent_storage_system = DocumentModel.MemoryStorageSystem()
+        document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
+        document_controller = self.app.create_document_controller(document_model, "library")
+        with contextlib.closing(document_controller):
+            data_item = DataItem.DataItem(numpy.zeros((8, 8)))
+            document_model.append_data_item(data_item)
+            api = Facade.get_api("~1.0", "~1.0")
+            self.assertEqual(len(api.library.get_computation_profile()), 0)
+            document_model.computation_profile.record_merge(data_item, 0.5)
+            computation_profile = api.library.get_computation_profile()
+            self.assertEqual(len(computation_profile), 1)
+            self.assertEqual(computation_profile[0]["data_item_uuid"], str(data_item.uuid))
+            self.assertEqual(computation_profile[0]["merge_duration"]["count"], 1)
+            self.assertEqual(computation_profile[0]["merge_duration"]["total"], 0.5)
+            api.library.reset_computation_profile()
+            self.assertEqual(len(api.library.get_computation_profile()), 0)
+
+    def test_library_returns_data_channel_update_counts(self):
+        HardwareSource.HardwareSourceManager()._reset()
+        memory_persistent_storage_system = DocumentModel.MemoryStorageSystem()
+        document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
+        document_controller = self.app.create_document_controller(document_model, "library")
+        with contextlib.closing(document_controller):
+            hardware_source = HardwareSource.HardwareSource("update_counts", "Update Counts")
+            hardware_source.add_data_channel()
+            HardwareSource.HardwareSourceManager().register_hardware_source(hardware_source)
+            try:
+                data_channel = hardware_source.data_channels[0]
+                data_channel.start()
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.zeros((4, 4))), "complete", None, None)
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.ones((4, 4))), "complete", None, None)
+                document_controller.periodic()
+                api = Facade.get_api("~1.0", "~1.0")
+                update_counts = api.library.get_data_channel_update_counts()
+                self.assertEqual(len(update_counts), 1)
+                self.assertEqual(update_counts[0]["hardware_source_id"], "update_counts")
+                self.assertEqual(update_counts[0]["produced_count"], 2)
+                self.assertEqual(update_counts[0]["displayed_count"], 1)
+                self.assertEqual(update_counts[0]["dropped_count"], 1)
+                api.library.reset_data_channel_update_counts()
+                self.assertEqual(len(api.library.get_data_channel_update_counts()), 0)
+            finally:
+                HardwareSource.HardwareSourceManager().close()
+
     def test_graphic_is_invalid_if_source_is_removed(self):
         document_model = DocumentModel.DocumentModel()
         document_controller = self.app.create_document_controller(document_model, "library")
@@ -731,6 +731,124 @@ class TestHardwareSourceClass(unittest.TestCase):
             self.assertAlmostEqual(data[0, 0], 1.0)
             self.assertAlmostEqual(data[128, 0], 16.0)
 
+    def test_data_channel_partial_updates_produce_read_only_frames_that_stay_unchanged(self):
+        hardware_source = HardwareSource.HardwareSource("frame_pool", "Frame Pool")
+        data_channel = HardwareSource.DataChannel(hardware_source, 0)
+        data = numpy.zeros((8, 8))
+        data_channel.update(DataAndMetadata.new_data_and_metadata(data), "partial", None, None)
+        frames = [data_channel.data_and_metadata]
+        for i in range(8):
+            data = numpy.copy(data)
+            data[i, :] = i + 1
+            data_channel.update(DataAndMetadata.new_data_and_metadata(data), "partial", ((i, 0), (1, 8)), None)
+            self.assertEqual(data_channel.updated_sub_area, ((i, 0), (1, 8)) if i < 7 else ((7, 0), (1, 8)))
+            self.assertTrue(numpy.array_equal(data_channel.data_and_metadata.data, data))
+            self.assertFalse(data_channel.data_and_metadata.data.flags.writeable)
+            frames.append(data_channel.data_and_metadata)
+        # frames still referenced are never reused
+        for i, frame in enumerate(frames):
+            self.assertTrue(numpy.array_equal(frame.data[:i], numpy.arange(1, i + 1)[:, numpy.newaxis] * numpy.ones((1, 8))))
+            self.assertTrue(numpy.array_equal(frame.data[i:], numpy.zeros((8 - i, 8))))
+
+    def test_data_channel_reuses_frame_buffers_once_released(self):
+        hardware_source = HardwareSource.HardwareSource("frame_pool", "Frame Pool")
+        data_channel = HardwareSource.DataChannel(hardware_source, 0)
+        buffer_addresses = set()
+        for i in range(16):
+            data = numpy.full((8, 8), i)
+            data_channel.update(DataAndMetadata.new_data_and_metadata(data), "partial", ((i % 8, 0), (1, 8)), None)
+            buffer_addresses.add(data_channel.data_and_metadata.data.__array_interface__["data"][0])
+            self.assertTrue(numpy.array_equal(data_channel.data_and_metadata.data[i % 8], data[i % 8]))
+        self.assertLessEqual(len(buffer_addresses), 2)
+
+    def test_frame_buffer_is_not_reused_while_a_view_of_its_frame_remains(self):
+        frame_buffer_pool = HardwareSource.FrameBufferPool()
+        frame = frame_buffer_pool.update(numpy.full((4, 4), 1))
+        self.assertFalse(frame.flags.writeable)
+        row = frame[1]
+        del frame
+        frame_buffer_pool.update(numpy.full((4, 4), 2))
+        frame = frame_buffer_pool.update(numpy.full((4, 4), 3))
+        # the row keeps the first buffer leased, so the third frame uses a new buffer
+        self.assertTrue(numpy.array_equal(row, numpy.full((4, ), 1)))
+        del row, frame
+        frame_buffer_pool.update(numpy.full((4, 4), 4))
+        frame = frame_buffer_pool.update(numpy.full((4, 4), 5))
+        self.assertTrue(numpy.array_equal(frame, numpy.full((4, 4), 5)))
+
+    def test_data_channel_frames_do_not_share_metadata_with_updates(self):
+        hardware_source = HardwareSource.HardwareSource("frame_pool", "Frame Pool")
+        data_channel = HardwareSource.DataChannel(hardware_source, 0)
+        metadata = {"hardware_source": {"exposure": 1.0}, "nested": {"values": [1, 2]}}
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.zeros((4, 4)), metadata=metadata), "complete", None, None)
+        frame_metadata = data_channel.data_and_metadata.metadata
+        metadata["nested"]["values"].append(3)
+        metadata["hardware_source"]["exposure"] = 2.0
+        self.assertEqual(frame_metadata["nested"]["values"], [1, 2])
+        self.assertEqual(frame_metadata["hardware_source"]["exposure"], 1.0)
+        self.assertNotIn("channel_index", metadata["hardware_source"])
+
+    def test_data_channel_buffer_grabs_earliest_in_order_and_counts_overflow(self):
+        hardware_source = HardwareSource.HardwareSource("ring", "Ring")
+        data_channel = HardwareSource.DataChannel(hardware_source, 0)
+        data_channel.start()
+        data_channel_buffer = HardwareSource.DataChannelBuffer([data_channel], 4)
+        with contextlib.closing(data_channel_buffer):
+            data_channel_buffer.start()
+            for i in range(6):
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i), metadata={"index": i}), "complete", None, None)
+            self.assertEqual(data_channel_buffer.overflow_count, 2)
+            for i in range(2, 6):
+                data_and_metadata = data_channel_buffer.grab_earliest()[0]
+                self.assertTrue(numpy.array_equal(data_and_metadata.data, numpy.full((4, 4), i)))
+                self.assertEqual(data_and_metadata.metadata["index"], i)
+            self.assertEqual(data_channel_buffer.drop_count, 0)
+            with self.assertRaises(Exception):
+                data_channel_buffer.grab_earliest(timeout=0.01)
+
+    def test_data_channel_buffer_grabs_latest_as_view_or_copy_and_counts_drops(self):
+        hardware_source = HardwareSource.HardwareSource("ring", "Ring")
+        data_channel = HardwareSource.DataChannel(hardware_source, 0)
+        data_channel.start()
+        data_channel_buffer = HardwareSource.DataChannelBuffer([data_channel], 4)
+        with contextlib.closing(data_channel_buffer):
+            data_channel_buffer.start()
+            for i in range(3):
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i)), "complete", None, None)
+            view = data_channel_buffer.grab_latest(copy=False)[0]
+            self.assertEqual(data_channel_buffer.drop_count, 2)
+            self.assertFalse(view.data.flags.writeable)
+            self.assertTrue(numpy.array_equal(view.data, numpy.full((4, 4), 2)))
+            data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), 3)), "complete", None, None)
+            copied = data_channel_buffer.grab_latest()[0]
+            self.assertTrue(copied.data.flags.writeable)
+            self.assertEqual(data_channel_buffer.nbytes, 4 * view.data.nbytes)
+            # the view refers to the ring; the copy does not
+            for i in range(4, 8):
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i)), "complete", None, None)
+            self.assertTrue(numpy.array_equal(view.data, numpy.full((4, 4), 6)))
+            self.assertTrue(numpy.array_equal(copied.data, numpy.full((4, 4), 3)))
+
+    def test_data_channel_buffer_grab_next_waits_for_frame_from_other_thread(self):
+        hardware_source = HardwareSource.HardwareSource("ring", "Ring")
+        data_channel = HardwareSource.DataChannel(hardware_source, 0)
+        data_channel.start()
+        data_channel_buffer = HardwareSource.DataChannelBuffer([data_channel], 4)
+        with contextlib.closing(data_channel_buffer):
+            data_channel_buffer.start()
+            data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), 1)), "complete", None, None)
+
+            def update():
+                time.sleep(0.05)
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), 2)), "complete", None, None)
+
+            thread = threading.Thread(target=update)
+            thread.start()
+            data_and_metadata = data_channel_buffer.grab_next(timeout=3.0)[0]
+            thread.join()
+            self.assertTrue(numpy.array_equal(data_and_metadata.data, numpy.full((4, 4), 2)))
+            self.assertEqual(data_channel_buffer.drop_count, 1)
+
     def test_standard_data_element_constructs_metadata_with_hardware_source_as_dict(self):
         data_element = ScanAcquisitionTask(False, 0).make_data_element()
         data_item = ImportExportManager.create_data_item_from_data_element(data_element)
@@ -938,6 +1056,80 @@ class TestHardwareSourceClass(unittest.TestCase):
             hardware_source.stop_playing(sync_timeout=3.0)
             self.assertEqual(document_model._get_pending_data_item_updates_count(), 1)
 
+    def __setup_data_channel(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        hardware_source = HardwareSource.HardwareSource("channel_hardware_source", "Channel Hardware Source")
+        hardware_source.add_data_channel()
+        HardwareSource.HardwareSourceManager().register_hardware_source(hardware_source)
+        data_channel = hardware_source.data_channels[0]
+        data_channel.start()
+        return document_controller, document_model, data_channel
+
+    def test_data_channel_updates_count_frames_dropped_before_display(self):
+        document_controller, document_model, data_channel = self.__setup_data_channel()
+        with contextlib.closing(document_controller):
+            for i in range(3):
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i)), "complete", None, None)
+            self.assertEqual(document_model._get_pending_data_item_updates_count(), 1)
+            document_controller.periodic()
+            self.assertTrue(numpy.array_equal(document_model.data_items[0].data, numpy.full((4, 4), 2)))
+            counts = document_model.get_data_channel_update_counts()[0]
+            self.assertEqual(counts["hardware_source_id"], "channel_hardware_source")
+            self.assertEqual((counts["produced_count"], counts["displayed_count"], counts["dropped_count"], counts["pending_count"]), (3, 1, 2, 0))
+
+    def test_data_channel_update_policy_every_nth_displays_every_nth_frame(self):
+        document_controller, document_model, data_channel = self.__setup_data_channel()
+        with contextlib.closing(document_controller):
+            document_model.data_channel_update_policy = DocumentModel.DataChannelUpdatePolicy("every_nth", n=2)
+            displayed = list()
+            for i in range(4):
+                data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i)), "complete", None, None)
+                document_controller.periodic()
+                displayed.append(document_model.data_items[0].data[0, 0])
+            self.assertEqual(displayed, [0, 0, 2, 2])
+            counts = document_model.get_data_channel_update_counts()[0]
+            self.assertEqual((counts["produced_count"], counts["displayed_count"], counts["dropped_count"]), (4, 2, 2))
+
+    def test_data_channel_update_policy_block_waits_for_display(self):
+        document_controller, document_model, data_channel = self.__setup_data_channel()
+        with contextlib.closing(document_controller):
+            document_model.data_channel_update_policy = DocumentModel.DataChannelUpdatePolicy("block", timeout=10.0)
+
+            def update():
+                for i in range(2):
+                    data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i)), "complete", None, None)
+
+            thread = threading.Thread(target=update)
+            thread.start()
+            time.sleep(0.1)
+            self.assertTrue(thread.is_alive())
+            document_controller.periodic()
+            thread.join(3.0)
+            self.assertFalse(thread.is_alive())
+            document_controller.periodic()
+            counts = document_model.get_data_channel_update_counts()[0]
+            self.assertEqual((counts["produced_count"], counts["displayed_count"], counts["dropped_count"]), (2, 2, 0))
+
+    def test_data_channel_updates_are_discarded_when_data_item_is_removed(self):
+        document_controller, document_model, data_channel = self.__setup_data_channel()
+        with contextlib.closing(document_controller):
+            data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.zeros((4, 4))), "complete", None, None)
+            document_controller.periodic()
+            data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.ones((4, 4))), "complete", None, None)
+            self.assertEqual(document_model._get_pending_data_item_updates_count(), 1)
+            document_model.remove_data_item(document_model.data_items[0])
+            self.assertEqual(document_model._get_pending_data_item_updates_count(), 0)
+
+    def test_data_channel_update_counts_are_discarded_when_hardware_source_is_unregistered(self):
+        document_controller, document_model, data_channel = self.__setup_data_channel()
+        with contextlib.closing(document_controller):
+            data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.zeros((4, 4))), "complete", None, None)
+            self.assertEqual(len(document_model.get_data_channel_update_counts()), 1)
+            HardwareSource.HardwareSourceManager().unregister_hardware_source(HardwareSource.HardwareSourceManager().get_hardware_source_for_hardware_source_id("channel_hardware_source"))
+            self.assertEqual(len(document_model.get_data_channel_update_counts()), 0)
+            self.assertEqual(document_model._get_pending_data_item_updates_count(), 0)
+
     def test_two_acquisitions_succeed(self):
         document_controller, document_model, hardware_source = self.__setup_simple_hardware_source()
         with contextlib.closing(document_controller):
@@ -1032,6 +1224,89 @@ class TestHardwareSourceClass(unittest.TestCase):
             finally:
                 hardware_source.abort_playing()
 
+    def test_acquisition_statistics_record_intervals_and_jitter(self):
+        statistics = HardwareSource.AcquisitionStatistics(0.1)
+        for acquire_time in (0.0, 0.1, 0.3, 0.4):
+            statistics.record_acquisition(acquire_time)
+        statistics.restart()
+        statistics.record_acquisition(10.0)
+        d = statistics.as_dict()
+        self.assertEqual(d["count"], 3)
+        self.assertAlmostEqual(d["mean_interval"], 0.4 / 3)
+        self.assertAlmostEqual(d["min_interval"], 0.1)
+        self.assertAlmostEqual(d["max_interval"], 0.2)
+        self.assertAlmostEqual(d["jitter"], numpy.std([0.1, 0.2, 0.1]))
+        self.assertAlmostEqual(d["mean_error"], 0.1 / 3)
+        statistics.reset()
+        self.assertEqual(statistics.as_dict()["count"], 0)
+        self.assertIsNone(statistics.as_dict()["jitter"])
+
+    def test_target_rate_pacing_schedules_from_start_and_counts_late_acquisitions(self):
+        pacing = HardwareSource.TargetRatePacing(200.0)
+        pacing.start()
+        start_time = time.perf_counter()
+        for i in range(20):
+            pacing.wait()
+        elapsed = time.perf_counter() - start_time
+        self.assertGreaterEqual(elapsed, 19 * 0.005)
+        self.assertLess(elapsed, 20 * 0.005 + 0.1)
+        self.assertEqual(pacing.statistics.as_dict()["count"], 19)
+        time.sleep(0.02)
+        pacing.wait()
+        self.assertEqual(pacing.statistics.as_dict()["late_count"], 1)
+
+    def test_hardware_pacing_keeps_minimum_period_between_acquisitions_that_return_immediately(self):
+        pacing = HardwareSource.HardwarePacing(0.005)
+        pacing.start()
+        start_time = time.perf_counter()
+        for i in range(10):
+            pacing.wait()
+        self.assertGreaterEqual(time.perf_counter() - start_time, 9 * 0.005)
+        self.assertGreaterEqual(pacing.statistics.as_dict()["min_interval"], 0.005)
+
+    def test_record_during_view_does_not_reset_pacing_of_view(self):
+        document_controller, document_model, hardware_source = self.__setup_simple_hardware_source()
+        with contextlib.closing(document_controller):
+            hardware_source.sleep = 0.0
+            hardware_source.pacing = HardwareSource.TargetRatePacing(100.0)
+            hardware_source.start_playing()
+            try:
+                for i in range(4):
+                    hardware_source.get_next_xdatas_to_finish()
+                view_statistics = hardware_source.get_task_acquisition_statistics("view")
+                view_count = view_statistics.as_dict()["count"]
+                self.assertGreaterEqual(view_count, 3)
+                hardware_source.start_recording(sync_timeout=3.0)
+                start_time = time.time()
+                while hardware_source.is_recording:
+                    time.sleep(0.01)
+                    self.assertTrue(time.time() - start_time < 3.0)
+                self.assertIsNot(hardware_source.get_task_acquisition_statistics("record"), view_statistics)
+                self.assertIs(hardware_source.acquisition_statistics, hardware_source.get_task_acquisition_statistics("record"))
+                self.assertGreaterEqual(view_statistics.as_dict()["count"], view_count)
+                self.assertAlmostEqual(view_statistics.as_dict()["target_period"], 0.01)
+            finally:
+                hardware_source.abort_playing(sync_timeout=3.0)
+
+    def test_hardware_source_api_reports_acquisition_statistics_for_pacing(self):
+        document_controller, document_model, _hardware_source = self.__setup_simple_hardware_source()
+        with contextlib.closing(document_controller):
+            _hardware_source.sleep = 0.0
+            _hardware_source.pacing = HardwareSource.TargetRatePacing(100.0)
+            hardware_source = Facade.HardwareSource(_hardware_source)
+            hardware_source.start_playing()
+            try:
+                for i in range(6):
+                    hardware_source.grab_next_to_finish()
+            finally:
+                hardware_source.abort_playing()
+            statistics = hardware_source.get_acquisition_statistics()
+            self.assertEqual(statistics, hardware_source.get_acquisition_statistics("view"))
+            self.assertGreaterEqual(statistics["count"], 5)
+            self.assertAlmostEqual(statistics["target_period"], 0.01)
+            self.assertGreater(statistics["mean_interval"], 0.008)
+            self.assertIsNotNone(statistics["jitter"])
+
     def test_hardware_source_api_records_on_thread(self):
         document_controller, document_model, _hardware_source = self.__setup_simple_hardware_source()
         with contextlib.closing(document_controller):
@@ -9,6 +9,7 @@ import os
 import shutil
 import unittest
 import uuid
+import zipfile
 
 # third party libraries
 import numpy
@@ -141,6 +142,114 @@ class TestNDataHandlerClass(unittest.TestCase):
             #logging.debug("rmtree %s", data_dir)
             shutil.rmtree(data_dir)
 
+    def test_ndata_handler_reads_memmap_data(self):
+        now = datetime.datetime.now()
+        current_working_directory = os.getcwd()
+        data_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(data_dir)
+        try:
+            h = NDataHandler.NDataHandler(os.path.join(data_dir, "abc.ndata"), memmap_mode="r")
+            with contextlib.closing(h):
+                p = {u"uuid": str(uuid.uuid4())}
+                data = numpy.random.randn(8, 6).astype(numpy.float32)
+                h.write_properties(p, now)
+                h.write_data(data, now)
+                d = h.read_data()
+                self.assertIsInstance(d, numpy.memmap)
+                self.assertFalse(d.flags.writeable)
+                self.assertTrue(numpy.array_equal(d, data))
+                # rewriting data and properties leaves the existing memmap intact
+                h.write_data(numpy.zeros((4, 4), dtype=numpy.int16), now)
+                h.write_properties(p, now)
+                self.assertTrue(numpy.array_equal(d, data))
+                self.assertEqual(h.read_properties(), p)
+                dd = h.read_data()
+                self.assertEqual(dd.shape, (4, 4))
+                self.assertEqual(dd.dtype, numpy.int16)
+                del d, dd
+        finally:
+            #logging.debug("rmtree %s", data_dir)
+            shutil.rmtree(data_dir)
+
+    def test_ndata_handler_reads_copy_on_write_memmap_data(self):
+        now = datetime.datetime.now()
+        current_working_directory = os.getcwd()
+        data_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(data_dir)
+        try:
+            h = NDataHandler.NDataHandler(os.path.join(data_dir, "abc.ndata"), memmap_mode="c")
+            with contextlib.closing(h):
+                data = numpy.asfortranarray(numpy.arange(24).reshape(4, 6))
+                h.write_properties({u"uuid": str(uuid.uuid4())}, now)
+                h.write_data(data, now)
+                d = h.read_data()
+                self.assertIsInstance(d, numpy.memmap)
+                self.assertTrue(numpy.array_equal(d, data))
+                d[0, 0] = 99
+                self.assertEqual(h.read_data()[0, 0], 0)
+                del d
+        finally:
+            #logging.debug("rmtree %s", data_dir)
+            shutil.rmtree(data_dir)
+
+    def test_parse_zip_directory_matches_parse_zip(self):
+        now = datetime.datetime.now()
+        current_working_directory = os.getcwd()
+        data_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(data_dir)
+        try:
+            file_path = os.path.join(data_dir, "abc.ndata")
+            h = NDataHandler.NDataHandler(file_path)
+            with contextlib.closing(h):
+                h.write_properties({u"uuid": str(uuid.uuid4())}, now)
+                h.write_data(numpy.zeros((8, 8), dtype=numpy.uint16), now)
+                h.write_properties({u"uuid": str(uuid.uuid4()), u"abc": 1}, now)
+            with open(file_path, "rb") as fp:
+                self.assertEqual(NDataHandler.parse_zip_directory(fp), NDataHandler.parse_zip(fp))
+        finally:
+            #logging.debug("rmtree %s", data_dir)
+            shutil.rmtree(data_dir)
+
+    def test_parse_zip_directory_handles_extra_fields_and_comment(self):
+        current_working_directory = os.getcwd()
+        data_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(data_dir)
+        try:
+            file_path = os.path.join(data_dir, "abc.ndata")
+            with zipfile.ZipFile(file_path, "w", zipfile.ZIP_STORED) as zf:
+                zip_info = zipfile.ZipInfo("metadata.json")
+                zip_info.extra = b"\xfe\xca\x00\x00"
+                zf.writestr(zip_info, json.dumps({u"abc": 1}))
+                zf.comment = b"comment"
+            with open(file_path, "rb") as fp:
+                local_files, dir_files, eocd = NDataHandler.parse_zip_directory(fp)
+                self.assertEqual(NDataHandler.read_json(fp, local_files, dir_files, b"metadata.json"), {u"abc": 1})
+        finally:
+            #logging.debug("rmtree %s", data_dir)
+            shutil.rmtree(data_dir)
+
+    def test_ndata_handler_reads_properties_rewritten_with_same_size(self):
+        now = datetime.datetime.now()
+        current_working_directory = os.getcwd()
+        data_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(data_dir)
+        try:
+            file_path = os.path.join(data_dir, "abc.ndata")
+            h = NDataHandler.NDataHandler(file_path)
+            with contextlib.closing(h):
+                p = {u"abc": 1, u"uuid": str(uuid.uuid4())}
+                h.write_properties(p, now)
+                h.write_data(numpy.zeros((4, 4), dtype=numpy.float32), now)
+                self.assertTrue(NDataHandler.NDataHandler.is_matching(file_path))
+                self.assertEqual(h.read_properties(), p)
+                p[u"abc"] = 2
+                h.write_properties(p, now)
+                self.assertEqual(h.read_properties(), p)
+                self.assertEqual(h.read_data().shape, (4, 4))
+        finally:
+            #logging.debug("rmtree %s", data_dir)
+            shutil.rmtree(data_dir)
+
     def test_ndata_handles_corrupt_data(self):
         logging.getLogger().setLevel(logging.DEBUG)
         now = datetime.datetime.now()
@@ -154,6 +263,10 @@ class TestNDataHandlerClass(unittest.TestCase):
             with self.assertRaises(IOError):
                 with open(zero_path, "rb") as fp:
                     NDataHandler.parse_zip(fp)
+            with self.assertRaises(IOError):
+                with open(zero_path, "rb") as fp:
+                    NDataHandler.parse_zip_directory(fp)
+            self.assertFalse(NDataHandler.NDataHandler.is_matching(zero_path))
         finally:
             #logging.debug("rmtree %s", data_dir)
             shutil.rmtree(data_dir)
@@ -0,0 +1,190 @@
+# standard libraries
+import contextlib
+import io
+import logging
+import threading
+import time
+import unittest
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.data import Calibration
+from nion.data import DataAndMetadata
+from nion.swift import Application
+from nion.swift import DocumentController
+from nion.swift import Facade
+from nion.swift import RecorderPanel
+from nion.swift.model import DataItem
+from nion.swift.model import DocumentModel
+from nion.ui import TestUI
+
+
+Facade.initialize()
+
+
+class TestRecorderPanelClass(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Application.Application(TestUI.UserInterface(), set_global=False)
+
+    def tearDown(self):
+        pass
+
+    def test_recorder_records_each_frame_into_sequence(self):
+        frames = [DataAndMetadata.new_data_and_metadata(numpy.full((4, 6), i, dtype=numpy.float32), dimensional_calibrations=[Calibration.Calibration(units="nm"), Calibration.Calibration(units="nm")]) for i in range(5)]
+        frame_iter = iter(frames)
+        recorder = RecorderPanel.Recorder(lambda: next(frame_iter), 0.01, 5)
+        recorder.start()
+        start_time = time.perf_counter()
+        while not recorder.is_finished and time.perf_counter() - start_time < 5.0:
+            time.sleep(0.01)
+        recorder.stop()
+        self.assertEqual(recorder.recorded_count, 5)
+        sequence_xdata = recorder.sequence_xdata
+        self.assertTrue(sequence_xdata.is_sequence)
+        self.assertEqual(sequence_xdata.data_shape, (5, 4, 6))
+        self.assertEqual(sequence_xdata.data_dtype, numpy.float32)
+        self.assertEqual(sequence_xdata.dimensional_calibrations[0], Calibration.Calibration(scale=0.01, units="s"))
+        self.assertEqual(sequence_xdata.dimensional_calibrations[1].units, "nm")
+        for i in range(5):
+            self.assertTrue(numpy.array_equal(sequence_xdata.data[i], frames[i].data))
+
+    def test_recorder_keeps_frames_recorded_before_stop(self):
+        xdata = DataAndMetadata.new_data_and_metadata(numpy.ones((4, 4)))
+        recorder = RecorderPanel.Recorder(lambda: xdata, 10.0, 20)
+        recorder.start()
+        start_time = time.perf_counter()
+        while recorder.recorded_count == 0 and time.perf_counter() - start_time < 5.0:
+            time.sleep(0.01)
+        recorder.stop()
+        self.assertTrue(recorder.is_finished)
+        self.assertEqual(recorder.recorded_count, 1)
+        self.assertEqual(recorder.sequence_xdata.data_shape, (1, 4, 4))
+
+    def test_recorder_finishes_when_frame_shape_changes(self):
+        frames = iter([DataAndMetadata.new_data_and_metadata(numpy.ones((4, 4))), DataAndMetadata.new_data_and_metadata(numpy.ones((4, 5)))])
+        recorder = RecorderPanel.Recorder(lambda: next(frames), 0.0, 20)
+        recorder.start()
+        start_time = time.perf_counter()
+        while not recorder.is_finished and time.perf_counter() - start_time < 5.0:
+            time.sleep(0.01)
+        recorder.stop()
+        self.assertEqual(recorder.recorded_count, 1)
+
+    def test_recorder_finishes_when_frame_dtype_changes(self):
+        frames = iter([DataAndMetadata.new_data_and_metadata(numpy.ones((4, 4), numpy.float32)), DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), 0.5))])
+        recorder = RecorderPanel.Recorder(lambda: next(frames), 0.0, 20)
+        recorder.start()
+        start_time = time.perf_counter()
+        while not recorder.is_finished and time.perf_counter() - start_time < 5.0:
+            time.sleep(0.01)
+        recorder.stop()
+        self.assertEqual(recorder.recorded_count, 1)
+        self.assertEqual(recorder.sequence_xdata.data_dtype, numpy.float32)
+
+    def test_recorder_finishes_when_getting_frame_raises(self):
+        frames = iter([DataAndMetadata.new_data_and_metadata(numpy.ones((4, 4)))])
+        recorder = RecorderPanel.Recorder(lambda: next(frames), 0.0, 20)
+        thread_exceptions = list()
+        old_excepthook = threading.excepthook
+        threading.excepthook = thread_exceptions.append
+        try:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                recorder.start()
+                start_time = time.perf_counter()
+                while not recorder.is_finished and time.perf_counter() - start_time < 5.0:
+                    time.sleep(0.01)
+                recorder.stop()
+        finally:
+            threading.excepthook = old_excepthook
+        self.assertTrue(recorder.is_finished)
+        self.assertEqual(recorder.recorded_count, 1)
+        self.assertEqual(thread_exceptions, list())
+        self.assertIn("StopIteration", stderr.getvalue())
+
+    def __record_with_dialog(self, document_controller, data_item, interval, count):
+        recorder_dialog = RecorderPanel.RecorderDialog(document_controller, data_item)
+        recorder_dialog._recording_interval_model_for_testing.value = interval
+        recorder_dialog._recording_count_model_for_testing.value = count
+        recorder_dialog._record_button_for_testing.on_clicked()
+        return recorder_dialog
+
+    def __wait_for_recording_data_item(self, document_controller, recorder_dialog):
+        document_model = document_controller.document_model
+        start_time = time.perf_counter()
+        while len(document_model.data_items) < 2 and time.perf_counter() - start_time < 5.0:
+            time.sleep(0.01)
+            recorder_dialog.periodic()
+        self.assertEqual(len(document_model.data_items), 2)
+        return document_model.data_items[1]
+
+    def test_recorder_dialog_records_into_new_data_item_written_once(self):
+        memory_persistent_storage_system = DocumentModel.MemoryStorageSystem()
+        written_data = list()
+        memory_write_data = DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_data
+        def write_data(handler, data, file_datetime):
+            written_data.append((handler.reference, data.shape))
+            memory_write_data(handler, data, file_datetime)
+        DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_data = write_data
+        try:
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
+            document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+            with contextlib.closing(document_controller):
+                data_item = DataItem.DataItem(numpy.ones((4, 4)))
+                document_model.append_data_item(data_item)
+                with document_model.data_item_live(data_item):
+                    recorder_dialog = self.__record_with_dialog(document_controller, data_item, 0, 3)
+                    with contextlib.closing(recorder_dialog):
+                        recording_data_item = self.__wait_for_recording_data_item(document_controller, recorder_dialog)
+                        start_time = time.perf_counter()
+                        while recorder_dialog._record_button_for_testing.text != "Record" and time.perf_counter() - start_time < 5.0:
+                            time.sleep(0.01)
+                            recorder_dialog.periodic()
+                self.assertFalse(recording_data_item.in_transaction_state)
+                self.assertEqual(recording_data_item.xdata.data_shape, (3, 4, 4))
+                self.assertTrue(recording_data_item.xdata.is_sequence)
+                reference = str(recording_data_item.uuid)
+                self.assertEqual([w for w in written_data if w[0] == reference], [(reference, (3, 4, 4))])
+        finally:
+            DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_data = memory_write_data
+
+    def test_recorder_dialog_keeps_only_recorded_frames_when_stopped_early(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            data_item = DataItem.DataItem(numpy.ones((4, 4)))
+            document_model.append_data_item(data_item)
+            with document_model.data_item_live(data_item):
+                recorder_dialog = self.__record_with_dialog(document_controller, data_item, 10000, 20)
+                with contextlib.closing(recorder_dialog):
+                    recording_data_item = self.__wait_for_recording_data_item(document_controller, recorder_dialog)
+                    self.assertTrue(recording_data_item.in_transaction_state)
+                    recorder_dialog._record_button_for_testing.on_clicked()
+                    self.assertEqual(recorder_dialog._record_button_for_testing.text, "Record")
+            self.assertFalse(recording_data_item.in_transaction_state)
+            self.assertEqual(recording_data_item.xdata.data_shape, (1, 4, 4))
+            # the data is a copy rather than a view of the space allocated for all frames
+            self.assertIsNone(recording_data_item.data.base)
+
+    def test_recorder_dialog_stops_when_recording_data_item_is_deleted(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            data_item = DataItem.DataItem(numpy.ones((4, 4)))
+            document_model.append_data_item(data_item)
+            with document_model.data_item_live(data_item):
+                recorder_dialog = self.__record_with_dialog(document_controller, data_item, 10000, 20)
+                with contextlib.closing(recorder_dialog):
+                    recording_data_item = self.__wait_for_recording_data_item(document_controller, recorder_dialog)
+                    document_model.remove_data_item(recording_data_item)
+                    self.assertEqual(recorder_dialog._record_button_for_testing.text, "Record")
+                    recorder_dialog.periodic()
+                    self.assertEqual(len(document_model.data_items), 1)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -17,6 +17,7 @@ import numpy
 
 # local libraries
 from nion.data import Calibration
+from nion.data import DataAndMetadata
 from nion.swift import Application
 from nion.swift import DocumentController
 from nion.swift import Facade
@@ -26,6 +27,8 @@ from nion.swift.model import DataGroup
 from nion.swift.model import DataItem
 from nion.swift.model import DocumentModel
 from nion.swift.model import Graphics
+from nion.swift.model import HDF5Handler
+from nion.swift.model import NDataHandler
 from nion.swift.model import Symbolic
 from nion.ui import TestUI
 
@@ -277,6 +280,54 @@ class TestStorageClass(unittest.TestCase):
             with contextlib.closing(document_model):
                 self.assertEqual(data_read_count_ref[0], 0)
 
+    def test_reload_data_item_reads_only_displayed_slice_of_sequence(self):
+        memory_persistent_storage_system = DocumentModel.MemoryStorageSystem()
+        data = numpy.arange(4 * 8 * 8, dtype=numpy.uint32).reshape((4, 8, 8))
+        document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem()
+            data_item.ensure_data_source()
+            data_item.set_xdata(DataAndMetadata.new_data_and_metadata(data, data_descriptor=DataAndMetadata.DataDescriptor(True, 0, 2)))
+            document_model.append_data_item(data_item)
+        data_read_count_ref = [0]
+        def data_read(uuid):
+            data_read_count_ref[0] += 1
+        listener = memory_persistent_storage_system._test_data_read_event.listen(data_read)
+        with contextlib.closing(listener):
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
+            with contextlib.closing(document_model):
+                data_item = document_model.data_items[0]
+                display = data_item.displays[0]
+                display.sequence_index = 2
+                display_data = display.get_calculated_display_values(True).display_data_and_metadata.data
+                self.assertTrue(numpy.array_equal(display_data, data[2]))
+                self.assertTrue(numpy.array_equal(data_item.get_data_slice((1, slice(2, 4))), data[1, 2:4]))
+                self.assertEqual(data_read_count_ref[0], 0)
+
+    def test_data_item_get_data_slice_reads_slice_from_files(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        file_persistent_storage_system = DocumentModel.FileStorageSystem([workspace_dir])
+        try:
+            data = numpy.arange(4 * 6 * 8, dtype=numpy.float32).reshape((4, 6, 8))
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                for large_format in (False, True):
+                    data_item = DataItem.DataItem(data)
+                    data_item.large_format = large_format
+                    document_model.append_data_item(data_item)
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                self.assertEqual(len(document_model.data_items), 2)
+                for data_item in document_model.data_items:
+                    self.assertFalse(data_item.xdata.data_if_loaded)
+                    self.assertTrue(numpy.array_equal(data_item.get_data_slice((slice(1, 3), 2)), data[1:3, 2]))
+                    self.assertTrue(numpy.array_equal(data_item.get_data_slice((Ellipsis, 7)), data[..., 7]))
+                    self.assertFalse(data_item.xdata.data_if_loaded)
+        finally:
+            shutil.rmtree(workspace_dir)
+
     def test_reload_data_item_initializes_display_slice(self):
         memory_persistent_storage_system = DocumentModel.MemoryStorageSystem()
         document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
@@ -699,6 +750,187 @@ class TestStorageClass(unittest.TestCase):
             #logging.debug("rmtree %s", workspace_dir)
             shutil.rmtree(workspace_dir)
 
+    def test_file_storage_system_reads_data_items_in_same_order_with_multiple_workers(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        file_persistent_storage_system = DocumentModel.FileStorageSystem([workspace_dir])
+        try:
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                for i in range(12):
+                    data_item = DataItem.DataItem(numpy.full((4, 4), i, numpy.uint32))
+                    data_item.created = datetime.datetime(year=2000, month=1 + i % 3, day=1 + i, hour=15, minute=2)
+                    data_item.large_format = i % 4 == 0
+                    document_model.append_data_item(data_item)
+            references = [storage_handler.reference for storage_handler in DocumentModel.FileStorageSystem([workspace_dir], max_workers=1).find_data_items()]
+            threaded_references = [storage_handler.reference for storage_handler in DocumentModel.FileStorageSystem([workspace_dir], max_workers=4).find_data_items()]
+            self.assertEqual(len(references), 12)
+            self.assertEqual(references, threaded_references)
+            persistent_object_context = DocumentModel.PersistentDataItemContext([DocumentModel.FileStorageSystem([workspace_dir], max_workers=1)])
+            threaded_persistent_object_context = DocumentModel.PersistentDataItemContext([DocumentModel.FileStorageSystem([workspace_dir], max_workers=4)])
+            self.assertEqual(persistent_object_context.read_data_items_version_stats(), threaded_persistent_object_context.read_data_items_version_stats())
+            data_item_uuids = [data_item.uuid for data_item in persistent_object_context.read_data_items()]
+            threaded_data_item_uuids = [data_item.uuid for data_item in threaded_persistent_object_context.read_data_items()]
+            self.assertEqual(len(data_item_uuids), 12)
+            self.assertEqual(data_item_uuids, threaded_data_item_uuids)
+        finally:
+            #logging.debug("rmtree %s", workspace_dir)
+            shutil.rmtree(workspace_dir)
+
+    def test_file_storage_system_reads_unchanged_items_from_manifest(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        data_dir = os.path.join(workspace_dir, "Data")
+        manifest_path = os.path.join(workspace_dir, "Manifest.nsmanifest")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        read_properties_references = list()
+        ndata_read_properties = NDataHandler.NDataHandler.read_properties
+        def read_properties(handler):
+            read_properties_references.append(handler.reference)
+            return ndata_read_properties(handler)
+        NDataHandler.NDataHandler.read_properties = read_properties
+        try:
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[DocumentModel.FileStorageSystem([data_dir], manifest_path=manifest_path)])
+            with contextlib.closing(document_model):
+                for i in range(3):
+                    data_item = DataItem.DataItem(numpy.full((4, 4), i, numpy.uint32))
+                    data_item.title = "title" + str(i)
+                    document_model.append_data_item(data_item)
+                document_model.data_items[1].title = "Title1"
+            # all properties should be read from the manifest
+            read_properties_references.clear()
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[DocumentModel.FileStorageSystem([data_dir], manifest_path=manifest_path)])
+            with contextlib.closing(document_model):
+                self.assertEqual(read_properties_references, list())
+                self.assertEqual([data_item.title for data_item in document_model.data_items], ["title0", "Title1", "title2"])
+                self.assertTrue(numpy.array_equal(document_model.data_items[2].data, numpy.full((4, 4), 2, numpy.uint32)))
+                file_path = document_model.data_items[0]._test_get_file_path()
+                document_model.remove_data_item(document_model.data_items[2])
+            # change a file outside of the manifest; it should be read from the file
+            handler = NDataHandler.NDataHandler(file_path)
+            properties = handler.read_properties()
+            properties["description"]["title"] = "TITLE0"
+            handler.write_properties(properties, datetime.datetime.now())
+            read_properties_references.clear()
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[DocumentModel.FileStorageSystem([data_dir], manifest_path=manifest_path)])
+            with contextlib.closing(document_model):
+                self.assertEqual(read_properties_references, [file_path])
+                self.assertEqual([data_item.title for data_item in document_model.data_items], ["TITLE0", "Title1"])
+        finally:
+            NDataHandler.NDataHandler.read_properties = ndata_read_properties
+            #logging.debug("rmtree %s", workspace_dir)
+            shutil.rmtree(workspace_dir)
+
+    def test_file_storage_system_closes_manifest_when_document_model_closes(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        data_dir = os.path.join(workspace_dir, "Data")
+        manifest_path = os.path.join(workspace_dir, "Manifest.nsmanifest")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        closed_manifests = list()
+        library_manifest_close = DocumentModel.LibraryManifest.close
+        def close(manifest):
+            closed_manifests.append(manifest)
+            library_manifest_close(manifest)
+        DocumentModel.LibraryManifest.close = close
+        try:
+            file_persistent_storage_system = DocumentModel.FileStorageSystem([data_dir], manifest_path=manifest_path)
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                document_model.append_data_item(DataItem.DataItem(numpy.zeros((4, 4), numpy.uint32)))
+                self.assertEqual(len(closed_manifests), 0)
+            self.assertEqual(len(closed_manifests), 1)
+            # closing again is harmless
+            file_persistent_storage_system.close()
+            self.assertEqual(len(closed_manifests), 1)
+        finally:
+            DocumentModel.LibraryManifest.close = library_manifest_close
+            #logging.debug("rmtree %s", workspace_dir)
+            shutil.rmtree(workspace_dir)
+
+    def test_manifest_storage_handler_forwards_data_slice_writes(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        manifest_path = os.path.join(workspace_dir, "Manifest.nsmanifest")
+        file_path = os.path.join(workspace_dir, "data.bin")
+        Cache.db_make_directory_if_needed(workspace_dir)
+
+        class SliceStorageHandler:
+            def __init__(self):
+                self.slices = list()
+            @property
+            def reference(self):
+                return file_path
+            def write_data_slice(self, key, data, file_datetime):
+                self.slices.append((key, data))
+                with open(file_path, "wb") as f:
+                    f.write(data.tobytes())
+
+        manifest = DocumentModel.LibraryManifest(manifest_path)
+        try:
+            with open(file_path, "wb") as f:
+                f.write(bytes(4))
+            properties = {"uuid": str(uuid.uuid4())}
+            manifest.write_properties(file_path, DocumentModel.LibraryManifest.get_file_key(file_path), properties)
+            storage_handler = SliceStorageHandler()
+            manifest_storage_handler = DocumentModel.ManifestStorageHandler(storage_handler, manifest)
+            manifest_storage_handler.write_data_slice(slice(0, 2), numpy.ones((2, 4), numpy.uint32), datetime.datetime.now())
+            self.assertEqual(len(storage_handler.slices), 1)
+            self.assertEqual(storage_handler.slices[0][0], slice(0, 2))
+            # the manifest entry follows the file so the properties are still read from the manifest
+            file_key = DocumentModel.LibraryManifest.get_file_key(file_path)
+            self.assertEqual(manifest.read_properties(file_path, file_key), properties)
+        finally:
+            manifest.close()
+            #logging.debug("rmtree %s", workspace_dir)
+            shutil.rmtree(workspace_dir)
+
+    def test_manifest_storage_handler_reads_data_slice_from_handler_without_slice_reads(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        manifest_path = os.path.join(workspace_dir, "Manifest.nsmanifest")
+        Cache.db_make_directory_if_needed(workspace_dir)
+
+        class DataStorageHandler:
+            def __init__(self, data):
+                self.data = data
+            @property
+            def reference(self):
+                return os.path.join(workspace_dir, "data.bin")
+            def read_data(self):
+                return self.data
+
+        manifest = DocumentModel.LibraryManifest(manifest_path)
+        try:
+            data = numpy.arange(16).reshape(4, 4)
+            manifest_storage_handler = DocumentModel.ManifestStorageHandler(DataStorageHandler(data), manifest)
+            self.assertTrue(numpy.array_equal(manifest_storage_handler.read_data_slice((slice(1, 3), slice(0, 2))), data[1:3, 0:2]))
+            self.assertIsNone(DocumentModel.ManifestStorageHandler(DataStorageHandler(None), manifest).read_data_slice(slice(0, 1)))
+        finally:
+            manifest.close()
+            shutil.rmtree(workspace_dir)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "requires symbolic links")
+    def test_file_storage_system_does_not_follow_symbolic_links_to_directories(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        file_persistent_storage_system = DocumentModel.FileStorageSystem([workspace_dir])
+        try:
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                for i in range(3):
+                    document_model.append_data_item(DataItem.DataItem(numpy.full((4, 4), i, numpy.uint32)))
+            # a symbolic link to the library inside the library would loop if followed
+            os.symlink(workspace_dir, os.path.join(workspace_dir, "loop"), target_is_directory=True)
+            for max_workers in (1, 4):
+                storage_handlers = DocumentModel.FileStorageSystem([workspace_dir], max_workers=max_workers).find_data_items()
+                self.assertEqual(len(storage_handlers), 3)
+        finally:
+            #logging.debug("rmtree %s", workspace_dir)
+            shutil.rmtree(workspace_dir)
+
     def test_data_changes_update_large_format_file(self):
         current_working_directory = os.getcwd()
         workspace_dir = os.path.join(current_working_directory, "__Test")
@@ -722,6 +954,140 @@ class TestStorageClass(unittest.TestCase):
             #logging.debug("rmtree %s", workspace_dir)
             shutil.rmtree(workspace_dir)
 
+    def test_large_format_storage_policy_chunks_and_compresses_data(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        file_persistent_storage_system = DocumentModel.FileStorageSystem([workspace_dir])
+        try:
+            data = numpy.arange(4 * 8 * 16, dtype=numpy.uint16).reshape((4, 8, 16))
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(data)
+                data_item.large_format = True
+                data_item.large_format_storage_policy = HDF5Handler.HDF5StoragePolicy(chunks="frame", compression="gzip", shuffle=True, resizable=True)
+                document_model.append_data_item(data_item)
+                file_path = data_item._test_get_file_path()
+                # growing along the sequence axis resizes the data set in place
+                document_model.data_items[0].set_data(numpy.concatenate([data, data]))
+            handler = HDF5Handler.HDF5Handler(file_path)
+            with contextlib.closing(handler):
+                dataset = handler.read_data()
+                self.assertEqual(dataset.chunks, (1, 8, 16))
+                self.assertEqual(dataset.compression, "gzip")
+                self.assertTrue(dataset.shuffle)
+                self.assertEqual(dataset.maxshape, (None, 8, 16))
+                self.assertTrue(numpy.array_equal(dataset[...], numpy.concatenate([data, data])))
+                self.assertEqual(handler.read_properties()["uuid"], str(data_item.uuid))
+            # the storage policy is restored when reloaded
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                storage_policy = document_model.data_items[0].large_format_storage_policy
+                self.assertEqual((storage_policy.chunks, storage_policy.compression, storage_policy.shuffle, storage_policy.resizable), ("frame", "gzip", True, True))
+        finally:
+            shutil.rmtree(workspace_dir)
+
+    def test_storage_policy_chunks_match_data_rank_and_empty_dimensions(self):
+        storage_policy = HDF5Handler.HDF5StoragePolicy(chunks=(4, 4), compression="gzip")
+        self.assertEqual(storage_policy.get_dataset_kwargs((3, 8, 8), numpy.float32)["chunks"], (1, 4, 4))
+        self.assertEqual(storage_policy.get_dataset_kwargs((2, 2), numpy.float32)["chunks"], (2, 2))
+        self.assertEqual(storage_policy.get_dataset_kwargs((3, 0), numpy.float32), dict())
+        storage_policy = HDF5Handler.HDF5StoragePolicy(chunks="frame", resizable=True)
+        dataset_kwargs = storage_policy.get_dataset_kwargs((0, 8, 8), numpy.float32)
+        self.assertEqual(dataset_kwargs["chunks"], (1, 8, 8))
+        self.assertEqual(dataset_kwargs["maxshape"], (None, 8, 8))
+
+    def test_sub_area_update_writes_only_changed_area_of_large_format_data(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        file_persistent_storage_system = DocumentModel.FileStorageSystem([workspace_dir])
+        written_keys = list()
+        hdf5_write_data_slice = HDF5Handler.HDF5Handler.write_data_slice
+        def write_data_slice(handler, key, data, file_datetime):
+            written_keys.append(key)
+            hdf5_write_data_slice(handler, key, data, file_datetime)
+        HDF5Handler.HDF5Handler.write_data_slice = write_data_slice
+        try:
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(numpy.zeros((8, 8), numpy.float32), large_format=True)
+                document_model.append_data_item(data_item)
+                data = numpy.zeros((8, 8), numpy.float32)
+                data[2:4, 1:6] = 1
+                document_model.update_data_item_xdata(data_item, DataAndMetadata.new_data_and_metadata(data), ((2, 1), (2, 5)))
+                self.assertEqual(written_keys, [(slice(2, 4), slice(1, 6))])
+                # an unknown changed area rewrites the data
+                document_model.update_data_item_xdata(data_item, DataAndMetadata.new_data_and_metadata(data + 1))
+                self.assertEqual(len(written_keys), 1)
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[file_persistent_storage_system])
+            with contextlib.closing(document_model):
+                self.assertTrue(numpy.array_equal(document_model.data_items[0].data, data + 1))
+        finally:
+            HDF5Handler.HDF5Handler.write_data_slice = hdf5_write_data_slice
+            shutil.rmtree(workspace_dir)
+
+    def test_batch_computation_writes_each_new_data_item_once_with_its_result(self):
+        memory_persistent_storage_system = DocumentModel.MemoryStorageSystem()
+        written = list()
+        memory_write_properties = DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_properties
+        memory_write_data = DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_data
+        def write_properties(handler, properties, file_datetime):
+            written.append((handler.reference, "properties"))
+            memory_write_properties(handler, properties, file_datetime)
+        def write_data(handler, data, file_datetime):
+            written.append((handler.reference, "data"))
+            memory_write_data(handler, data, file_datetime)
+        DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_properties = write_properties
+        DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_data = write_data
+        try:
+            document_model = DocumentModel.DocumentModel(persistent_storage_systems=[memory_persistent_storage_system])
+            with contextlib.closing(document_model):
+                data_items = list()
+                for i in range(4):
+                    data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+                    document_model.append_data_item(data_item)
+                    data_items.append(data_item)
+                # a new data item appended outside of a transaction is written once
+                written.clear()
+                document_model.append_data_item(DataItem.DataItem(numpy.zeros((8, 8))))
+                single_write_property_count = len([w for w in written if w[1] == "properties"])
+                written.clear()
+                inverted_data_items = document_model.make_data_items_with_computation("invert", [[(data_item, None)] for data_item in data_items])
+                for data_item, inverted_data_item in zip(data_items, inverted_data_items):
+                    reference = str(inverted_data_item.uuid)
+                    self.assertEqual(len([w for w in written if w == (reference, "data")]), 1)
+                    self.assertLessEqual(len([w for w in written if w == (reference, "properties")]), single_write_property_count)
+                    self.assertTrue(numpy.array_equal(memory_persistent_storage_system.data[reference], -data_item.data))
+                    self.assertIn("computation", memory_persistent_storage_system.properties[reference])
+        finally:
+            DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_properties = memory_write_properties
+            DocumentModel.MemoryStorageSystem.MemoryStorageHandler.write_data = memory_write_data
+
+    def test_hdf5_handler_writes_slices_and_keeps_layout_when_rewritten(self):
+        current_working_directory = os.getcwd()
+        workspace_dir = os.path.join(current_working_directory, "__Test")
+        Cache.db_make_directory_if_needed(workspace_dir)
+        try:
+            file_path = os.path.join(workspace_dir, "File.h5")
+            handler = HDF5Handler.HDF5Handler(file_path, HDF5Handler.HDF5StoragePolicy(chunks=(2, 4, 4), compression="lzf"))
+            with contextlib.closing(handler):
+                handler.write_data(numpy.zeros((4, 4, 4), numpy.float32), datetime.datetime.utcnow())
+                handler.write_data_slice((slice(1, 2), ), numpy.ones((1, 4, 4), numpy.float32), datetime.datetime.utcnow())
+                self.assertEqual(handler.read_data()[...].sum(), 16)
+            # the data set is not resizable and the dtype changes, so the file is rewritten with the same layout
+            handler = HDF5Handler.HDF5Handler(file_path)
+            with contextlib.closing(handler):
+                handler.write_properties({"uuid": "abc"}, datetime.datetime.utcnow())
+                handler.write_data(numpy.ones((3, 4, 4), numpy.int32), datetime.datetime.utcnow())
+                dataset = handler.read_data()
+                self.assertEqual(dataset.dtype, numpy.int32)
+                self.assertEqual(dataset.chunks, (2, 4, 4))
+                self.assertEqual(dataset.compression, "lzf")
+                self.assertEqual(handler.read_properties(), {"uuid": "abc"})
+        finally:
+            shutil.rmtree(workspace_dir)
+
     def test_writing_empty_data_item_returns_expected_values(self):
         cache_name = ":memory:"
         current_working_directory = os.getcwd()
@@ -1081,6 +1081,27 @@ class TestSymbolicClass(unittest.TestCase):
             document_model.recompute_all()
             self.assertEqual(computation._evaluation_count_for_test - evaluation_count, 1)
 
+    def test_computation_compiles_expression_only_when_expression_changes(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            src_data = numpy.zeros((2, 2), numpy.int32)
+            data_item = DataItem.DataItem(src_data)
+            document_model.append_data_item(data_item)
+            computation = document_model.create_computation(Symbolic.xdata_expression("a.xdata + s"))
+            s = computation.create_variable("s", value_type="integral", value=5)
+            computation.create_object("a", document_model.get_object_specifier(data_item))
+            computed_data_item = DataItem.DataItem(src_data.copy())
+            document_model.append_data_item(computed_data_item)
+            document_model.set_data_item_computation(computed_data_item, computation)
+            document_model.recompute_all()
+            self.assertEqual(computation._compile_count_for_test, 1)
+            s.value = 4
+            document_model.recompute_all()
+            self.assertEqual(computation._compile_count_for_test, 1)
+            self.assertEqual(computation.last_compile_duration, 0.0)
+            self.assertGreater(computation.last_execute_duration, 0.0)
+            self.assertTrue(numpy.array_equal(computed_data_item.data, src_data + 4))
+
     def test_computation_with_object_writes_and_reads(self):
         document_model = DocumentModel.DocumentModel()
         with contextlib.closing(document_model):
@@ -734,6 +734,32 @@ class Library:
         """
         ...
 
+    def get_computation_profile(self) -> typing.List[dict]:
+        """Return the timings of the computations in the library, most total compute time first.
+
+        Each entry is a dict describing the computation of a data item with keys data_item_uuid, title, processing_id,
+        computation_count, memoized_count, incremental_count, cancelled_count and result_nbytes. The keys
+        queue_latency, evaluate_duration, compute_duration and merge_duration map to dicts of count, total, max, last
+        and mean, in seconds.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        ...
+
+    def get_data_channel_update_counts(self) -> typing.List[dict]:
+        """Return the frames of each hardware source data channel produced, displayed and dropped before display.
+
+        Each entry is a dict with keys hardware_source_id, channel_id, produced_count, displayed_count, dropped_count
+        and pending_count. Frames are dropped when the display falls behind the acquisition.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        ...
+
     def get_data_item_by_uuid(self, data_item_uuid: uuid.UUID) -> DataItem:
         """Get the data item with the given UUID.
 
@@ -827,6 +853,24 @@ class Library:
         """
         ...
 
+    def reset_computation_profile(self) -> None:
+        """Clear the timings of the computations in the library.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        ...
+
+    def reset_data_channel_update_counts(self) -> None:
+        """Clear the counts of the frames of the hardware source data channels in the library.
+
+        .. versionadded:: 1.0
+
+        Scriptable: Yes
+        """
+        ...
+
     def set_library_value(self, key: str, value: typing.Any) -> None:
         """Set the library value for the given key.
 
@@ -152,6 +152,22 @@ class HardwareSource:
         """
         ...
 
+    def get_acquisition_statistics(self, task_id: str=None) -> dict:
+        """Return the statistics of the intervals between acquisitions of a task of this hardware source.
+
+        The statistics are a dict with keys count, mean_interval, min_interval, max_interval, jitter (the standard
+        deviation of the intervals), target_period, mean_error (the mean absolute difference between the intervals and
+        the target period) and late_count, in seconds. Values are None when unknown.
+
+        .. versionadded:: 1.0
+
+        :param task_id: The task, 'view' or 'record'. Pass None for the most recently started task.
+        :type task_id: str
+
+        Scriptable: Yes
+        """
+        ...
+
     def get_default_frame_parameters(self) -> dict:
         ...
 